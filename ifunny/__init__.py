@@ -1 +1 @@
-from ifunny.client import Client
+from ifunny.client import Client, ClientPool
@@ -1 +1,7 @@
 from ifunny.client._client import Client
+from ifunny.client._pool import ClientPool
+from ifunny.client._notifications import NotificationStream
+from ifunny.client._async import AsyncSocket
+from ifunny.client._hub import SocketHub
+from ifunny.client._queue import SendQueue
+from ifunny.client._handler import Filter
@@ -0,0 +1,279 @@
+import asyncio, threading, requests
+
+from ifunny.client import _sendbird as sendbird
+from ifunny.util import exceptions
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+
+class AsyncSocket(sendbird.Socket):
+    """
+    Sendbird chat socket of a client that runs on an asyncio event loop instead of a thread.
+    Websocket messages are handled on the loop as they come, without a thread for each one,
+    and events and commands that are coroutine functions are run as tasks on the same loop.
+    Events and commands that are not coroutine functions block the loop while they run, so slow ones should be async.
+    Reconnecting and catching up on missed messages works the same as with ``Socket``.
+    If ``dispatcher`` is set to an executor, websocket messages are handled there instead of on the loop (see ``SocketHub``).
+
+    Requires the ``websockets`` package (``pip install ifunny[async]``)
+
+    :param client: client that the socket belongs to
+    :param trace: unused, kept so that both transports are made the same way
+    :param reconnect: open the socket again when it drops?
+    :param backoff: seconds to wait before the first reconnect
+    :param max_backoff: most seconds to wait between reconnects
+    :param catch_up: most number of messages to fetch for each chat after reconnecting
+
+    :type client: Client
+    :type trace: bool
+    :type reconnect: bool
+    :type backoff: float
+    :type max_backoff: float
+    :type catch_up: int
+    """
+    def __init__(self,
+                 client,
+                 trace = False,
+                 reconnect = True,
+                 backoff = 1,
+                 max_backoff = 60,
+                 catch_up = 200):
+        super().__init__(client,
+                         trace,
+                         False,
+                         reconnect = reconnect,
+                         backoff = backoff,
+                         max_backoff = max_backoff,
+                         catch_up = catch_up)
+        self.loop = None
+        self.task = None
+        self.dispatcher = None
+
+        self._connection = None
+        self._wakeup = None
+        self._tasks = set()
+
+    # websocket hooks
+
+    def on_close(self, *args):
+        self.active = False
+        self.connected = False
+        self.client.handler._on_disconnect()
+
+    def on_message(self, *args):
+        if self.dispatcher:
+            return self.loop.run_in_executor(self.dispatcher, self._resolve,
+                                             args[-1])
+
+        self._resolve(args[-1])
+
+    # private methods
+
+    def _resolve(self, data):
+        try:
+            self.client.handler.resolve(data)
+
+        except Exception as error:
+            self.on_error(error)
+
+    def _connect(self, url):
+        if websockets is None:
+            raise ImportError(
+                "the asyncio transport needs websockets, install it with pip install ifunny[async]"
+            )
+
+        return websockets.connect(url, ping_interval = 15)
+
+    def _spawn(self, coroutine):
+        try:
+            running = asyncio.get_running_loop()
+
+        except RuntimeError:
+            running = None
+
+        # frames handled on the threads of a SocketHub dispatcher are not on the loop
+        if running is not self.loop:
+            return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+        task = self.loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _backoff(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self._delay())
+
+        except asyncio.TimeoutError:
+            pass
+
+    def _catch_up_all(self):
+        self._spawn(self._catch_up())
+
+    async def _catch_up(self):
+        with self._seen_lock:
+            seen = {**self.last_seen}
+
+        for channel_url, since in seen.items():
+            try:
+                missed = await self.loop.run_in_executor(
+                    None, self._missed, channel_url, since)
+
+            except Exception as error:
+                self.on_error(error)
+                continue
+
+            for message in missed:
+                self.client.handler._on_missed(message)
+
+    def _reset(self):
+        self._stopping.clear()
+        self._resume = False
+        self.attempts = 0
+        self.active = True
+
+    def _wake(self):
+        self._wakeup.set()
+
+        if self._connection:
+            self._spawn(self._connection.close())
+
+    # public methods
+
+    async def run(self):
+        """
+        Connect and handle the chat socket until ``stop`` is called.
+        Await this from your own event loop to run the chat next to everything else on it.
+        Anything that may need a request (our id, nick and tokens) is done in the default executor, not on the loop
+        """
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        if self._stopping.is_set():
+            self._wakeup.set()
+
+        try:
+            await self.loop.run_in_executor(None, self.client.handler.pin_self)
+
+        except Exception as error:
+            self.on_error(error)
+
+        while not self._stopping.is_set():
+            if not self._routed:
+                try:
+                    await self.loop.run_in_executor(None, self._resolve_route)
+
+                except (requests.RequestException, ValueError,
+                        KeyError) as error:
+                    self.on_error(error)
+
+            self.connected = False
+            self.active = True
+
+            try:
+                url = await self.loop.run_in_executor(None, self._url)
+
+                async with self._connect(url) as connection:
+                    self._connection = connection
+
+                    async for data in connection:
+                        self.on_message(data)
+
+            except ImportError:
+                raise
+
+            except Exception as error:
+                self.on_error(error)
+
+            finally:
+                self._connection = None
+                self.on_close()
+
+            if self._stopping.is_set() or not self.reconnect:
+                break
+
+            if not self.connected:
+                self._resume = False
+                self._routed = False
+
+            else:
+                self._resume = True
+
+            self.attempts += 1
+            await self._backoff()
+
+        self.active = False
+
+    def start(self):
+        """
+        Start the chat socket. Inside of a running event loop, it is run as a task on that loop.
+        Otherwise, a thread is started to run a loop for it
+
+        :returns: self
+        :rtype: AsyncSocket
+        """
+        if not self.client:
+            raise TypeError(f"client cannont be {self.client}")
+
+        self._reset()
+
+        try:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+        except RuntimeError:
+            self.socket_thread = threading.Thread(target = asyncio.run,
+                                                  args = [self.run()])
+            self.socket_thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stop the chat socket. Can be called from any thread
+
+        :returns: self
+        :rtype: AsyncSocket
+        """
+        self._stopping.set()
+
+        if self.queue is not None:
+            self.queue.stop()
+
+        self.acks.reject_all(
+            exceptions.ChatNotActive("The chat socket was stopped"))
+
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wake)
+
+        self.active = False
+        return self
+
+    def send(self, data):
+        """
+        Send something through the socket. Can be called from any thread
+
+        :param data: frame to send
+
+        :type data: str
+
+        :returns: a task when called on the loop of the socket, otherwise a concurrent future
+        :rtype: asyncio.Task or concurrent.futures.Future
+        """
+        if not self._connection:
+            raise exceptions.ChatNotActive(
+                "The chat socket is not connected")
+
+        try:
+            running = asyncio.get_running_loop()
+
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            return self._spawn(self._connection.send(data))
+
+        return asyncio.run_coroutine_threadsafe(self._connection.send(data),
+                                                self.loop)
@@ -1,4 +1,4 @@
-import json, time
+import inspect, json, re, threading, time
 import requests
 
 from random import random
@@ -8,9 +8,12 @@ from pathlib import Path
 
 from ifunny import objects
 from ifunny.util import methods, exceptions
+from ifunny.ext import broadcast as _broadcast
 from ifunny.ext import commands
 from ifunny.client import _handler as handler
 from ifunny.client import _sendbird as sendbird
+from ifunny.client import _async as aio
+from ifunny.client import _notifications as notifications
 
 
 class Client(objects._mixin.ClientBase):
@@ -19,32 +22,49 @@ class Client(objects._mixin.ClientBase):
 
     :param trace: enable websocket_client trace? (debug)
     :param threaded: False to have all socket callbacks run in the same thread for debugging
-    :param prefix: Static string or callable prefix for chat commands
+    :param prefix: Static string or callable prefix for chat commands. A callable can take the Message being handled, and its result is kept for ``prefix_ttl`` seconds for each chat
     :param paginated_size: Number of items to request in paginated methods
+    :param cache: persistent cache for object payloads, or None to always request them
+    :param transport: chat socket to use. Can be one of (``thread``, ``asyncio``). ``asyncio`` needs the ``websockets`` package
 
     :type trace: bool
     :type threaded: bool
     :type prefix: str or callable
     :type paginated_size: int
+    :type cache: ifunny.util.cache.ObjectCache
+    :type transport: str
     """
     commands = {"help": commands.Defaults.help}
+    prefix_ttl = 60
 
     def __init__(self,
                  trace = False,
                  threaded = True,
                  prefix = {""},
                  paginated_size = 25,
-                 captcha_api_key = None):
+                 captcha_api_key = None,
+                 cache = None,
+                 transport = "thread"):
         super().__init__(paginated_size = paginated_size,
-                         captcha_api_key = captcha_api_key)
+                         captcha_api_key = captcha_api_key,
+                         cache = cache)
         # command
         self.__prefix = None
+        self.__prefix_pattern = None
+        self.__prefix_patterns = {}
+        self.__prefix_takes_message = False
         self.prefix = prefix
+        self.executor = None
 
         # api info
         self.__token = None
         self.__id = None
 
+        # saved for logging in again when a token that was not checked is rejected
+        self.__credentials = None
+        self.__credentials_lock = threading.RLock()
+        self.__unvalidated = None
+
         # sendbird api info
         self.sendbird_session_key = None
         self.__messenger_token = None
@@ -54,18 +74,138 @@ class Client(objects._mixin.ClientBase):
 
         self.handler = handler.Handler(self)
 
-        self.socket = sendbird.Socket(self, trace, threaded)
+        if transport == "thread":
+            self.socket = sendbird.Socket(self, trace, threaded)
+
+        elif transport == "asyncio":
+            self.socket = aio.AsyncSocket(self, trace)
+
+        else:
+            raise ValueError(f"transport cannot be {transport}")
 
         # own profile data
         self.__user = None
         self._object_data_payload = None
         self._update = False
+        self.__notification_stream = None
 
     def __repr__(self):
         return self.user.nick
 
     # private methods
 
+    def __request_token(self, email, password):
+        data = {
+            "grant_type": "password",
+            "username": email,
+            "password": password
+        }
+
+        token = methods.request("post",
+                                f"{self.api}/oauth2/token",
+                                headers = self.headers,
+                                data = data,
+                                client = self)["access_token"]
+
+        self._config_store.update_account(email,
+                                          token = token,
+                                          validated_at = time.time())
+
+        return token
+
+    def _reauthenticate(self, authorization = None):
+        with self.__credentials_lock:
+            if self.__credentials is None:
+                # another request may have logged in again since this one was sent
+                return bool(self.__token and authorization and
+                            authorization != f"Bearer {self.__token}")
+
+            email, password = self.__credentials
+            self.__credentials = None
+            self.__unvalidated = None
+            self.__token = None
+
+            try:
+                self.__token = self.__request_token(email, password)
+
+            except exceptions.BadAPIResponse:
+                return False
+
+            return True
+
+    def _validated(self):
+        email = self.__unvalidated
+
+        if email is None:
+            return
+
+        self.__unvalidated = None
+        self._config_store.update_account(email, validated_at = time.time())
+
+    @staticmethod
+    def _compile_prefix(prefixes):
+        """
+        One pattern that matches the longest prefix that a word starts with
+        """
+        if not prefixes:
+            return re.compile("(?!)")
+
+        ordered = sorted(set(prefixes), key = len, reverse = True)
+        return re.compile("|".join(re.escape(prefix) for prefix in ordered))
+
+    def _call_prefix(self, message = None):
+        if self.__prefix_takes_message:
+            return self.__prefix(message)
+
+        return self.__prefix()
+
+    def _prefix_for(self, message):
+        if not callable(self.__prefix):
+            return self.__prefix_pattern
+
+        now = time.monotonic()
+        key = message.channel_url
+        cached = self.__prefix_patterns.get(key)
+
+        if cached and cached[1] > now:
+            return cached[0]
+
+        prefix = self._call_prefix(message)
+        pattern = self._compile_prefix(
+            [prefix] if isinstance(prefix, str) else prefix)
+
+        if len(self.__prefix_patterns) >= 4096:
+            self.__prefix_patterns = {
+                key: value
+                for key, value in self.__prefix_patterns.items()
+                if value[1] > now
+            }
+
+        self.__prefix_patterns[key] = (pattern, now + self.prefix_ttl)
+        return pattern
+
+    def _could_be_command(self, content):
+        """
+        Cheap check on raw message text, before a Message is made for it.
+        Prefixes that change per message are not known yet, so anything could be a command
+        """
+        if not content:
+            return False
+
+        if callable(self.__prefix):
+            return True
+
+        return bool(self.__prefix_pattern.match(content.partition(" ")[0]))
+
+    def _command_error(self, error):
+        """
+        Errors of commands run on an executor. Raising it has the executor print it
+        """
+        if "on_error" not in self.handler.events:
+            raise error
+
+        self.handler._on_error(error)
+
     def _achievements_paginated(self, limit = None, next = None, prev = None):
         limit = limit if limit else self.paginated_size
 
@@ -74,7 +214,8 @@ class Client(objects._mixin.ClientBase):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self)
 
         items = [
             objects.Achievement(item["id"], client = self, data = item)
@@ -90,7 +231,8 @@ class Client(objects._mixin.ClientBase):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self)
 
         items = [
             objects.Post(item["id"], client = self, data = item)
@@ -106,7 +248,8 @@ class Client(objects._mixin.ClientBase):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self)
 
         items = [
             objects.Post(item["id"], client = self, data = item)
@@ -123,7 +266,8 @@ class Client(objects._mixin.ClientBase):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self)
 
         items = [
             objects.Comment(item["id"],
@@ -195,7 +339,8 @@ class Client(objects._mixin.ClientBase):
             if self.authenticated:
                 self._object_data_payload = methods.request(
                     "get", f"{self.api}/account",
-                    headers = self.headers)["data"]
+                    headers = self.headers,
+                    client = self)["data"]
             else:
                 self._object_data_payload = {}
 
@@ -203,18 +348,29 @@ class Client(objects._mixin.ClientBase):
 
     # public methods
 
-    def login(self, email, password = "", force = False):
+    def login(self,
+              email,
+              password = "",
+              force = False,
+              lazy = False,
+              validate_ttl = 3600):
         """
         Authenticate with iFunny to get an API token.
-        Will try to load saved account tokens (saved as plaintext json, indexed by `email_token`) if `force` is False
+        Will try to load saved account tokens (saved as plaintext json in a record for each account) if `force` is False.
+        A saved token is checked with iFunny unless it was checked less than ``validate_ttl`` seconds ago, or ``lazy`` is set.
+        Tokens that are not checked are used as is, and if iFunny rejects one later on, the client logs in again with ``email`` and ``password`` and retries the request
 
         :param email: Email associated with the account
         :param password: Password associated with the account
         :param force: Ignore saved Bearer tokens?
+        :param lazy: Skip checking a saved token until the first real request?
+        :param validate_ttl: seconds that a saved token is trusted for after it was checked
 
         :type email: str
         :type password: str
         :type force: bool
+        :type lazy: bool
+        :type validate_ttl: int
 
         :returns: self
         :rtype: Client
@@ -224,33 +380,35 @@ class Client(objects._mixin.ClientBase):
             raise exceptions.AlreadyAuthenticated(
                 f"This client instance already authenticated as {self.nick}")
 
-        if not force and self._config.get(f"{email}_token"):
-            self.__token = self._config[f"{email}_token"]
+        account = self._config_store.account(email)
+        token = account.get("token", self._config.get(f"{email}_token"))
+
+        if not force and token:
+            self.__token = token
+            validated_at = account.get("validated_at", 0)
+
+            if lazy or time.time() - validated_at < validate_ttl:
+                self.__credentials = (email, password)
+                self.__unvalidated = email if lazy else None
+                self.authenticated = True
+                return self
 
             try:
                 methods.request("get",
                                 f"{self.api}/account",
-                                headers = self.headers)
+                                headers = self.headers,
+                                client = self)
                 self.authenticated = True
+                self._config_store.update_account(email,
+                                                  validated_at = time.time())
                 return self
 
             except exceptions.BadAPIResponse:
                 self.__token = None
 
-        data = {
-            "grant_type": "password",
-            "username": email,
-            "password": password
-        }
-
-        self.__token = methods.request("post",
-                                       f"{self.api}/oauth2/token",
-                                       headers = self.headers,
-                                       data = data)["access_token"]
+        self.__token = self.__request_token(email, password)
         self.authenticated = True
-        self._config[f"{email}_token"] = self.__token
 
-        self._update_config()
         return self
 
     def post_image_url(self, image_url, **kwargs):
@@ -327,7 +485,8 @@ class Client(objects._mixin.ClientBase):
                              headers = self.headers,
                              data = data,
                              files = files,
-                             codes = {202})["data"]["id"]
+                             codes = {202},
+                             client = self)["data"]["id"]
         posted = None
 
         if not wait:
@@ -336,7 +495,8 @@ class Client(objects._mixin.ClientBase):
         while timeout * 2:
             posted = methods.request("get",
                                      f"{self.api}/tasks/{id}",
-                                     headers = self.headers)["data"]
+                                     headers = self.headers,
+                                     client = self)["data"]
 
             if posted.get("result"):
                 return objects.Post(posted["result"]["cid"], self)
@@ -352,14 +512,39 @@ class Client(objects._mixin.ClientBase):
 
         :type message: Message
         """
-        parsed = message.content.split(" ")
-        first, args = parsed[0], parsed[1:]
+        content = message.content
+
+        if not content:
+            return None
+
+        first, space, rest = content.partition(" ")
+        match = self._prefix_for(message).match(first)
+
+        if not match:
+            return None
+
+        args = rest.split(" ") if space else []
+        command = self.commands.get(first[match.end():],
+                                    commands.Defaults.default)
+
+        if self.executor:
+            self.executor.submit(command, message, args)
+            return command
+
+        return command(message, args)  # test chat
+
+    def use_executor(self, **kwargs):
+        """
+        Run commands on a CommandExecutor instead of in the thread that handles the message.
+        Keyword arguments are passed to CommandExecutor.
+        Unless ``on_error`` is given, commands that fail go to the ``on_error`` event if there is one, else their traceback is printed
 
-        for prefix in self.prefix:
-            if first.startswith(prefix):
-                return self.commands.get(first[len(prefix):],
-                                         commands.Defaults.default)(
-                                             message, args)  # test chat
+        :returns: the executor
+        :rtype: ifunny.ext.commands.CommandExecutor
+        """
+        kwargs.setdefault("on_error", self._command_error)
+        self.executor = commands.CommandExecutor(**kwargs)
+        return self.executor
 
     def suggested_tags(self, query):
         """
@@ -377,7 +562,8 @@ class Client(objects._mixin.ClientBase):
         tags = methods.request("get",
                                f"{self.api}/tags/suggested",
                                params = params,
-                               headers = self.headers)["data"]["tags"]["items"]
+                               headers = self.headers,
+                               client = self)["data"]["tags"]["items"]
 
         return [(tag["tag"], tag["uses"]) for tag in tags]
 
@@ -406,6 +592,58 @@ class Client(objects._mixin.ClientBase):
         """
         return self.socket.stop()  # test chat
 
+    async def run_chat(self):
+        """
+        Run the chat websocket connection on the running event loop until ``stop_chat`` is called.
+        The client must be made with ``transport = "asyncio"``
+
+        :raises: Exception stating that the socket is already alive
+        """
+        if not isinstance(self.socket, aio.AsyncSocket):
+            raise TypeError("run_chat needs the asyncio transport")
+
+        if self.socket.active:
+            raise exceptions.ChatAlreadyActive("Already started")
+
+        self.socket._reset()
+        await self.socket.run()
+
+    def broadcast(self,
+                  chats,
+                  message,
+                  rate = 10,
+                  timeout = 10,
+                  retries = 1,
+                  fallback = True):
+        """
+        Send one text message to many chats, paced by ``rate``, falling back to the sendbird api for chats that the socket can't deliver to.
+        See ``ifunny.ext.broadcast.run``
+
+        :param chats: chats to send to. Can be Chat objects or chat urls
+        :param message: text to send
+        :param rate: most number of messages per second. If None, as fast as they can be sent
+        :param timeout: seconds to wait for sendbird to echo each message
+        :param retries: most number of times to send a message again through the socket before falling back
+        :param fallback: send through the sendbird api when the socket fails?
+
+        :type chats: iterable<Chat or str>
+        :type message: str
+        :type rate: float
+        :type timeout: float
+        :type retries: int
+        :type fallback: bool
+
+        :returns: the outcome for each chat
+        :rtype: ifunny.ext.broadcast.BroadcastReport
+        """
+        return _broadcast.run(self,
+                              chats,
+                              message,
+                              rate = rate,
+                              timeout = timeout,
+                              retries = retries,
+                              fallback = fallback)
+
     def sendbird_upload(self, chat, file_data):
         """
         Upload an image to sendbird for a specific chat
@@ -435,7 +673,11 @@ class Client(objects._mixin.ClientBase):
 
     # public decorators
 
-    def command(self, name = None):
+    def command(self,
+                name = None,
+                concurrency = None,
+                cooldown = None,
+                timeout = None):
         """
         Decorator to add a command, callable in chat with the format ``{prefix}{command}``
         Commands must take two arguments, which are set as the Message and list<str> of space-separated words in the message (excluding the command) respectively::
@@ -449,12 +691,22 @@ class Client(objects._mixin.ClientBase):
                 pass
 
         :param name: Name of the command callable from chat. If None, the name of the function will be used instead.
+        :param concurrency: most number of calls of this command at once, with ``use_executor``
+        :param cooldown: seconds before a user can call this command again, with ``use_executor``
+        :param timeout: most seconds that a call of this command can run, with ``use_executor``
 
         :type name: str
+        :type concurrency: int
+        :type cooldown: float
+        :type timeout: float
         """
         def _inner(method):
             _name = name if name else method.__name__
-            self.commands[_name] = commands.Command(method, _name)
+            self.commands[_name] = commands.Command(method,
+                                                    _name,
+                                                    concurrency = concurrency,
+                                                    cooldown = cooldown,
+                                                    timeout = timeout)
 
         return _inner  # test chat
 
@@ -480,6 +732,22 @@ class Client(objects._mixin.ClientBase):
 
         return _inner  # test chat
 
+    def filter(self, check = None, **kwargs):
+        """
+        Drop chat frames before any objects are made from them, so that a client in busy chats only pays for what it handles.
+        Keyword arguments are passed to Filter::
+
+            robot.filter(channels = ["my_chat_url"], prefix = "!")
+
+        :param check: callable that takes the frame key and its json data and returns False to drop it
+
+        :type check: callable
+
+        :returns: the check
+        :rtype: callable
+        """
+        return self.handler.add_filter(check, **kwargs)
+
     # public properties
 
     @property
@@ -519,15 +787,19 @@ class Client(objects._mixin.ClientBase):
     def prefix(self):
         """
         Get a set of prefixes that this bot can use.
-        Each one is evaluated when handling a potential command
+        Each one is evaluated when handling a potential command.
+        A callable prefix that takes the Message being handled can not be evaluated without one, so it is returned as is
 
         :returns: prefixes that can be used to resolve commands
-        :rtype: set
+        :rtype: set or callable
         """
         _pref = self.__prefix
 
+        if self.__prefix_takes_message:
+            return _pref
+
         if callable(_pref):
-            _pref = self.__prefix()
+            _pref = self._call_prefix()
 
         if isinstance(_pref, str):
             _pref = [_pref]
@@ -549,12 +821,29 @@ class Client(objects._mixin.ClientBase):
         :rtype: set
         """
         _pref = value
+        takes_message = False
 
         if callable(value):
-            _pref = value()
+            takes_message = bool(inspect.signature(value).parameters)
+            _pref = None if takes_message else value()
+
+        if takes_message:
+            self.__prefix = value
+            self.__prefix_takes_message = True
+            self.__prefix_patterns = {}
+            self.__prefix_pattern = None
+            return value
 
         if isinstance(_pref, (set, tuple, list, str)):
             self.__prefix = value
+            self.__prefix_takes_message = takes_message
+            self.__prefix_patterns = {}
+            self.__prefix_pattern = None
+
+            if not callable(value):
+                self.__prefix_pattern = self._compile_prefix(
+                    [value] if isinstance(value, str) else value)
+
             return set(_pref)
 
         raise TypeError(
@@ -594,6 +883,21 @@ class Client(objects._mixin.ClientBase):
 
         return unread # TODO: why is this a list and not a generator
 
+    @property
+    def notification_stream(self):
+        """
+        Stream of new notifications, that only requests them when the unread counters say that there are some.
+        Call ``start`` on it, or iterate it
+
+        :returns: the notification stream of this client
+        :rtype: NotificationStream
+        """
+        if self.__notification_stream is None:
+            self.__notification_stream = notifications.NotificationStream(
+                self)
+
+        return self.__notification_stream
+
     @property
     def home(self):
         """
@@ -629,10 +933,9 @@ class Client(objects._mixin.ClientBase):
         :returns: req_id
         :rtype: str
         """
-        self._sendbird_lock.acquire()
-        self.__sendbird_req_id += 1
-        self._sendbird_lock.release()
-        return self.__sendbird_req_id
+        with self._sendbird_lock:
+            self.__sendbird_req_id += 1
+            return self.__sendbird_req_id
 
     @property
     def user(self):
@@ -653,10 +956,7 @@ class Client(objects._mixin.ClientBase):
         :returns: number of unread notifications
         :rtype: int
         """
-        return methods.request("get",
-                               f"{self.api}/counters",
-                               headers = self.headers)["data"][
-                                   "news"]  # test with another account
+        return self.unread.news  # test with another account
 
     @property
     def nick(self):
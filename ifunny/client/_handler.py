@@ -1,12 +1,83 @@
 import json, time
 
 from ifunny import objects
+from ifunny.util import exceptions, methods
+
+
+class Filter:
+    """
+    Check on a raw MESG, FILE or SYEV frame, done before any object is made for it.
+    Every option that is given must match
+
+    :param channels: chat urls to let through. If None, every chat
+    :param types: frame keys to let through, like ``MESG``, ``FILE`` or ``SYEV``. If None, every type
+    :param senders: user ids or nicks whose messages to let through. If None, everyone. Frames without a sender are let through
+    :param prefix: text that messages must start with. Files are not let through when this is set
+    :param exclude_channels: chat urls to drop
+    :param exclude_senders: user ids or nicks whose messages to drop
+
+    :type channels: iterable<str>
+    :type types: iterable<str>
+    :type senders: iterable<str>
+    :type prefix: str or iterable<str>
+    :type exclude_channels: iterable<str>
+    :type exclude_senders: iterable<str>
+    """
+    def __init__(self,
+                 channels = None,
+                 types = None,
+                 senders = None,
+                 prefix = None,
+                 exclude_channels = None,
+                 exclude_senders = None):
+        self.channels = set(channels) if channels is not None else None
+        self.types = set(types) if types is not None else None
+        self.senders = set(senders) if senders is not None else None
+        self.exclude_channels = set(exclude_channels or ())
+        self.exclude_senders = set(exclude_senders or ())
+        self.prefix = None
+
+        if prefix is not None:
+            self.prefix = (prefix, ) if isinstance(prefix, str) else tuple(
+                prefix)
+
+    def __call__(self, key, data):
+        if self.types is not None and key not in self.types:
+            return False
+
+        channel = data.get("channel_url")
+
+        if self.channels is not None and channel not in self.channels:
+            return False
+
+        if channel in self.exclude_channels:
+            return False
+
+        user = data.get("user")
+
+        if user:
+            sender = {user.get("guest_id"), user.get("name")}
+
+            if self.senders is not None and not sender & self.senders:
+                return False
+
+            if sender & self.exclude_senders:
+                return False
+
+        if self.prefix is not None and key in {"MESG", "FILE"}:
+            return key == "MESG" and data.get("message",
+                                              "").startswith(self.prefix)
+
+        return True
 
 
 class Handler:
     def __init__(self, client):
         self.client = client
         self.events = {}
+        self.filters = []
+        self.filtered = 0
+        self.me = None
 
         self.channel_update_codes = {
             10020: self._on_invite,
@@ -19,7 +90,8 @@ class Handler:
             "MESG": self._on_message,
             "LOGI": self._on_connect,
             "SYEV": self._on_channel_update,
-            "FILE": self._on_file
+            "FILE": self._on_file,
+            "EROR": self._on_sendbird_error
         }
 
     def resolve(self, data):
@@ -29,6 +101,55 @@ class Handler:
     def get_ev(self, key):
         return self.events.get(key, self._default_event)
 
+    def wants(self, *keys):
+        """
+        :returns: is an event registered for any of ``keys``, or for ``on_default``?
+        :rtype: bool
+        """
+        return "on_default" in self.events or any(key in self.events
+                                                   for key in keys)
+
+    def accepts(self, key, data):
+        """
+        :returns: does a raw frame pass every filter?
+        :rtype: bool
+        """
+        for check in self.filters:
+            if not check(key, data):
+                self.filtered += 1
+                return False
+
+        return True
+
+    def pin_self(self):
+        """
+        Remember our own id and nick, so that our own messages can be told apart without asking ifunny who we are.
+        Called when the socket starts
+        """
+        self.me = (self.client.id, self.client.nick)
+
+    def forget_self(self):
+        """
+        Forget our own id and nick, to be pinned again with the next message. Called when our nick changes
+        """
+        self.me = None
+
+    def add_filter(self, check = None, **kwargs):
+        """
+        Drop MESG, FILE and SYEV frames that do not pass a check before anything is made from them.
+        Acknowledging sends and tracking what was seen for reconnects still happen for dropped frames
+
+        :param check: callable that takes the frame key and its json data and returns False to drop it. If None, a Filter is made from the keyword arguments
+
+        :type check: callable
+
+        :returns: the check
+        :rtype: callable
+        """
+        check = check if check else Filter(**kwargs)
+        self.filters.append(check)
+        return check
+
     # websocket hook defaults
 
     def _default_match(self, key, data):
@@ -44,8 +165,76 @@ class Handler:
     def _on_disconnect(self):
         self.get_ev("on_disconnect")()
 
+    def _on_error(self, error):
+        self.get_ev("on_error")(error)
+
+    def _on_reconnect(self, data):
+        self.get_ev("on_reconnect")(data)
+
+    def _is_self(self, user):
+        if not self.me:
+            self.pin_self()
+
+        id, nick = self.me
+
+        if user.get("guest_id"):
+            return user["guest_id"] == id
+
+        return user.get("name") == nick
+
+    def _on_missed(self, message):
+        """
+        Handle a message that was fetched after a reconnect. Sendbird api payloads name users differently than socket frames,
+        so they are made to look like one for the filters
+        """
+        data = message._object_data_payload or {}
+        user = data.get("user") or {}
+        key = data.get("type", "MESG")
+        data = {
+            **data, "user": {
+                "guest_id": user.get("guest_id", user.get("user_id")),
+                "name": user.get("name", user.get("nickname"))
+            }
+        }
+
+        if not self.accepts(key, data):
+            return
+
+        if self._is_self(data["user"]):
+            return
+
+        if not self.wants("on_message") and not self.client._could_be_command(
+                data.get("message")):
+            return
+
+        message.invoked = self.client.resolve_command(message)
+        self.get_ev("on_message")(message)
+
+    def _acknowledge(self, data):
+        """
+        Resolve the send that this frame echoes, if it was waiting for one
+        """
+        if data.get("req_id") not in self.client.socket.acks:
+            return
+
+        message = objects.Message(data["msg_id"],
+                                  data["channel_url"],
+                                  self.client,
+                                  data = data)
+        self.client.socket.acks.resolve(data["req_id"], message)
+
     def _on_message(self, key, data):
-        if data["user"]["name"] == self.client.nick:
+        self.client.socket._seen(data["channel_url"], data.get("created_at"))
+        self._acknowledge(data)
+
+        if not self.accepts(key, data):
+            return
+
+        if self._is_self(data["user"]):
+            return
+
+        if not self.wants("on_message") and not self.client._could_be_command(
+                data.get("message")):
             return
 
         message = objects.Message(data["msg_id"],
@@ -57,7 +246,16 @@ class Handler:
         self.get_ev("on_message")(message)
 
     def _on_file(self, key, data):
-        if data["user"]["name"] == self.client.nick:
+        self.client.socket._seen(data["channel_url"], data.get("created_at"))
+        self._acknowledge(data)
+
+        if not self.accepts(key, data):
+            return
+
+        if self._is_self(data["user"]):
+            return
+
+        if not self.wants("on_message"):
             return
 
         message = objects.Message(data["msg_id"],
@@ -69,10 +267,20 @@ class Handler:
     def _on_connect(self, key, data):
         if data.get("key"):
             self.client.sendbird_session_key = data["key"]
-        self.client.socket.connected = True
+        self.client.socket._on_login(data)
         self.get_ev("on_connect")(
             data)  # TODO: consider using an object for the data
 
+    def _on_sendbird_error(self, key, data):
+        error = exceptions.BadAPIResponse(
+            f"sendbird error {data.get('code')}: {data.get('message')}")
+
+        if data.get("req_id") and self.client.socket.acks.reject(
+                data["req_id"], error):
+            return
+
+        self._on_error(error)
+
     def _on_ping(self, key, data):
         self.get_ev("on_ping")(data)
 
@@ -84,14 +292,22 @@ class Handler:
             "sts": timestamp
         })
 
-        return client.socket.send(f"PONG{data}\n")
+        return self.client.socket.send(f"PONG{data}\n")
 
     def _on_channel_update(self, key, data):
-        chat = objects.Chat(data["channel_url"], self.client)
+        if not self.accepts(key, data):
+            return
+
         self.channel_update_codes.get(data["cat"], self._default_event)(data)
-        self.get_ev("on_channel_update")(chat)
+
+        if self.wants("on_channel_update"):
+            chat = objects.Chat(data["channel_url"], self.client)
+            self.get_ev("on_channel_update")(chat)
 
     def _on_invite(self, update):
+        if not self.wants("on_invite", "on_invite_broadcast"):
+            return
+
         invite = objects.ChatInvite(update, self.client)
         if self.client.user in invite.invitees:
             return self.get_ev("on_invite")(invite)
@@ -99,11 +315,17 @@ class Handler:
         return self.get_ev("on_invite_broadcast")(invite)
 
     def _on_user_exit(self, data):
+        if not self.wants("on_user_exit"):
+            return
+
         chat = objects.Chat(data["channel_url"], self.client)
         user = objects.User(data["data"]["user_id"], client = self.client)
         self.get_ev("on_user_exit")(user, chat)
 
     def _on_user_join(self, data):
+        if not self.wants("on_user_join"):
+            return
+
         chat = objects.Chat(data["channel_url"], self.client)
         user = objects.User(data["data"]["user_id"], client = self.client)
         self.get_ev("on_user_join")(user, chat)
@@ -125,7 +347,7 @@ class Event:
         self.help = self.method.__doc__
 
     def __call__(self, *data):
-        self.method(*data)
+        methods.invoke(self.method, *data)
         return self
 
 
@@ -139,5 +361,11 @@ events allowed:
     on_user_exit (10001)        -> (objects.User, objects.Chat):     a user leaves or is kicked from the chat
     on_ping                     -> (json data):         we are pinged
     on_connect                  -> (json data):         ifunny achnowledges our websocket connection
+    on_reconnect                -> (json data):         ifunny achnowledges our websocket connection after it dropped, before missed messages are handled
+    on_disconnect               -> ():                  the websocket connection drops or is closed
+    on_error                    -> (Exception):         the websocket, or catching up on missed messages, raised something
     on_default                  -> (any):               websocket messages matches no events that the client has implemented
+
+events and commands can be coroutine functions. With the asyncio transport they are run as tasks on its loop,
+otherwise they are run to completion in the thread that handles the websocket message
 """
@@ -0,0 +1,183 @@
+import asyncio, threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ifunny.client._async import AsyncSocket
+from ifunny.util import methods
+
+
+class SocketHub:
+    """
+    Runs the chat sockets of many clients on one event loop thread.
+    Websocket messages of every client are handled by one shared pool of threads, with each clients own handler,
+    so a host running hundreds of bots needs a handful of threads instead of one (and more) for each bot.
+    Events and commands that are coroutine functions are run on the loop of the hub.
+    Requires the ``websockets`` package (``pip install ifunny[async]``)
+
+    :param workers: number of threads that handle websocket messages. If 0, messages are handled on the loop, so slow events and commands should be async
+    :param reconnect: open sockets again when they drop?
+    :param backoff: seconds to wait before the first reconnect
+    :param max_backoff: most seconds to wait between reconnects
+
+    :type workers: int
+    :type reconnect: bool
+    :type backoff: float
+    :type max_backoff: float
+    """
+    def __init__(self,
+                 workers = 8,
+                 reconnect = True,
+                 backoff = 1,
+                 max_backoff = 60):
+        self.workers = workers
+        self.reconnect = reconnect
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.loop = None
+        self.thread = None
+        self.dispatcher = None
+
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._running)
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def __contains__(self, client):
+        return client in self._running
+
+    # private methods
+
+    def _socket(self, client):
+        socket = client.socket
+
+        if not isinstance(socket, AsyncSocket):
+            socket = AsyncSocket(client,
+                                 reconnect = self.reconnect,
+                                 backoff = self.backoff,
+                                 max_backoff = self.max_backoff)
+            client.socket = socket
+
+        socket.dispatcher = self.dispatcher
+        return socket
+
+    # public methods
+
+    def start(self):
+        """
+        Start the loop thread of the hub. ``add`` does this if needed
+
+        :returns: self
+        :rtype: SocketHub
+        """
+        with self._lock:
+            if self.thread:
+                return self
+
+            self.loop = asyncio.new_event_loop()
+
+            if self.workers:
+                self.dispatcher = ThreadPoolExecutor(
+                    max_workers = self.workers,
+                    thread_name_prefix = "ifunny-hub",
+                    initializer = methods.use_loop,
+                    initargs = [self.loop])
+
+            self.thread = threading.Thread(target = self.loop.run_forever,
+                                           name = "ifunny-hub")
+            self.thread.start()
+
+        return self
+
+    def add(self, client):
+        """
+        Start the chat socket of a client on this hub.
+        A client that does not use the asyncio transport is given an ``AsyncSocket``
+
+        :param client: client to start chatting as. It should be logged in
+
+        :type client: Client
+
+        :returns: the socket of the client
+        :rtype: AsyncSocket
+        """
+        self.start()
+
+        with self._lock:
+            if client in self._running:
+                return client.socket
+
+            socket = self._socket(client)
+            socket._reset()
+            self._running[client] = asyncio.run_coroutine_threadsafe(
+                socket.run(), self.loop)
+
+        return socket
+
+    def remove(self, client, timeout = 10):
+        """
+        Stop the chat socket of a client and take it off of this hub.
+        Does nothing for a client that is not on this hub
+
+        :param client: client to stop chatting as
+        :param timeout: most seconds to wait for the socket to close
+
+        :type client: Client
+        :type timeout: float
+        """
+        with self._lock:
+            running = self._running.pop(client, None)
+
+        if running is None:
+            return
+
+        client.socket.stop()
+
+        try:
+            running.result(timeout)
+
+        except Exception as error:
+            client.socket.last_error = error
+
+        client.socket.dispatcher = None
+
+    def stop(self, timeout = 10):
+        """
+        Stop every socket, then the loop and threads of the hub
+
+        :param timeout: most seconds to wait for each socket to close
+
+        :type timeout: float
+        """
+        for client in self.clients:
+            self.remove(client, timeout = timeout)
+
+        with self._lock:
+            if not self.thread:
+                return
+
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+
+            if self.dispatcher:
+                self.dispatcher.shutdown(wait = False)
+
+            if not self.loop.is_running():
+                self.loop.close()
+
+            self.thread = None
+            self.dispatcher = None
+
+    # public properties
+
+    @property
+    def clients(self):
+        """
+        :returns: clients that are chatting on this hub
+        :rtype: list<Client>
+        """
+        return [*self._running]
@@ -0,0 +1,184 @@
+import queue, threading
+
+from collections import OrderedDict
+
+
+class NotificationStream:
+    """
+    Stream of new notifications for a client.
+    Only the unread counters are polled (see ``Counters.start``), and notifications are only requested when the ``news`` counter goes up.
+    Notifications that were seen before are never given out twice
+
+    :param client: client whose notifications to stream
+    :param remember: number of seen notifications to remember, for deduplication
+    :param max_pages: most number of pages of notifications to request for each change in the counter
+
+    :type client: Client
+    :type remember: int
+    :type max_pages: int
+    """
+    def __init__(self, client, remember = 1000, max_pages = 5):
+        self.client = client
+        self.remember = remember
+        self.max_pages = max_pages
+
+        self._seen = OrderedDict()
+        self._primed = False
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._queues = []
+        self._running = False
+
+    def __iter__(self):
+        """
+        Iterate new notifications as they come, starting the stream if needed
+        """
+        stream = queue.Queue()
+        self._queues.append(stream)
+
+        if not self._running:
+            self.start()
+
+        try:
+            while True:
+                notification = stream.get()
+
+                if notification is None:
+                    return
+
+                yield notification
+
+        finally:
+            self._queues.remove(stream)
+
+    # private methods
+
+    def _remember(self, key):
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+
+        while len(self._seen) > self.remember:
+            self._seen.popitem(last = False)
+
+    def _prime(self):
+        """
+        Remember the newest notifications, so that only ones after now are given out
+        """
+        for notification in self.client._notifications_paginated()["items"]:
+            self._remember(notification.id)
+
+        self._primed = True
+
+    def _fetch(self, count):
+        new = []
+        next = None
+
+        for _ in range(self.max_pages):
+            page = self.client._notifications_paginated(next = next)
+
+            for notification in page["items"]:
+                if notification.id in self._seen:
+                    return new
+
+                new.append(notification)
+
+            next = page["paging"]["next"]
+
+            if not next or len(new) >= count:
+                return new
+
+        return new
+
+    def _on_change(self, counters, changes):
+        if "news" not in changes:
+            return
+
+        old, new = changes["news"]
+
+        if (new or 0) > (old or 0):
+            self.poll(new - (old or 0))
+
+    # public methods
+
+    def poll(self, count = None):
+        """
+        Request notifications that have not been seen yet, and give them to callbacks and iterators
+
+        :param count: number of new notifications expected. If None, the ``news`` counter is used
+
+        :type count: int
+
+        :returns: new notifications, oldest first
+        :rtype: list<Notification>
+        """
+        with self._lock:
+            if not self._primed:
+                self._prime()
+                return []
+
+            count = count if count else max(self.client.unread.fresh.news, 1)
+            new = [*reversed(self._fetch(count))]
+
+            for notification in new:
+                self._remember(notification.id)
+
+        for notification in new:
+            for callback in [*self._callbacks]:
+                callback(notification)
+
+            for stream in [*self._queues]:
+                stream.put(notification)
+
+        return new
+
+    def on_notification(self, callback):
+        """
+        Call something with each new notification.
+        Can be used as a decorator
+
+        :param callback: callable that takes a Notification
+
+        :type callback: callable
+
+        :returns: callback
+        :rtype: callable
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def start(self, interval = 5, min_interval = 2, max_interval = 60):
+        """
+        Start streaming. Arguments are passed to ``Counters.start``
+
+        :returns: self
+        :rtype: NotificationStream
+        """
+        with self._lock:
+            if not self._primed:
+                self._prime()
+
+        if not self._running:
+            self.client.unread.subscribe(self._on_change,
+                                         interval = interval,
+                                         min_interval = min_interval,
+                                         max_interval = max_interval)
+            self._running = True
+
+        return self
+
+    def stop(self):
+        """
+        Stop streaming, and end every iterator of this stream.
+        The counters keep being polled if anything else is using them
+
+        :returns: self
+        :rtype: NotificationStream
+        """
+        if self._running:
+            self.client.unread.unsubscribe(self._on_change)
+            self._running = False
+
+        for stream in [*self._queues]:
+            stream.put(None)
+
+        return self
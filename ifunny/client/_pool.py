@@ -0,0 +1,199 @@
+import itertools, threading
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from ifunny import objects
+from ifunny.util import ratelimit
+from ifunny.util.cache import ObjectCache
+from ifunny.client._client import Client
+
+
+class ClientPool:
+    """
+    Many clients that share one connection pool, one cache of public data (users and posts) and one rate budget.
+    Each client still sends its own auth headers.
+
+    :param cache: cache shared by every client. If None, an ObjectCache of users and posts is made at the default location
+    :param rate: requests per second that every client can make together. If None, requests are not limited
+    :param burst: requests that can be made at once before ``rate`` kicks in
+    :param strategy: how a client is picked for read-only calls. Can be one of (``round_robin``, ``least_loaded``)
+    :param pool_size: number of connections kept open to each host
+
+    :type cache: ifunny.util.cache.ObjectCache
+    :type rate: float
+    :type burst: float
+    :type strategy: str
+    :type pool_size: int
+    """
+    strategies = {"round_robin", "least_loaded"}
+
+    def __init__(self,
+                 cache = None,
+                 rate = None,
+                 burst = None,
+                 strategy = "round_robin",
+                 pool_size = 32):
+        if strategy not in self.strategies:
+            raise ValueError(
+                f"strategy must be one of {self.strategies}, not {strategy}")
+
+        self.cache = cache if cache else ObjectCache(types = {"user", "post"})
+        self.rate_budget = ratelimit.RateBudget(rate, burst) if rate else None
+        self.strategy = strategy
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = pool_size,
+                              pool_maxsize = pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._clients = []
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def __contains__(self, client):
+        return client in self._clients
+
+    # public methods
+
+    def add(self, client):
+        """
+        Add a client to the pool, so that it uses the shared session, cache and rate budget
+
+        :param client: client to add
+
+        :type client: ClientBase
+
+        :returns: client
+        :rtype: ClientBase
+        """
+        client.session = self.session
+        client.cache = self.cache
+        client.rate_budget = self.rate_budget
+
+        with self._lock:
+            if client not in self._clients:
+                self._clients.append(client)
+
+        return client
+
+    def remove(self, client):
+        """
+        Take a client out of the pool. It goes back to its own connections, without a cache or rate budget
+
+        :param client: client to remove
+
+        :type client: ClientBase
+        """
+        with self._lock:
+            self._clients.remove(client)
+
+        client.session = None
+        client.cache = None
+        client.rate_budget = None
+
+    def login(self, email, password = "", **kwargs):
+        """
+        Make a Client in this pool and log it in.
+        Extra keyword arguments are passed to ``Client.login``
+
+        :param email: Email associated with the account
+        :param password: Password associated with the account
+
+        :type email: str
+        :type password: str
+
+        :returns: the logged in client
+        :rtype: Client
+        """
+        client = self.add(Client(cache = self.cache))
+
+        try:
+            return client.login(email, password, **kwargs)
+
+        except Exception:
+            self.remove(client)
+            raise
+
+    def pick(self):
+        """
+        Pick a client to make a read-only call with, spreading load between them
+
+        :returns: a client in this pool
+        :rtype: ClientBase
+        """
+        with self._lock:
+            if not self._clients:
+                raise IndexError("There are no clients in this pool")
+
+            if self.strategy == "least_loaded":
+                return min(self._clients, key = lambda client: client.pending)
+
+            return self._clients[next(self._turn) % len(self._clients)]
+
+    def user(self, id):
+        """
+        Get a user with a picked client
+
+        :param id: id of the user
+
+        :type id: str
+
+        :rtype: User
+        """
+        return objects.User(id, client = self.pick())
+
+    def user_by_nick(self, nick):
+        """
+        Get a user from their nick with a picked client
+
+        :param nick: nick of the user
+
+        :type nick: str
+
+        :returns: the user, if they exist
+        :rtype: User, or None
+        """
+        return objects.User.by_nick(nick, client = self.pick())
+
+    def post(self, id):
+        """
+        Get a post with a picked client
+
+        :param id: id of the post
+
+        :type id: str
+
+        :rtype: Post
+        """
+        return objects.Post(id, client = self.pick())
+
+    def close(self):
+        """
+        Close the shared connections
+        """
+        self.session.close()
+
+    @property
+    def clients(self):
+        """
+        :returns: clients in this pool
+        :rtype: list<ClientBase>
+        """
+        with self._lock:
+            return [*self._clients]
+
+    @property
+    def pending(self):
+        """
+        :returns: number of requests in flight for every client in this pool
+        :rtype: int
+        """
+        return sum(client.pending for client in self.clients)
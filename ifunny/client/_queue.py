@@ -0,0 +1,411 @@
+import threading, time
+
+from collections import deque
+from concurrent.futures import Future
+
+from ifunny.util import exceptions, ratelimit
+
+
+class _Queued:
+    __slots__ = ("key", "data", "ack", "timeout", "retries", "priority",
+                 "frame", "future", "queued_at")
+
+    def __init__(self,
+                 key,
+                 data,
+                 ack,
+                 timeout,
+                 retries,
+                 priority,
+                 frame = None):
+        self.key = key
+        self.data = data
+        self.ack = ack
+        self.timeout = timeout
+        self.retries = retries
+        self.priority = priority
+        self.frame = frame
+        self.future = Future()
+        self.queued_at = time.monotonic()
+
+    @property
+    def channel(self):
+        return self.data.get("channel_url")
+
+    @property
+    def text(self):
+        return self.key == "MESG" and not self.ack and not self.frame
+
+
+class SendQueue:
+    """
+    Queue of frames waiting to be sent through a chat socket, drained by one thread.
+    Frames are sent highest priority first, as fast as a global and a per chat rate budget allow,
+    and frames for a chat that is out of budget wait without holding back other chats.
+    Text messages to the same chat that are still waiting can be merged into one message
+
+    :param socket: socket to send through
+    :param rate: frames per second for every chat together. If None, not limited
+    :param burst: frames that can be sent at once before ``rate`` kicks in
+    :param channel_rate: frames per second for each chat. If None, not limited
+    :param channel_burst: frames that can be sent to a chat at once before ``channel_rate`` kicks in
+    :param lanes: number of priorities. A frame with priority 0 is sent before one with priority 1, and so on
+    :param coalesce: merge waiting text messages to the same chat?
+    :param coalesce_limit: most number of characters in a merged message
+    :param separator: put between merged messages
+    :param max_size: most number of frames that can wait
+    :param policy: what to do with a frame when the queue is full. Can be one of (``block``, ``drop_new``, ``drop_old``)
+    :param retry_delay: seconds to wait before sending again when the socket can not send
+
+    :type socket: Socket
+    :type rate: float
+    :type burst: float
+    :type channel_rate: float
+    :type channel_burst: float
+    :type lanes: int
+    :type coalesce: bool
+    :type coalesce_limit: int
+    :type separator: str
+    :type max_size: int
+    :type policy: str
+    :type retry_delay: float
+    """
+    policies = {"block", "drop_new", "drop_old"}
+
+    def __init__(self,
+                 socket,
+                 rate = None,
+                 burst = None,
+                 channel_rate = None,
+                 channel_burst = None,
+                 lanes = 3,
+                 coalesce = False,
+                 coalesce_limit = 1000,
+                 separator = "\n",
+                 max_size = 1000,
+                 policy = "block",
+                 retry_delay = 1):
+        if policy not in self.policies:
+            raise ValueError(
+                f"policy must be one of {self.policies}, not {policy}")
+
+        self.socket = socket
+        self.rate_budget = ratelimit.RateBudget(rate, burst) if rate else None
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.coalesce = coalesce
+        self.coalesce_limit = coalesce_limit
+        self.separator = separator
+        self.max_size = max_size
+        self.policy = policy
+        self.retry_delay = retry_delay
+
+        self.lanes = [deque() for _ in range(lanes)]
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen = 1000)
+
+        self._budgets = {}
+        self._tails = {}
+        self._depth = 0
+        self._condition = threading.Condition(threading.RLock())
+        self._thread = None
+        self._stopping = False
+        self._generation = 0
+
+    def __len__(self):
+        return self._depth
+
+    # private methods
+
+    def _budget(self, channel):
+        if not self.channel_rate or channel is None:
+            return None
+
+        if channel not in self._budgets:
+            self._budgets[channel] = ratelimit.RateBudget(
+                self.channel_rate, self.channel_burst)
+
+        return self._budgets[channel]
+
+    def _merge(self, item):
+        tail = self._tails.get((item.priority, item.channel))
+
+        if not (self.coalesce and item.text and tail and tail.text):
+            return None
+
+        merged = f"{tail.data['message']}{self.separator}{item.data['message']}"
+
+        if len(merged) > self.coalesce_limit:
+            return None
+
+        tail.data = {**tail.data, "message": merged}
+        self.coalesced += 1
+        return tail
+
+    def _make_room(self, item, timeout):
+        """
+        Called holding the lock when the queue is full
+
+        :returns: can ``item`` be queued?
+        """
+        if self.policy == "block":
+            return self._condition.wait_for(
+                lambda: self._depth < self.max_size or self._stopping,
+                timeout) and not self._stopping
+
+        if self.policy == "drop_new":
+            return False
+
+        for lane in reversed(self.lanes):
+            if lane:
+                self._drop(lane.popleft())
+                return True
+
+        return False
+
+    def _drop(self, item):
+        self._depth -= 1
+        self.dropped += 1
+        self._forget(item)
+        item.future.set_exception(
+            exceptions.ChatQueueFull("dropped from a full send queue"))
+
+    def _forget(self, item):
+        key = (item.priority, item.channel)
+
+        if self._tails.get(key) is item:
+            del self._tails[key]
+
+    def _next(self):
+        """
+        Called holding the lock
+
+        :returns: (frame to send or None, seconds until one may be sendable)
+        """
+        if self.rate_budget and self.rate_budget.available < 1:
+            return None, self.rate_budget.try_acquire()
+
+        soonest = None
+
+        for lane in self.lanes:
+            blocked = set()
+
+            for index, item in enumerate(lane):
+                if item.channel in blocked:
+                    continue
+
+                budget = self._budget(item.channel)
+                wait = budget.try_acquire() if budget else 0
+
+                if wait:
+                    blocked.add(item.channel)
+                    soonest = wait if soonest is None else min(soonest, wait)
+                    continue
+
+                if self.rate_budget:
+                    self.rate_budget.try_acquire()
+
+                del lane[index]
+                self._depth -= 1
+                self._forget(item)
+                self._condition.notify_all()
+                return item, 0
+
+        return None, soonest
+
+    def _send(self, item):
+        if item.frame:
+            self.socket.send(item.frame)
+            self.sent += 1
+            self.latencies.append(time.monotonic() - item.queued_at)
+            item.future.set_result(None)
+            return
+
+        sent = self.socket._send_frame(item.key,
+                                       item.data,
+                                       ack = item.ack,
+                                       timeout = item.timeout,
+                                       retries = item.retries)
+
+        self.sent += 1
+        self.latencies.append(time.monotonic() - item.queued_at)
+
+        if not item.ack:
+            item.future.set_result(None)
+            return
+
+        def done(sent):
+            if sent.exception():
+                item.future.set_exception(sent.exception())
+            else:
+                item.future.set_result(sent.result())
+
+        sent.add_done_callback(done)
+
+    def _requeue(self, item):
+        with self._condition:
+            self.lanes[item.priority].appendleft(item)
+            self._depth += 1
+
+    def _drain(self, generation):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping or generation != self._generation:
+                        return
+
+                    item, wait = self._next()
+
+                    if item:
+                        break
+
+                    self._condition.wait(wait)
+
+            try:
+                self._send(item)
+
+            except Exception as error:
+                self.socket.last_error = error
+                self._requeue(item)
+
+                with self._condition:
+                    self._condition.wait(self.retry_delay)
+
+    # public methods
+
+    def _queue(self, item, block_timeout):
+        with self._condition:
+            merged = self._merge(item)
+
+            if merged:
+                return merged.future
+
+            if self._depth >= self.max_size and not self._make_room(
+                    item, block_timeout):
+                self.dropped += 1
+                item.future.set_exception(
+                    exceptions.ChatQueueFull("the send queue is full"))
+                return item.future
+
+            self.lanes[item.priority].append(item)
+            self._tails[(item.priority, item.channel)] = item
+            self._depth += 1
+            self._condition.notify_all()
+
+            if not self._thread:
+                self._stopping = False
+                self._thread = threading.Thread(target = self._drain,
+                                                args = [self._generation],
+                                                daemon = True)
+                self._thread.start()
+
+        return item.future
+
+    def put(self,
+            key,
+            data,
+            ack = False,
+            timeout = 10,
+            retries = 1,
+            priority = 1,
+            block_timeout = None):
+        """
+        Queue a frame to be sent
+
+        :param key: four letter key of the frame, like ``MESG``
+        :param data: json data of the frame
+        :param ack: wait for sendbird to echo the frame back? Frames that are waiting for an echo are never merged
+        :param timeout: seconds to wait for each try when ``ack`` is True
+        :param retries: most number of times to send the frame again when ``ack`` is True
+        :param priority: lane to queue the frame in, 0 being the most urgent
+        :param block_timeout: most seconds to wait for room with the ``block`` policy. If None, wait as long as it takes
+
+        :type key: str
+        :type data: dict
+        :type ack: bool
+        :type timeout: float
+        :type retries: int
+        :type priority: int
+        :type block_timeout: float
+
+        :returns: future resolved with None once the frame is sent, or with the echo when ``ack`` is True. It fails with ChatQueueFull if the frame is dropped
+        :rtype: concurrent.futures.Future
+        """
+        priority = min(max(priority, 0), len(self.lanes) - 1)
+        item = _Queued(key, data, ack, timeout, retries, priority)
+        return self._queue(item, block_timeout)
+
+    def resend(self, frame, channel_url = None, priority = 0):
+        """
+        Queue a frame that was already sent, as is, keeping its ``req_id``.
+        Used by Acknowledgements to send frames again that were not echoed in time
+
+        :param frame: the whole frame
+        :param channel_url: chat that the frame is for, to charge its rate budget
+        :param priority: lane to queue the frame in, 0 being the most urgent
+
+        :type frame: str
+        :type channel_url: str
+        :type priority: int
+
+        :returns: future resolved with None once the frame is sent
+        :rtype: concurrent.futures.Future
+        """
+        priority = min(max(priority, 0), len(self.lanes) - 1)
+        item = _Queued(frame[:4], {"channel_url": channel_url}, True, None,
+                       0, priority, frame)
+        return self._queue(item, 0)
+
+    def stop(self):
+        """
+        Stop sending, and fail every frame that is still waiting with ChatNotActive
+        """
+        with self._condition:
+            self._stopping = True
+            self._generation += 1
+            waiting = [item for lane in self.lanes for item in lane]
+
+            for lane in self.lanes:
+                lane.clear()
+
+            self._tails.clear()
+            self._depth = 0
+            self._thread = None
+            self._condition.notify_all()
+
+        for item in waiting:
+            item.future.set_exception(
+                exceptions.ChatNotActive("The send queue was stopped"))
+
+    # public properties
+
+    @property
+    def metrics(self):
+        """
+        :returns: ``depth`` of the queue and of each of its ``lanes``, number of frames ``sent``, ``coalesced`` and ``dropped``,
+            and ``latency`` from being queued to being sent in seconds (``average``, ``p95`` and ``max`` of the last 1000 frames)
+        :rtype: dict
+        """
+        with self._condition:
+            latencies = sorted(self.latencies)
+            lanes = [len(lane) for lane in self.lanes]
+
+        latency = {"average": None, "p95": None, "max": None}
+
+        if latencies:
+            latency = {
+                "average": sum(latencies) / len(latencies),
+                "p95": latencies[int((len(latencies) - 1) * .95)],
+                "max": latencies[-1]
+            }
+
+        return {
+            "depth": sum(lanes),
+            "lanes": lanes,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "latency": latency
+        }
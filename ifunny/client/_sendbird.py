@@ -1,73 +1,500 @@
-import websocket, threading, requests
+import heapq, json, websocket, threading, requests, time
+
+from concurrent.futures import Future
+from random import random
+
+from ifunny import objects
+from ifunny.client._queue import SendQueue
+from ifunny.util import exceptions
+
+
+class Acknowledgements:
+    """
+    Frames sent with a ``req_id`` that are waiting for sendbird to echo them back.
+    One thread watches every deadline, sending a frame again when it runs out and failing it once it runs out of retries
+
+    :param socket: socket that the frames are sent through
+
+    :type socket: Socket
+    """
+    def __init__(self, socket):
+        self.socket = socket
+
+        self._pending = {}
+        self._deadlines = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, req_id):
+        return req_id is not None and str(req_id) in self._pending
+
+    # private methods
+
+    def _resend(self, frame):
+        """
+        Send a frame again, through the send queue of the socket if it has one so that retries count against its rate budgets
+        """
+        if self.socket.queue is None:
+            return self.socket.send(frame)
+
+        channel_url = json.loads(frame[4:]).get("channel_url")
+        self.socket.queue.resend(frame, channel_url)
+
+    def _watch(self):
+        while True:
+            with self._condition:
+                while not self._deadlines:
+                    self._condition.wait()
+
+                deadline, req_id = self._deadlines[0]
+                wait = deadline - time.monotonic()
+
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+
+                heapq.heappop(self._deadlines)
+                pending = self._pending.get(req_id)
+
+                if not pending or pending["deadline"] != deadline:
+                    continue
+
+                if pending["retries"] <= 0:
+                    del self._pending[req_id]
+                    expired = True
+
+                else:
+                    pending["retries"] -= 1
+                    self._schedule(req_id, pending)
+                    expired = False
+
+            if expired:
+                pending["future"].set_exception(
+                    exceptions.ChatTimeout(
+                        f"req_id {req_id} was not acknowledged"))
+                continue
+
+            try:
+                self._resend(pending["frame"])
+
+            except Exception as error:
+                self.socket.last_error = error
+
+    def _schedule(self, req_id, pending):
+        pending["deadline"] = time.monotonic() + pending["timeout"]
+        heapq.heappush(self._deadlines, (pending["deadline"], req_id))
+        self._condition.notify()
+
+    # public methods
+
+    def track(self, req_id, frame, timeout = 10, retries = 1):
+        """
+        Wait for a frame to be acknowledged
+
+        :param req_id: req_id that the frame was sent with
+        :param frame: the frame, to send again if it times out
+        :param timeout: seconds to wait for each try
+        :param retries: most number of times to send the frame again
+
+        :type req_id: str
+        :type frame: str
+        :type timeout: float
+        :type retries: int
+
+        :returns: future that is resolved with whatever the frame is acknowledged with
+        :rtype: concurrent.futures.Future
+        """
+        future = Future()
+        pending = {
+            "future": future,
+            "frame": frame,
+            "timeout": timeout,
+            "retries": retries
+        }
+
+        with self._condition:
+            self._pending[str(req_id)] = pending
+            self._schedule(str(req_id), pending)
+
+            if not self._thread:
+                self._thread = threading.Thread(target = self._watch,
+                                                daemon = True)
+                self._thread.start()
+
+        return future
+
+    def resolve(self, req_id, value):
+        """
+        Resolve the future of a frame
+
+        :returns: was a frame waiting for this req_id?
+        :rtype: bool
+        """
+        with self._condition:
+            pending = self._pending.pop(str(req_id), None)
+
+        if not pending:
+            return False
+
+        pending["future"].set_result(value)
+        return True
+
+    def reject(self, req_id, error):
+        """
+        Fail the future of a frame
+
+        :returns: was a frame waiting for this req_id?
+        :rtype: bool
+        """
+        with self._condition:
+            pending = self._pending.pop(str(req_id), None)
+
+        if not pending:
+            return False
+
+        pending["future"].set_exception(error)
+        return True
+
+    def reject_all(self, error):
+        """
+        Fail the future of every frame that is waiting
+        """
+        with self._condition:
+            pending, self._pending = self._pending, {}
+
+        for item in pending.values():
+            item["future"].set_exception(error)
 
 
 class Socket:
-    def __init__(self, client, trace, threaded):
+    """
+    Sendbird chat socket of a client.
+    If the connection drops, it is opened again after a jittered exponential backoff, resuming the sendbird session if possible.
+    Messages that were sent to chats we have seen while the socket was down are fetched and handled once it is back
+
+    :param client: client that the socket belongs to
+    :param trace: enable websocket_client trace? (debug)
+    :param threaded: False to have all socket callbacks run in the same thread for debugging
+    :param reconnect: open the socket again when it drops?
+    :param backoff: seconds to wait before the first reconnect
+    :param max_backoff: most seconds to wait between reconnects
+    :param catch_up: most number of messages to fetch for each chat after reconnecting
+
+    :type client: Client
+    :type trace: bool
+    :type threaded: bool
+    :type reconnect: bool
+    :type backoff: float
+    :type max_backoff: float
+    :type catch_up: int
+    """
+    def __init__(self,
+                 client,
+                 trace,
+                 threaded,
+                 reconnect = True,
+                 backoff = 1,
+                 max_backoff = 60,
+                 catch_up = 200):
         self.client = client
         self.socket_url = "wss://ws-us-1.sendbird.com"
         self.sendbird_url = "https://api-p.sendbird.com"
         self.route = "AFB3A55B-8275-4C1E-AEA8-309842798187"
         self.active = False
+        self.connected = False
         self.socket = None
+        self.socket_thread = None
         self.trace = trace
         self.threaded = threaded
 
-    def on_open(self):
+        self.reconnect = reconnect
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.catch_up = catch_up
+
+        self.attempts = 0
+        self.last_error = None
+        self.last_seen = {}
+        self.acks = Acknowledgements(self)
+        self.queue = None
+
+        self._routed = False
+        self._resume = False
+        self._stopping = threading.Event()
+        self._seen_lock = threading.Lock()
+
+    # websocket_client passes the socket as the first argument in some versions, and not in others
+
+    def on_open(self, *args):
         return
 
-    def on_close(self):
+    def on_close(self, *args):
         self.active = False
+        self.connected = False
+
         if not self.threaded:
             return self.client.handler._on_disconnect()
 
         threading.Thread(target = self.client.handler._on_disconnect).start()
 
-    def on_ping(self, data):
+    def on_ping(self, *args):
         return
 
-    def on_pong(self, data):
+    def on_pong(self, *args):
         return
 
-    def on_message(self, data):
+    def on_message(self, *args):
+        data = args[-1]
+
         if not self.threaded:
             return self.client.handler.resolve(data)
 
         threading.Thread(target = self.client.handler.resolve,
                          args = [data]).start()
 
-    def on_error(self, error):
-        raise error
+    def on_error(self, *args):
+        self.last_error = args[-1]
+        self.client.handler._on_error(self.last_error)
 
-    def start(self):
-        if not self.client:
-            raise TypeError(f"client cannont be {self.client}")
+    # private methods
 
+    def _resolve_route(self):
         route = requests.get(
             f"{self.sendbird_url}/routing/{self.route}").json()
         self.socket_url = route["ws_server"]
+        self._routed = True
+
+    def _url(self):
+        url = f"{self.socket_url}?dp=Android&pv=21&sv=3.0.55&ai={self.route}&user_id={self.client.id}"
+
+        if self._resume and self.client.sendbird_session_key:
+            return f"{url}&key={self.client.sendbird_session_key}"
+
+        return f"{url}&access_token={self.client.messenger_token}"
+
+    def _delay(self):
+        """
+        Full jitter backoff, so that many clients that drop at once do not reconnect at once
+        """
+        return random() * min(self.max_backoff,
+                              self.backoff * 2**(self.attempts - 1))
+
+    def _app(self):
+        self.connected = False
+        return websocket.WebSocketApp(self._url(),
+                                      on_message = self.on_message,
+                                      on_open = self.on_open,
+                                      on_close = self.on_close,
+                                      on_ping = self.on_ping,
+                                      on_error = self.on_error)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.active = True
+            self.socket.run_forever(ping_interval = 15)
+
+            if self._stopping.is_set() or not self.reconnect:
+                break
+
+            if not self.connected:
+                # the session could not be resumed, or the server that we were routed to is gone
+                self._resume = False
+                self._routed = False
+
+            else:
+                self._resume = True
+
+            self.attempts += 1
+
+            if self._stopping.wait(self._delay()):
+                break
+
+            if not self._routed:
+                try:
+                    self._resolve_route()
+
+                except (requests.RequestException, ValueError,
+                        KeyError) as error:
+                    self.on_error(error)
+
+            self.socket = self._app()
+
+        self.active = False
+
+    def _seen(self, channel_url, created_at):
+        """
+        Remember the newest message that we have seen in a chat, so that a reconnect knows where to catch up from
+        """
+        if not created_at:
+            return
+
+        with self._seen_lock:
+            if created_at > self.last_seen.get(channel_url, 0):
+                self.last_seen[channel_url] = created_at
+
+    def _on_login(self, data):
+        """
+        Called when sendbird acknowledges our connection
+        """
+        self.connected = True
+        reconnected = self.attempts > 0
+        self.attempts = 0
+
+        if reconnected:
+            self.client.handler._on_reconnect(data)
+            self._catch_up_all()
+
+    def _catch_up_all(self):
+        with self._seen_lock:
+            seen = {**self.last_seen}
+
+        for channel_url, since in seen.items():
+            try:
+                for message in self._missed(channel_url, since):
+                    self.client.handler._on_missed(message)
+
+            except Exception as error:
+                self.on_error(error)
+
+    def _missed(self, channel_url, since):
+        """
+        Get messages in a chat that were sent after ``since``, oldest first
+        """
+        chat = objects.Chat(channel_url, self.client)
+        missed = {}
+        next = None
+
+        while len(missed) < self.catch_up:
+            page = chat._messages_paginated(next = next)
+
+            if not page["items"]:
+                break
+
+            for message in page["items"]:
+                if message.get("created_at", 0) > since:
+                    missed[message.id] = message
+
+            oldest = min(message.get("created_at", 0)
+                         for message in page["items"])
+
+            if oldest <= since or page["paging"]["next"] == next:
+                break
+
+            next = page["paging"]["next"]
+
+        missed = sorted(missed.values(),
+                        key = lambda message: message.get("created_at", 0))
+        return missed[-self.catch_up:]
+
+    # public methods
+
+    def start(self):
+        if not self.client:
+            raise TypeError(f"client cannont be {self.client}")
+
+        self._resolve_route()
 
         websocket.enableTrace(self.trace)
-        self.socket = websocket.WebSocketApp(
-            f"{self.socket_url}?dp=Android&pv=21&sv=3.0.55&ai={self.route}&user_id={self.client.id}&access_token={self.client.messenger_token}",
-            on_message = self.on_message,
-            on_open = self.on_open,
-            on_close = self.on_close,
-            on_ping = self.on_ping,
-            on_error = self.on_error)
+        self.client.handler.pin_self()
+        self._stopping.clear()
+        self._resume = False
+        self.attempts = 0
+        self.socket = self._app()
 
         if not self.threaded:
-            return self.socket.run_forever(ping_interval = 15)
+            return self._run()
 
-        self.socket_thread = threading.Thread(target = self.socket.run_forever,
-                                              kwargs = {"ping_interval": 15})
+        self.socket_thread = threading.Thread(target = self._run)
         self.socket_thread.start()
         self.active = True
+
         return self.socket
 
     def stop(self):
-        self.socket.close()
+        self._stopping.set()
+
+        if self.queue is not None:
+            self.queue.stop()
+
+        self.acks.reject_all(
+            exceptions.ChatNotActive("The chat socket was stopped"))
+
+        if self.socket:
+            self.socket.close()
+
         self.active = False
         return self.socket
 
     def send(self, data):
         self.socket.send(data)
+
+    def use_queue(self, **kwargs):
+        """
+        Send frames from ``send_frame`` through a SendQueue.
+        Keyword arguments are passed to SendQueue
+
+        :returns: the queue
+        :rtype: SendQueue
+        """
+        self.queue = SendQueue(self, **kwargs)
+        return self.queue
+
+    def send_frame(self,
+                   key,
+                   data,
+                   ack = False,
+                   timeout = 10,
+                   retries = 1,
+                   priority = 1):
+        """
+        Send a frame with a new ``req_id``, through the send queue if there is one
+
+        :param key: four letter key of the frame, like ``MESG``
+        :param data: json data of the frame
+        :param ack: wait for sendbird to echo the frame back?
+        :param timeout: seconds to wait for each try when ``ack`` is True
+        :param retries: most number of times to send the frame again when ``ack`` is True
+        :param priority: lane of the send queue, 0 being the most urgent
+
+        :type key: str
+        :type data: dict
+        :type ack: bool
+        :type timeout: float
+        :type retries: int
+        :type priority: int
+
+        :returns: a future resolved with the echo when ``ack`` is True, a future resolved when it is sent if it was queued, else None
+        :rtype: concurrent.futures.Future
+        """
+        if self.queue is not None:
+            return self.queue.put(key,
+                                  data,
+                                  ack = ack,
+                                  timeout = timeout,
+                                  retries = retries,
+                                  priority = priority)
+
+        return self._send_frame(key, data, ack, timeout, retries)
+
+    def _send_frame(self, key, data, ack = False, timeout = 10, retries = 1):
+        req_id = str(self.client.next_req_id)
+        data = json.dumps({**data, "req_id": req_id}, separators = (",", ":"))
+        frame = f"{key}{data}\n"
+
+        if not ack:
+            self.send(frame)
+            return None
+
+        future = self.acks.track(req_id, frame, timeout, retries)
+
+        try:
+            self.send(frame)
+
+        except Exception as error:
+            self.acks.reject(req_id, error)
+            raise
+
+        return future
@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ifunny.util import exceptions, methods, ratelimit
+
+
+class BatchResult:
+    """
+    Outcome of one action in a batch
+
+    :param target: the object that the action was done on
+    :param action: the action, as it was given
+    """
+    def __init__(self, target, action):
+        self.target = target
+        self.action = action
+        self.value = None
+        self.error = None
+        self.repeated = False
+
+    def __repr__(self):
+        state = "repeated" if self.repeated else "ok" if self.ok else repr(
+            self.error)
+        return f"<BatchResult {self.name} {self.target.id}: {state}>"
+
+    @property
+    def ok(self):
+        """
+        :returns: was the action done? An action that had already been done counts
+        :rtype: bool
+        """
+        return self.error is None
+
+    @property
+    def name(self):
+        """
+        :returns: name of the action
+        :rtype: str
+        """
+        if isinstance(self.action, str):
+            return self.action
+
+        return getattr(self.action, "__name__", repr(self.action))
+
+
+class BatchReport:
+    """
+    Outcomes of every action in a batch, in the order they were given
+    """
+    def __init__(self, results):
+        self.results = results
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    @property
+    def succeeded(self):
+        """
+        :returns: actions that were done, including ones that had already been done
+        :rtype: list<BatchResult>
+        """
+        return [result for result in self.results if result.ok]
+
+    @property
+    def repeated(self):
+        """
+        :returns: actions that had already been done
+        :rtype: list<BatchResult>
+        """
+        return [result for result in self.results if result.repeated]
+
+    @property
+    def failed(self):
+        """
+        :returns: actions that could not be done
+        :rtype: list<BatchResult>
+        """
+        return [result for result in self.results if not result.ok]
+
+
+def run(actions, workers = 4, rate = None, retries = 5, delay = 1):
+    """
+    Do many actions (smiles, republishes, subscriptions, and so on) at once.
+    Actions that raise ``RepeatedAction`` count as done, rate limited actions are tried again with backoff,
+    and any other error is kept in the report instead of raised
+
+    :param actions: (object, action) pairs, where action is the name of a method of the object like ``smile`` or ``subscribe``, or a callable that takes the object
+    :param workers: most number of actions to do at once
+    :param rate: most number of actions per second, on top of the rate budgets of the clients. If None, only the rate budgets of the clients apply
+    :param retries: most number of times to try a rate limited action again
+    :param delay: seconds to wait before the first retry
+
+    :type actions: iterable<tuple<object, str or callable>>
+    :type workers: int
+    :type rate: float
+    :type retries: int
+    :type delay: float
+
+    :returns: the outcome of each action, in the order they were given
+    :rtype: BatchReport
+    """
+    budget = ratelimit.RateBudget(rate) if rate else None
+    results = [BatchResult(target, action) for target, action in actions]
+
+    def do(result):
+        call = result.action
+
+        if isinstance(call, str):
+            call = getattr(result.target, call)
+        else:
+            call = partial(call, result.target)
+
+        def attempt():
+            # every try, retries included, waits for the budget
+            if budget:
+                budget.acquire()
+
+            return call()
+
+        try:
+            result.value = methods.rate_limited(attempt,
+                                                retries = retries,
+                                                delay = delay)
+
+        except exceptions.RepeatedAction:
+            result.repeated = True
+
+        except Exception as error:
+            result.error = error
+
+        return result
+
+    with ThreadPoolExecutor(max_workers = workers) as pool:
+        [*pool.map(do, results)]
+
+    return BatchReport(results)
@@ -0,0 +1,187 @@
+import json
+
+from ifunny import objects
+from ifunny.util import exceptions, methods, ratelimit
+
+
+class BroadcastResult:
+    """
+    Outcome of a broadcast to one chat
+
+    :param channel_url: url of the chat
+    """
+    def __init__(self, channel_url):
+        self.channel_url = channel_url
+        self.via = None
+        self.message = None
+        self.error = None
+
+    def __repr__(self):
+        state = f"sent by {self.via}" if self.ok else repr(self.error)
+        return f"<BroadcastResult {self.channel_url}: {state}>"
+
+    @property
+    def ok(self):
+        """
+        :returns: was the message delivered?
+        :rtype: bool
+        """
+        return self.via is not None
+
+
+class BroadcastReport:
+    """
+    Outcomes of a broadcast to every chat, in the order they were given
+    """
+    def __init__(self, results):
+        self.results = results
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    @property
+    def delivered(self):
+        """
+        :returns: chats that got the message
+        :rtype: list<BroadcastResult>
+        """
+        return [result for result in self.results if result.ok]
+
+    @property
+    def by_socket(self):
+        """
+        :returns: chats that got the message through the chat socket
+        :rtype: list<BroadcastResult>
+        """
+        return [result for result in self.results if result.via == "socket"]
+
+    @property
+    def by_rest(self):
+        """
+        :returns: chats that got the message through the sendbird api, after the socket failed
+        :rtype: list<BroadcastResult>
+        """
+        return [result for result in self.results if result.via == "rest"]
+
+    @property
+    def failed(self):
+        """
+        :returns: chats that did not get the message
+        :rtype: list<BroadcastResult>
+        """
+        return [result for result in self.results if not result.ok]
+
+
+def _send_rest(client, channel_url, message):
+    data = methods.request(
+        "post",
+        f"{client.sendbird_api}/group_channels/{channel_url}/messages",
+        headers = client.sendbird_headers,
+        json = {
+            "message_type": "MESG",
+            "user_id": client.id,
+            "message": message
+        })
+
+    return objects.Message(data["message_id"],
+                           channel_url,
+                           client,
+                           data = data)
+
+
+def run(client,
+        chats,
+        message,
+        rate = 10,
+        timeout = 10,
+        retries = 1,
+        fallback = True):
+    """
+    Send one text message to many chats.
+    The message is encoded once and only the chat url and ``req_id`` are written for each frame.
+    Frames go straight to the chat socket (not its send queue), paced by ``rate``, and each one waits for sendbird to echo it back.
+    Chats that the socket could not deliver to are sent the message through the sendbird api
+
+    :param client: client to send as
+    :param chats: chats to send to. Can be Chat objects or chat urls
+    :param message: text to send
+    :param rate: most number of messages per second. If None, as fast as they can be sent
+    :param timeout: seconds to wait for each echo
+    :param retries: most number of times to send a frame again before falling back
+    :param fallback: send through the sendbird api when the socket fails? The socket does not need to be started if this is True
+
+    :type client: Client
+    :type chats: iterable<Chat or str>
+    :type message: str
+    :type rate: float
+    :type timeout: float
+    :type retries: int
+    :type fallback: bool
+
+    :returns: the outcome for each chat
+    :rtype: BroadcastReport
+    """
+    socket = client.socket
+    budget = ratelimit.RateBudget(rate) if rate else None
+    prefix = "MESG{\"channel_url\":"
+    body = f",\"message\":{json.dumps(message)},\"req_id\":"
+    results = []
+    waiting = []
+
+    for chat in chats:
+        channel_url = chat if isinstance(chat, str) else chat.channel_url
+        result = BroadcastResult(channel_url)
+        results.append(result)
+
+        if not socket.active:
+            result.error = exceptions.ChatNotActive(
+                "The chat socket has not been started")
+            continue
+
+        if budget:
+            budget.acquire()
+
+        req_id = str(client.next_req_id)
+        frame = f"{prefix}{json.dumps(channel_url)}{body}\"{req_id}\"}}\n"
+        echo = socket.acks.track(req_id, frame, timeout, retries)
+
+        try:
+            socket.send(frame)
+
+        except Exception as error:
+            socket.acks.reject(req_id, error)
+
+        waiting.append((result, echo))
+
+    for result, echo in waiting:
+        result.error = echo.exception()
+
+        if result.error is None:
+            result.via = "socket"
+            result.message = echo.result()
+
+    if not fallback:
+        return BroadcastReport(results)
+
+    for result in results:
+        if result.ok:
+            continue
+
+        if budget:
+            budget.acquire()
+
+        try:
+            result.message = _send_rest(client, result.channel_url, message)
+            result.via = "rest"
+            result.error = None
+
+        except Exception as error:
+            result.error = error
+
+    return BroadcastReport(results)
@@ -1,3 +1,11 @@
+import asyncio, inspect, threading, time, traceback
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ifunny.util import methods
+
+
 def _default(message, args):
     return
 
@@ -13,15 +21,370 @@ def _help(message, args):
     message.send(_help)
 
 class Command:
-    def __init__(self, method, name):
+    def __init__(self,
+                 method,
+                 name,
+                 concurrency = None,
+                 cooldown = None,
+                 timeout = None):
         self.method = method
         self.name = name
         self.help = self.method.__doc__
+        self.concurrency = concurrency
+        self.cooldown = cooldown
+        self.timeout = timeout
 
     def __call__(self, message, args):
-        self.method(message, args)
+        methods.invoke(self.method, message, args)
         return self
 
+class Invocation:
+    """
+    One call of a command by a CommandExecutor
+
+    :param command: the command
+    :param message: message that called it
+    :param args: words after the command
+    """
+    def __init__(self, command, message, args):
+        self.command = command
+        self.message = message
+        self.args = args
+        self.future = Future()
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+        self._cancel = None
+
+    def cancel(self):
+        """
+        Cancel the call. A call that is waiting never runs, and a coroutine that is running is cancelled.
+        A plain function that is already running can not be stopped
+
+        :returns: was it waiting or a coroutine?
+        :rtype: bool
+        """
+        if self.future.cancel():
+            return True
+
+        if self._cancel:
+            self._cancel()
+            return True
+
+        return False
+
+    @property
+    def waited(self):
+        """
+        :returns: seconds between being submitted and starting
+        :rtype: float
+        """
+        return (self.started_at or time.monotonic()) - self.queued_at
+
+    @property
+    def ran(self):
+        """
+        :returns: seconds between starting and finishing
+        :rtype: float
+        """
+        if self.started_at is None:
+            return 0
+
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class CommandExecutor:
+    """
+    Runs commands on a pool of threads instead of in the thread that handles the message.
+    Each command can run at most ``concurrency`` calls at once, and further calls wait for one of its own to finish,
+    so a slow command can not take every thread from the others.
+    A command that was called by the same user less than ``cooldown`` seconds ago is not run again.
+    Coroutine commands that run for more than ``timeout`` seconds are cancelled,
+    plain functions can not be interrupted and are only counted as timed out.
+    Calls that fail or time out are passed to ``on_error``
+
+    :param workers: number of threads to run commands on
+    :param concurrency: default most number of calls of each command at once. If None, half of ``workers``
+    :param cooldown: default seconds before a user can call the same command again. If None, no cooldown
+    :param timeout: default most seconds that a call can run. If None, no timeout
+    :param on_error: called with the exception of each call that fails or times out. If None, the traceback is printed
+
+    :type workers: int
+    :type concurrency: int
+    :type cooldown: float
+    :type timeout: float
+    :type on_error: callable
+    """
+    def __init__(self,
+                 workers = 8,
+                 concurrency = None,
+                 cooldown = None,
+                 timeout = None,
+                 on_error = None):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.on_error = on_error
+
+        self.pool = ThreadPoolExecutor(max_workers = workers,
+                                       thread_name_prefix = "ifunny-command")
+
+        self._waiting = {}
+        self._running = {}
+        self._stats = {}
+        self._last_called = {}
+        self._lock = threading.Lock()
+
+    # private methods
+
+    def _option(self, command, name):
+        value = getattr(command, name, None)
+        return getattr(self, name) if value is None else value
+
+    def _stat(self, name):
+        if name not in self._stats:
+            self._stats[name] = {
+                "completed": 0,
+                "failed": 0,
+                "timed_out": 0,
+                "cancelled": 0,
+                "cooled_down": 0,
+                "wait": deque(maxlen = 1000),
+                "run": deque(maxlen = 1000)
+            }
+
+        return self._stats[name]
+
+    def _report(self, error):
+        if not self.on_error:
+            return traceback.print_exception(type(error), error,
+                                             error.__traceback__)
+
+        try:
+            self.on_error(error)
+
+        except Exception as raised:
+            traceback.print_exception(type(raised), raised,
+                                      raised.__traceback__)
+
+    def _cooling(self, command, message):
+        """
+        Called holding the lock
+
+        :returns: is the author of the message cooling down from this command?
+        """
+        cooldown = self._option(command, "cooldown")
+
+        if not cooldown:
+            return False
+
+        user = (message.get("user") or {}).get("guest_id")
+        key = (command.name, user)
+        now = time.monotonic()
+
+        if now - self._last_called.get(key, -cooldown) < cooldown:
+            return True
+
+        if len(self._last_called) >= 4096:
+            self._last_called = {
+                key: last
+                for key, last in self._last_called.items()
+                if now - last < cooldown
+            }
+
+        self._last_called[key] = now
+        return False
+
+    def _start(self, invocation):
+        """
+        Called holding the lock
+        """
+        self._running.setdefault(invocation.command.name,
+                                 set()).add(invocation)
+        self.pool.submit(self._run, invocation)
+
+    def _run(self, invocation):
+        if not invocation.future.set_running_or_notify_cancel():
+            return self._finish(invocation, "cancelled")
+
+        invocation.started_at = time.monotonic()
+        timeout = self._option(invocation.command, "timeout")
+        outcome, result, error = "completed", None, None
+
+        try:
+            result = self._call(invocation, timeout)
+
+            if timeout and invocation.ran > timeout:
+                raise TimeoutError(
+                    f"{invocation.command.name} ran for {invocation.ran:.2f}s"
+                )
+
+        except (asyncio.TimeoutError, TimeoutError) as raised:
+            outcome, error = "timed_out", raised
+
+        except asyncio.CancelledError as raised:
+            outcome, error = "cancelled", raised
+
+        except Exception as raised:
+            outcome, error = "failed", raised
+
+        # counted before the future is resolved, so that its callbacks see the metrics of this call
+        self._finish(invocation, outcome)
+
+        if outcome in {"failed", "timed_out"}:
+            self._report(error)
+
+        if error:
+            invocation.future.set_exception(error)
+        else:
+            invocation.future.set_result(result)
+
+    def _call(self, invocation, timeout):
+        result = invocation.command.method(invocation.message, invocation.args)
+
+        if not inspect.isawaitable(result):
+            return result
+
+        async def wait():
+            task = asyncio.ensure_future(result)
+            loop = asyncio.get_running_loop()
+            invocation._cancel = lambda: loop.call_soon_threadsafe(task.cancel)
+            return await asyncio.wait_for(task, timeout)
+
+        return asyncio.run(wait())
+
+    def _finish(self, invocation, outcome):
+        invocation.finished_at = time.monotonic()
+        name = invocation.command.name
+
+        with self._lock:
+            stat = self._stat(name)
+            stat[outcome] += 1
+
+            if invocation.started_at is not None:
+                stat["wait"].append(invocation.waited)
+                stat["run"].append(invocation.ran)
+
+            self._running[name].discard(invocation)
+            waiting = self._waiting.get(name)
+
+            if waiting:
+                self._start(waiting.popleft())
+
+    # public methods
+
+    def submit(self, command, message, args):
+        """
+        Run a command, or queue it behind other calls of the same command
+
+        :param command: command to run
+        :param message: message that called it
+        :param args: words after the command
+
+        :type command: Command
+        :type message: Message
+        :type args: list<str>
+
+        :returns: the call, or None if the author of the message is cooling down from this command
+        :rtype: Invocation
+        """
+        with self._lock:
+            stat = self._stat(command.name)
+
+            if self._cooling(command, message):
+                stat["cooled_down"] += 1
+                return None
+
+            invocation = Invocation(command, message, args)
+            limit = self._option(command, "concurrency") or max(
+                1, self.workers // 2)
+
+            if len(self._running.get(command.name, ())) < limit:
+                self._start(invocation)
+            else:
+                self._waiting.setdefault(command.name,
+                                         deque()).append(invocation)
+
+        return invocation
+
+    def cancel(self, name = None):
+        """
+        Cancel every waiting call of a command, and every running call of it that can be cancelled
+
+        :param name: name of the command. If None, every command
+
+        :type name: str
+        """
+        with self._lock:
+            names = [name] if name else [*self._stats]
+            waiting = [
+                invocation for key in names
+                for invocation in self._waiting.pop(key, [])
+            ]
+            running = [
+                invocation for key in names
+                for invocation in self._running.get(key, ())
+            ]
+
+            for invocation in waiting:
+                self._stat(invocation.command.name)["cancelled"] += 1
+
+        for invocation in waiting:
+            invocation.finished_at = time.monotonic()
+            invocation.future.cancel()
+
+        for invocation in running:
+            invocation.cancel()
+
+    def shutdown(self, wait = True):
+        """
+        Cancel every waiting call and stop the threads
+
+        :param wait: wait for running calls to finish?
+
+        :type wait: bool
+        """
+        self.cancel()
+        self.pool.shutdown(wait = wait)
+
+    # public properties
+
+    @property
+    def metrics(self):
+        """
+        :returns: for each command, the number of calls ``waiting`` and ``running`` now, the number that
+            ``completed``, ``failed``, ``timed_out``, were ``cancelled`` or ``cooled_down``,
+            and seconds spent waiting for a thread (``wait``) and running (``run``) as ``average`` and ``max`` of the last 1000 calls
+        :rtype: dict
+        """
+        def summary(samples):
+            if not samples:
+                return {"average": None, "max": None}
+
+            return {
+                "average": sum(samples) / len(samples),
+                "max": max(samples)
+            }
+
+        with self._lock:
+            return {
+                name: {
+                    "waiting": len(self._waiting.get(name, [])),
+                    "running": len(self._running.get(name, ())),
+                    "completed": stat["completed"],
+                    "failed": stat["failed"],
+                    "timed_out": stat["timed_out"],
+                    "cancelled": stat["cancelled"],
+                    "cooled_down": stat["cooled_down"],
+                    "wait": summary(stat["wait"]),
+                    "run": summary(stat["run"])
+                }
+                for name, stat in self._stats.items()
+            }
+
+
 class Defaults:
 
     help = Command(_help, "help")
@@ -0,0 +1,348 @@
+import json, math, os, tempfile, threading
+
+from base64 import b64decode, b64encode
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from hashlib import blake2b
+
+from ifunny import objects
+from ifunny.util import methods
+
+
+class BloomFilter:
+    """
+    Compact set of strings that may say that it holds something that it does not (at about ``error_rate``), but never the other way around.
+    Takes about 1.8 bytes for each item at the default error rate, no matter how long the items are
+
+    :param capacity: number of items that the filter is sized for
+    :param error_rate: chance of a false positive once ``capacity`` items are added
+
+    :type capacity: int
+    :type error_rate: float
+    """
+    def __init__(self, capacity = 1000000, error_rate = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, int(-capacity * math.log(error_rate) / math.log(2)**2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def __contains__(self, item):
+        return all(self._bits[index >> 3] & (1 << (index & 7))
+                   for index in self._indexes(item))
+
+    def __len__(self):
+        return self.count
+
+    # private methods
+
+    def _indexes(self, item):
+        digest = blake2b(item.encode(), digest_size = 16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + step * second) % self.size
+                for step in range(self.hashes)]
+
+    # public methods
+
+    def add(self, item):
+        """
+        Add an item
+
+        :param item: item to add
+
+        :type item: str
+
+        :returns: was the item new? (False may be a false positive)
+        :rtype: bool
+        """
+        new = False
+
+        with self._lock:
+            for index in self._indexes(item):
+                byte, bit = index >> 3, 1 << (index & 7)
+
+                if not self._bits[byte] & bit:
+                    self._bits[byte] |= bit
+                    new = True
+
+            self.count += new
+
+        return new
+
+    def dump(self):
+        """
+        :returns: the filter as a json serializable dict
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "error_rate": self.error_rate,
+                "count": self.count,
+                "bits": b64encode(self._bits).decode()
+            }
+
+    @classmethod
+    def load(cls, data):
+        """
+        Load a filter from ``BloomFilter.dump``
+
+        :param data: a dumped filter
+
+        :type data: dict
+
+        :rtype: BloomFilter
+        """
+        bloom = cls(data["capacity"], data["error_rate"])
+        bloom.count = data["count"]
+        bloom._bits = bytearray(b64decode(data["bits"]))
+        return bloom
+
+
+class GraphCrawler:
+    """
+    Crawls the social graph of users through their subscribers and/or subscriptions.
+    Visited users are kept in a BloomFilter, so memory does not grow with the number of users seen, at the cost of skipping about ``error_rate`` of them.
+    Edges are streamed as ``source target depth`` lines, so they are never held in memory
+
+    :param client: client to make requests with
+    :param direction: edges to follow. Can be one of (``subscribers``, ``subscriptions``, ``both``). A subscriber edge is ``subscriber -> user``, a subscription edge is ``user -> subscription``
+    :param max_depth: most number of hops from a seed to visit
+    :param order: order to visit users in. Can be one of (``bfs``, ``dfs``)
+    :param workers: most number of users to request at once
+    :param max_neighbors: most number of neighbors to request for each user. If None, all of them are requested
+    :param capacity: number of users that the visited set is sized for
+    :param error_rate: chance that a user is skipped as already visited when it was not
+    :param checkpoint: file to save progress to every ``checkpoint_every`` users. If it exists, the crawl resumes from it
+    :param checkpoint_every: number of users to visit between checkpoints
+    :param retries: most number of times to try a rate limited request again
+
+    :type client: Client
+    :type direction: str
+    :type max_depth: int
+    :type order: str
+    :type workers: int
+    :type max_neighbors: int
+    :type capacity: int
+    :type error_rate: float
+    :type checkpoint: str
+    :type checkpoint_every: int
+    :type retries: int
+    """
+    directions = {"subscribers", "subscriptions", "both"}
+    orders = {"bfs", "dfs"}
+
+    def __init__(self,
+                 client,
+                 direction = "subscribers",
+                 max_depth = 2,
+                 order = "bfs",
+                 workers = 4,
+                 max_neighbors = None,
+                 capacity = 1000000,
+                 error_rate = 0.001,
+                 checkpoint = None,
+                 checkpoint_every = 100,
+                 retries = 5):
+        if direction not in self.directions:
+            raise ValueError(f"direction cannot be {direction}")
+
+        if order not in self.orders:
+            raise ValueError(f"order cannot be {order}")
+
+        self.client = client
+        self.direction = direction
+        self.max_depth = max_depth
+        self.order = order
+        self.workers = workers
+        self.max_neighbors = max_neighbors
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.retries = retries
+
+        self.visited = BloomFilter(capacity, error_rate)
+        self.frontier = deque()
+        self.done = 0
+        self.written = 0
+        self.resumed = False
+
+        if checkpoint and os.path.isfile(checkpoint):
+            self._load()
+            self.resumed = True
+
+    # private methods
+
+    def _load(self):
+        with open(self.checkpoint) as stream:
+            data = json.load(stream)
+
+        self.visited = BloomFilter.load(data["visited"])
+        self.frontier = deque(tuple(item) for item in data["frontier"])
+        self.done = data["done"]
+        self.written = data["written"]
+
+    def _save(self, in_flight):
+        data = {
+            "visited": self.visited.dump(),
+            "frontier": [*in_flight, *self.frontier],
+            "done": self.done,
+            "written": self.written
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.checkpoint))
+        descriptor, temporary = tempfile.mkstemp(dir = directory,
+                                                 prefix = ".graph-")
+
+        with os.fdopen(descriptor, "w") as stream:
+            json.dump(data, stream)
+
+        os.replace(temporary, self.checkpoint)
+
+    def _pages(self, source):
+        count = 0
+        next = None
+
+        while True:
+            page = methods.rate_limited(source,
+                                        next = next,
+                                        retries = self.retries)
+
+            for item in page["items"]:
+                yield item.id
+                count += 1
+
+                if self.max_neighbors and count >= self.max_neighbors:
+                    return
+
+            next = page["paging"]["next"]
+
+            if not next:
+                return
+
+    def _neighbors(self, id):
+        user = objects.User(id, client = self.client)
+        edges = []
+
+        if self.direction in {"subscribers", "both"}:
+            edges.extend((other, id, other)
+                         for other in self._pages(user._subscribers_paginated))
+
+        if self.direction in {"subscriptions", "both"}:
+            edges.extend(
+                (id, other, other)
+                for other in self._pages(user._subscriptions_paginated))
+
+        return edges
+
+    def _next(self):
+        if self.order == "bfs":
+            return self.frontier.popleft()
+
+        return self.frontier.pop()
+
+    def _mark(self, stream, running):
+        if stream is not None:
+            stream.flush()
+            self.written = stream.tell()
+
+        self._save([*running.values()])
+
+    # public methods
+
+    def crawl(self, *seeds, output = None):
+        """
+        Crawl outwards from seed users.
+        When resuming from a checkpoint, the seeds are ignored
+
+        :param seeds: users to start from. Can be user ids or User objects
+        :param output: path or text file to append ``source target depth`` lines to. A path is truncated to what the checkpoint saw when resuming, so that no edge is written twice
+
+        :type seeds: str or User
+        :type output: str or file
+
+        :returns: generator iterating edges as (source id, target id, depth of the user that they were found from)
+        :rtype: generator<tuple<str, str, int>>
+        """
+        stream = output
+        write = None
+
+        if isinstance(output, str):
+            stream = open(output, "ab")
+            write = lambda line: stream.write(line.encode())
+
+            if self.resumed:
+                stream.truncate(self.written)
+
+        elif output is not None:
+            write = output.write
+
+        if not self.resumed:
+            for seed in seeds:
+                id = seed if isinstance(seed, str) else seed.id
+
+                if self.visited.add(id):
+                    self.frontier.append((id, 0))
+
+        pool = ThreadPoolExecutor(max_workers = self.workers)
+        running = {}
+
+        try:
+            while self.frontier or running:
+                while self.frontier and len(running) < self.workers:
+                    id, depth = self._next()
+                    running[pool.submit(self._neighbors, id)] = (id, depth)
+
+                finished, _ = wait(running, return_when = FIRST_COMPLETED)
+
+                for future in finished:
+                    id, depth = running.pop(future)
+
+                    for source, target, other in future.result():
+                        if write:
+                            write(f"{source} {target} {depth}\n")
+
+                        yield source, target, depth
+
+                        if depth < self.max_depth and self.visited.add(other):
+                            self.frontier.append((other, depth + 1))
+
+                    self.done += 1
+                    every = self.checkpoint_every
+
+                    if self.checkpoint and not self.done % every:
+                        self._mark(stream, running)
+
+            if self.checkpoint:
+                self._mark(stream, running)
+
+        finally:
+            for future in running:
+                future.cancel()
+
+            pool.shutdown(wait = False)
+
+            if isinstance(output, str):
+                stream.close()
+
+
+def read_edges(path):
+    """
+    Read edges written by ``GraphCrawler.crawl``
+
+    :param path: file that edges were written to
+
+    :type path: str
+
+    :returns: generator iterating edges as (source id, target id, depth)
+    :rtype: generator<tuple<str, str, int>>
+    """
+    with open(path) as stream:
+        for line in stream:
+            source, target, depth = line.split()
+            yield source, target, int(depth)
@@ -0,0 +1,337 @@
+import heapq, os, tempfile
+
+from ifunny.util import methods
+
+_record_size = 12
+_read_size = _record_size * 4096
+
+
+def _encode(id):
+    record = bytes.fromhex(id)
+
+    if len(record) != _record_size:
+        raise ValueError(f"{id} is not an iFunny id")
+
+    return record
+
+
+def _read(path):
+    """
+    Read the records of a sorted id file without loading all of it
+    """
+    with open(path, "rb") as stream:
+        while True:
+            chunk = stream.read(_read_size)
+
+            if not chunk:
+                return
+
+            for index in range(0, len(chunk), _record_size):
+                yield chunk[index:index + _record_size]
+
+
+def _write(path, records):
+    """
+    Write sorted records to a temporary file and rename it over ``path``, dropping duplicates
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir = directory,
+                                             prefix = ".snapshot-")
+    last = None
+
+    try:
+        with os.fdopen(descriptor, "wb") as stream:
+            for record in records:
+                if record != last:
+                    stream.write(record)
+                    last = record
+
+        os.replace(temporary, path)
+
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+        raise
+
+
+def _sort(ids, path, chunk_size):
+    """
+    Sort ids into a file at ``path`` while holding at most ``chunk_size`` of them in memory.
+    Sorted runs are spilled next to ``path`` and merged at the end
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    runs = []
+    buffer = []
+
+    def spill():
+        descriptor, run = tempfile.mkstemp(dir = directory, prefix = ".run-")
+
+        with os.fdopen(descriptor, "wb") as stream:
+            stream.write(b"".join(sorted(buffer)))
+
+        runs.append(run)
+        buffer.clear()
+
+    try:
+        for id in ids:
+            buffer.append(_encode(id))
+
+            if len(buffer) >= chunk_size:
+                spill()
+
+        readers = [_read(run) for run in runs]
+        _write(path, heapq.merge(sorted(buffer), *readers))
+
+    finally:
+        for run in runs:
+            os.remove(run)
+
+
+class Snapshot:
+    """
+    Sorted file of the ids of a users subscribers, 12 bytes for each one.
+    Snapshots are compared with a linear merge of both files, so neither is ever loaded into memory.
+    The first ids in the order that iFunny returned them are kept in ``path``.head, so that a later snapshot can stop once it reaches them
+
+    :param path: location of the snapshot
+
+    :type path: str
+    """
+    def __init__(self, path):
+        self.path = path
+        self.head_path = f"{path}.head"
+
+    def __len__(self):
+        return os.path.getsize(self.path) // _record_size
+
+    def __iter__(self):
+        for record in _read(self.path):
+            yield record.hex()
+
+    def __contains__(self, id):
+        record = _encode(id)
+        low, high = 0, len(self)
+
+        with open(self.path, "rb") as stream:
+            while low < high:
+                middle = (low + high) // 2
+                stream.seek(middle * _record_size)
+                found = stream.read(_record_size)
+
+                if found == record:
+                    return True
+
+                if found < record:
+                    low = middle + 1
+                else:
+                    high = middle
+
+        return False
+
+    # private methods
+
+    @staticmethod
+    def _walk(user, limit, retries):
+        next = None
+
+        while True:
+            page = methods.rate_limited(user._subscribers_paginated,
+                                        limit = limit,
+                                        next = next,
+                                        retries = retries)
+
+            for item in page["items"]:
+                yield item.id
+
+            next = page["paging"]["next"]
+
+            if not next:
+                return
+
+    def _write_head(self, ids):
+        directory = os.path.dirname(os.path.abspath(self.head_path))
+        descriptor, temporary = tempfile.mkstemp(dir = directory,
+                                                 prefix = ".head-")
+
+        with os.fdopen(descriptor, "wb") as stream:
+            stream.write(b"".join(_encode(id) for id in ids))
+
+        os.replace(temporary, self.head_path)
+
+    # public methods
+
+    @classmethod
+    def take(cls,
+             user,
+             path,
+             chunk_size = 1000000,
+             head_size = 100,
+             limit = None,
+             retries = 5):
+        """
+        Snapshot every subscriber of a user
+
+        :param user: user to snapshot
+        :param path: location to write the snapshot to
+        :param chunk_size: most number of ids to hold in memory before spilling them to disk
+        :param head_size: number of the newest subscribers to remember for ``Snapshot.update``
+        :param limit: number of subscribers to request at a time
+        :param retries: most number of times to try a rate limited request again
+
+        :type user: User
+        :type path: str
+        :type chunk_size: int
+        :type head_size: int
+        :type limit: int
+        :type retries: int
+
+        :returns: the snapshot
+        :rtype: Snapshot
+        """
+        snapshot = cls(path)
+        head = []
+
+        def ids():
+            for id in cls._walk(user, limit, retries):
+                if len(head) < head_size:
+                    head.append(id)
+
+                yield id
+
+        _sort(ids(), path, chunk_size)
+        snapshot._write_head(head)
+
+        return snapshot
+
+    @classmethod
+    def update(cls,
+               user,
+               path,
+               previous,
+               chunk_size = 1000000,
+               head_size = 100,
+               limit = None,
+               retries = 5):
+        """
+        Snapshot the subscribers of a user, stopping at the first one that is in the head of a previous snapshot.
+        This is much faster for big accounts, but only sees subscribers that were gained:
+        anyone that unsubscribed is still in the new snapshot. Take a full snapshot now and then to see losses.
+        If none of the head is found, every subscriber is walked and the new snapshot is a full one
+
+        :param user: user to snapshot
+        :param path: location to write the snapshot to. Can be the path of ``previous``
+        :param previous: earlier snapshot of this user
+        :param chunk_size: most number of ids to hold in memory before spilling them to disk
+        :param head_size: number of the newest subscribers to remember for the next update
+        :param limit: number of subscribers to request at a time
+        :param retries: most number of times to try a rate limited request again
+
+        :type user: User
+        :type path: str
+        :type previous: Snapshot
+        :type chunk_size: int
+        :type head_size: int
+        :type limit: int
+        :type retries: int
+
+        :returns: the snapshot
+        :rtype: Snapshot
+        """
+        previous_head = previous.head
+        known = set(previous_head)
+        head = []
+        found = False
+
+        def ids():
+            nonlocal found
+
+            for id in cls._walk(user, limit, retries):
+                if id in known:
+                    found = True
+                    return
+
+                if len(head) < head_size:
+                    head.append(id)
+
+                yield id
+
+        snapshot = cls(path)
+        gained = f"{path}.gained"
+
+        try:
+            _sort(ids(), gained, chunk_size)
+
+            if found:
+                _write(path, heapq.merge(_read(gained),
+                                         _read(previous.path)))
+                head = [*head, *previous_head]
+            else:
+                os.replace(gained, path)
+
+        finally:
+            if os.path.exists(gained):
+                os.remove(gained)
+
+        snapshot._write_head(head[:head_size])
+
+        return snapshot
+
+    def diff(self, newer):
+        """
+        Compare this snapshot with a newer one, in one pass over both files
+
+        :param newer: the newer snapshot
+
+        :type newer: Snapshot
+
+        :returns: generator iterating (``gained`` or ``lost``, id) in id order
+        :rtype: generator<tuple<str, str>>
+        """
+        old, new = _read(self.path), _read(newer.path)
+        left, right = next(old, None), next(new, None)
+
+        while left is not None or right is not None:
+            if right is None or (left is not None and left < right):
+                yield "lost", left.hex()
+                left = next(old, None)
+
+            elif left is None or right < left:
+                yield "gained", right.hex()
+                right = next(new, None)
+
+            else:
+                left, right = next(old, None), next(new, None)
+
+    def gained(self, newer):
+        """
+        :param newer: the newer snapshot
+
+        :type newer: Snapshot
+
+        :returns: generator iterating ids that are in ``newer`` but not in this snapshot
+        :rtype: generator<str>
+        """
+        return (id for change, id in self.diff(newer) if change == "gained")
+
+    def lost(self, newer):
+        """
+        :param newer: the newer snapshot
+
+        :type newer: Snapshot
+
+        :returns: generator iterating ids that are in this snapshot but not in ``newer``
+        :rtype: generator<str>
+        """
+        return (id for change, id in self.diff(newer) if change == "lost")
+
+    @property
+    def head(self):
+        """
+        :returns: ids of the newest subscribers when this snapshot was taken, newest first
+        :rtype: list<str>
+        """
+        if not os.path.isfile(self.head_path):
+            return []
+
+        return [record.hex() for record in _read(self.head_path)]
@@ -1,3 +1,3 @@
-from ifunny.objects._main_app import User, Post, Comment, Notification, Channel, Digest
+from ifunny.objects._main_app import User, Post, Comment, CommentTree, Notification, Channel, Digest
 from ifunny.objects._chat_app import Chat, ChatUser, Message, ChatInvite
-from ifunny.objects._small import Image, Ban, Achievement, Rating
+from ifunny.objects._small import Image, Ban, Achievement, Rating, Counters
@@ -19,6 +19,8 @@ class Chat(mixin.SendbirdMixin):
     :type data: dict
     :type paginated_size: int
     """
+    _cache_type = "chat"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.channel_url = self.id
@@ -63,10 +65,12 @@ class Chat(mixin.SendbirdMixin):
             params = params,
             headers = self.client.sendbird_headers)["messages"]
 
-        next_ts = messages[::-1][0]["created_at"]
+        next_ts = messages[-1]["created_at"] if messages else next
         items = [
-            Message(message["message_id"], message["channel_url"], self.client)
-            for message in messages
+            Message(message["message_id"],
+                    message["channel_url"],
+                    self.client,
+                    data = message) for message in messages
         ]
 
         return {"items": items, "paging": {"prev": None, "next": next_ts}}
@@ -83,7 +87,7 @@ class Chat(mixin.SendbirdMixin):
     # public methods
 
     @classmethod
-    def by_link(cls, code, client = mixin.ClientBase(), **kwargs):
+    def by_link(cls, code, client = None, **kwargs):
         """
         Get a chat from it's code.
 
@@ -96,10 +100,13 @@ class Chat(mixin.SendbirdMixin):
         :returns: A Chat of the given code, if it exists
         :rtype: Chat, or None
         """
+        client = client if client else mixin.default_client()
+
         try:
             data = methods.request(
                 "get", f"{cls.api}/chats/channels/by_link/{code}",
-                headers = client.headers
+                headers = client.headers,
+                client = client
             )["data"]
 
             return cls(data["channel_url"], client = client, data = data, **kwargs)
@@ -131,7 +138,8 @@ class Chat(mixin.SendbirdMixin):
             f"{self.client.api}/chats/channels/{self.channel_url}/operators",
             data = data,
             headers = self.client.headers,
-            errors = errors)
+            errors = errors,
+            client = self.client)
 
         return self.fresh.operators
 
@@ -160,7 +168,8 @@ class Chat(mixin.SendbirdMixin):
             f"{self.client.api}/chats/channels/{self.channel_url}/operators",
             data = data,
             headers = self.client.headers,
-            errors = errors)
+            errors = errors,
+            client = self.client)
 
         return self.fresh.operators
 
@@ -226,9 +235,11 @@ class Chat(mixin.SendbirdMixin):
         :returns: did this client join successfuly?
         :rtype: bool
         """
-        response = requests.put(
+        response = methods.send(
+            "put",
             f"{self.client.api}/chats/channels/{self.channel_url}/members",
-            headers = self.client.headers)
+            headers = self.client.headers,
+            client = self.client)
 
         return True if response.status_code == 200 else False
 
@@ -239,9 +250,11 @@ class Chat(mixin.SendbirdMixin):
         :returns: did this client leave successfuly?
         :rtype: bool
         """
-        response = requests.delete(
+        response = methods.send(
+            "delete",
             f"{self.client.api}/chats/channels/{self.channel_url}/members",
-            headers = self.client.headers)
+            headers = self.client.headers,
+            client = self.client)
 
         return True if response.status_code == 200 else False
 
@@ -321,7 +334,8 @@ class Chat(mixin.SendbirdMixin):
             f"{self.client.api}/chats/channels/{self.channel_url}/kicked_members",
             data = data,
             headers = self.client.headers,
-            errors = errors)
+            errors = errors,
+            client = self.client)
 
         return self
 
@@ -375,44 +389,62 @@ class Chat(mixin.SendbirdMixin):
 
         return self.fresh
 
-    def send_message(self, message, read = False):
+    def send_message(self,
+                     message,
+                     read = False,
+                     ack = False,
+                     timeout = 10,
+                     retries = 1,
+                     priority = 1):
         """
         Send a text message to a chat.
 
         :param message: text that you will send
         :param read: do we mark the chat as read?
+        :param ack: wait for sendbird to echo the message back? If True, a future is returned instead of self
+        :param timeout: seconds to wait for the echo before sending again, when ``ack`` is True
+        :param retries: most number of times to send again, when ``ack`` is True
+        :param priority: lane of the send queue of the socket, 0 being the most urgent. Only used with ``Socket.use_queue``
 
         :type message: str
         :type read: bool
+        :type ack: bool
+        :type timeout: float
+        :type retries: int
+        :type priority: int
 
         :raises: ChatNotActive if the attached client has not started the chat socket
 
-        :returns: self
-        :rtype: Chat
+        :returns: self, or a future resolved with the sent Message (failing with ChatTimeout) when ``ack`` is True
+        :rtype: Chat, or concurrent.futures.Future
         """
         if not self.client.socket.active:
             raise exceptions.ChatNotActive(
                 "The chat socket has not been started")
 
-        message_data = {
-            "channel_url": self.channel_url,
-            "message": message,
-            #"req_id"        : self.client.next_req_id
-        }
+        message_data = {"channel_url": self.channel_url, "message": message}
 
-        self.client.socket.send(
-            f"MESG{json.dumps(message_data, separators = (',', ':'))}\n")
+        sent = self.client.socket.send_frame("MESG",
+                                             message_data,
+                                             ack = ack,
+                                             timeout = timeout,
+                                             retries = retries,
+                                             priority = priority)
 
         if read:
             self.read()
 
-        return self
+        return sent if ack else self
 
     def send_image_url(self,
                        image_url,
                        width = 780,
                        height = 780,
-                       read = False):
+                       read = False,
+                       ack = False,
+                       timeout = 10,
+                       retries = 1,
+                       priority = 1):
         """
         Send an image to a chat from a url source.
 
@@ -420,16 +452,24 @@ class Chat(mixin.SendbirdMixin):
         :param width: width of the image in pixels
         :param height: heigh of the image in pixels
         :param read: do we mark the chat as read?
+        :param ack: wait for sendbird to echo the message back? If True, a future is returned instead of self
+        :param timeout: seconds to wait for the echo before sending again, when ``ack`` is True
+        :param retries: most number of times to send again, when ``ack`` is True
+        :param priority: lane of the send queue of the socket, 0 being the most urgent. Only used with ``Socket.use_queue``
 
         :type image_url: str
         :type width: int
         :type height: int
         :type read: bool
+        :type ack: bool
+        :type timeout: float
+        :type retries: int
+        :type priority: int
 
         :raises: ChatNotActive if the attached client has not started the chat socket
 
-        :returns: self
-        :rtype: Chat
+        :returns: self, or a future resolved with the sent Message (failing with ChatTimeout) when ``ack`` is True
+        :rtype: Chat, or concurrent.futures.Future
         """
         if not self.client.socket.active:
             raise exceptions.ChatNotActive(
@@ -460,16 +500,19 @@ class Chat(mixin.SendbirdMixin):
                 "width":
                 height,
             }]
-            #"req_id": self.client.next_req_id
         }
 
-        self.client.socket.send(
-            f"FILE{json.dumps(response_data, separators = (',', ':'))}\n")
+        sent = self.client.socket.send_frame("FILE",
+                                             response_data,
+                                             ack = ack,
+                                             timeout = timeout,
+                                             retries = retries,
+                                             priority = priority)
 
         if read:
             self.read()
 
-        return self
+        return sent if ack else self
 
     # public generators
 
@@ -538,10 +581,12 @@ class Chat(mixin.SendbirdMixin):
     def title(self, value):
         data = {"title": str(value), "description": self.description}
 
-        response = requests.put(
+        response = methods.send(
+            "put",
             f"{self.client.api}/chats/channels/{self.channel_url}",
             data = data,
-            headers = self.client.headers)
+            headers = self.client.headers,
+            client = self.client)
         self._update = True
 
     @property
@@ -572,10 +617,12 @@ class Chat(mixin.SendbirdMixin):
     def description(self, value):
         data = {"title": self.title, "description": str(value)}
 
-        response = requests.put(
+        response = methods.send(
+            "put",
             f"{self.client.api}/chats/channels/{self.channel_url}",
             data = data,
-            headers = self.client.headers)
+            headers = self.client.headers,
+            client = self.client)
         self._update = True
 
     @property
@@ -596,10 +643,12 @@ class Chat(mixin.SendbirdMixin):
 
         data = f"is_frozen={str(val).lower()}"
 
-        response = requests.put(
+        response = methods.send(
+            "put",
             f"{self.client.api}/chats/channels/{self.channel_url}",
             headers = self.client.headers,
-            data = data)
+            data = data,
+            client = self.client)
 
     @property
     def type(self):
@@ -675,7 +724,7 @@ class ChatUser(objects.User):
                  id,
                  chat,
                  *args,
-                 client = mixin.ClientBase(),
+                 client = None,
                  sb_data = None,
                  **kwargs):
         super().__init__(id, client, *args, **kwargs)
@@ -712,7 +761,8 @@ class ChatUser(objects.User):
             f"{self.client.api}/chats/channels/{self.chat.channel_url}/kicked_members",
             data = data,
             headers = self.client.headers,
-            errors = errors)
+            errors = errors,
+            client = self.client)
 
         return self
 
@@ -1,6 +1,7 @@
 import requests, json
 
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from ifunny import objects
 from ifunny.util import methods, exceptions
@@ -21,6 +22,8 @@ class User(mixin.ObjectMixin):
     :type data: dict
     :type paginated_size: int
     """
+    _cache_type = "user"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._chat_url = None
@@ -43,7 +46,8 @@ class User(mixin.ObjectMixin):
             self.headers,
             limit = limit,
             prev = prev,
-            next = next)
+            next = next,
+            client = self.client)
 
         items = [
             Post(item["id"], client = self.client, data = item)
@@ -60,7 +64,8 @@ class User(mixin.ObjectMixin):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self.client)
 
         items = [
             User(item["id"], client = self.client, data = item)
@@ -77,7 +82,8 @@ class User(mixin.ObjectMixin):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self.client)
 
         items = [
             User(item["id"], client = self.client, data = item)
@@ -92,7 +98,8 @@ class User(mixin.ObjectMixin):
                                       self.headers,
                                       limit = None,
                                       prev = None,
-                                      next = None)
+                                      next = None,
+                                      client = self.client)
 
         items = [
             objects.Ban(item["id"],
@@ -106,9 +113,10 @@ class User(mixin.ObjectMixin):
     # actions
 
     @classmethod
-    def by_nick(cls, nick, client = mixin.ClientBase(), **kwargs):
+    def by_nick(cls, nick, client = None, **kwargs):
         """
         Get a user from their nick.
+        Nicks are remembered by the client for ``ClientBase.nick_ttl`` seconds, so that asking again does not make a request
 
         :param nick: nick of the user to query. If this user does not exist, nothing will be returned
         :param client: the Client to bind the returned user object to
@@ -119,15 +127,26 @@ class User(mixin.ObjectMixin):
         :returns: A User with a given nick, if they exist
         :rtype: User, or None
         """
+        client = client if client else mixin.default_client()
         errors = {404: {"raisable": exceptions.NotFound}}
+        id, data = client._nick_user(nick)
+
+        if id:
+            data = {**data} if data is not None else None
+            return cls(id, client = client, data = data, **kwargs)
 
         try:
             data = methods.request("get",
                                    f"{client.api}/users/by_nick/{nick}",
                                    headers = client.headers,
-                                   errors = errors)["data"]
+                                   errors = errors,
+                                   client = client)["data"]
+
+            user = cls(data["id"], client = client, data = data, **kwargs)
+            client._remember_nick(nick, user.id, {**data})
+            cls._cache_many(client, [user])
 
-            return cls(data["id"], client = client, data = data, **kwargs)
+            return user
 
         except exceptions.NotFound:
             return None
@@ -141,7 +160,8 @@ class User(mixin.ObjectMixin):
         """
         methods.request("put",
                         f"{self._url}/subscribers",
-                        headers = self.headers)
+                        headers = self.headers,
+                        client = self.client)
 
         return self.fresh
 
@@ -154,7 +174,8 @@ class User(mixin.ObjectMixin):
         """
         methods.request("delete",
                         f"{self._url}/subscribers",
-                        headers = self.headers)
+                        headers = self.headers,
+                        client = self.client)
 
         return self.fresh
 
@@ -183,7 +204,8 @@ class User(mixin.ObjectMixin):
                             f"{self.client.api}/users/my/blocked/{self.id}",
                             params = params,
                             headers = self.headers,
-                            errors = errors)
+                            errors = errors,
+                            client = self.client)
 
         except exceptions.Forbidden:
             pass
@@ -206,7 +228,8 @@ class User(mixin.ObjectMixin):
                             f"{self.client.api}/users/my/blocked/{self.id}",
                             params = params,
                             headers = self.headers,
-                            errors = errors)
+                            errors = errors,
+                            client = self.client)
 
         except exceptions.Forbidden:
             pass
@@ -240,7 +263,8 @@ class User(mixin.ObjectMixin):
         methods.request("put",
                         f"{self._url}/abuses",
                         headers = self.headers,
-                        params = params)
+                        params = params,
+                        client = self.client)
 
         return self.fresh
 
@@ -254,7 +278,8 @@ class User(mixin.ObjectMixin):
 
         methods.request("put",
                         f"{self._url}/updates_subscribers",
-                        headers = self.headers)
+                        headers = self.headers,
+                        client = self.client)
 
         return self.fresh
 
@@ -267,7 +292,8 @@ class User(mixin.ObjectMixin):
         """
         methods.request("delete",
                         f"{self._url}/updates_subscribers",
-                        headers = self.headers)
+                        headers = self.headers,
+                        client = self.client)
 
         return self.fresh
 
@@ -291,9 +317,11 @@ class User(mixin.ObjectMixin):
         if not self.client.nick_is_available(value):
             raise exceptions.Unavailable(f"Nick {value} is taken")
 
-        response = requests.put(f"{self.client.api}/account",
+        response = methods.send("put",
+                                f"{self.client.api}/account",
                                 data = data,
-                                headers = self.headers)
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             error = response.json()["error"]
@@ -306,6 +334,11 @@ class User(mixin.ObjectMixin):
 
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
 
+        handler = getattr(self.client, "handler", None)
+
+        if handler:
+            handler.forget_self()
+
         return self.fresh
 
     def set_private(self, value):
@@ -326,9 +359,11 @@ class User(mixin.ObjectMixin):
             "is_private": int(bool(value))
         }
 
-        response = requests.put(f"{self.client.api}/account",
+        response = methods.send("put",
+                                f"{self.client.api}/account",
                                 data = data,
-                                headers = self.headers)
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -353,9 +388,11 @@ class User(mixin.ObjectMixin):
             "is_private": int(self.is_private)
         }
 
-        response = requests.put(f"{self.client.api}/account",
+        response = methods.send("put",
+                                f"{self.client.api}/account",
                                 data = data,
-                                headers = self.headers)
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -614,9 +651,11 @@ class User(mixin.ObjectMixin):
         if not self._chat_url:
             data = {"chat_type": "chat", "users": self.id}
 
-            response = requests.post(f"{self.client.api}/chats",
-                                     headers = self.headers,
-                                     data = data)
+            response = methods.send("post",
+                                    f"{self.client.api}/chats",
+                                    headers = self.headers,
+                                    data = data,
+                                    client = self.client)
 
             self._chat_url = response.json()["data"].get("chatUrl")
 
@@ -732,6 +771,8 @@ class Post(mixin.ObjectMixin):
     :type data: dict
     :type paginated_size: int
     """
+    _cache_type = "post"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._url = f"{self.client.api}/content/{self.id}"
@@ -749,7 +790,8 @@ class Post(mixin.ObjectMixin):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self.client)
 
         items = [
             User(item["id"], client = self.client, data = item)
@@ -766,13 +808,16 @@ class Post(mixin.ObjectMixin):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self.client)
 
         items = [
             Comment(item["id"], client = self.client, data = item, post = self)
             for item in data["items"]
         ]
 
+        self._cache_many(self.client, items)
+
         return methods.paginated_format(data, items)
 
     # public methods
@@ -824,9 +869,11 @@ class Post(mixin.ObjectMixin):
 
             data["content"] = post.id
 
-        response = requests.post(f"{self._url}/comments",
-                                 data = data,
-                                 headers = self.headers)
+        response = methods.send("post",
+                                f"{self._url}/comments",
+                                data = data,
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -849,7 +896,13 @@ class Post(mixin.ObjectMixin):
         :returns: self
         :rtype: Post
         """
-        response = requests.put(f"{self._url}/smiles", headers = self.headers)
+        response = methods.send("put",
+                                f"{self._url}/smiles",
+                                headers = self.headers,
+                                client = self.client)
+
+        if response.status_code == 429:
+            raise exceptions.RateLimit(response.text)
 
         if response.status_code != 200 and response.status_code != 403:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -863,8 +916,13 @@ class Post(mixin.ObjectMixin):
         :returns: self
         :rtype: Post
         """
-        response = requests.delete(f"{self._url}/smiles",
-                                   headers = self.headers)
+        response = methods.send("delete",
+                                f"{self._url}/smiles",
+                                headers = self.headers,
+                                client = self.client)
+
+        if response.status_code == 429:
+            raise exceptions.RateLimit(response.text)
 
         if response.status_code != 200 and response.status_code != 403:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -878,8 +936,13 @@ class Post(mixin.ObjectMixin):
         :returns: self
         :rtype: Post
         """
-        response = requests.put(f"{self._url}/unsmiles",
-                                headers = self.headers)
+        response = methods.send("put",
+                                f"{self._url}/unsmiles",
+                                headers = self.headers,
+                                client = self.client)
+
+        if response.status_code == 429:
+            raise exceptions.RateLimit(response.text)
 
         if response.status_code != 200 and response.status_code != 403:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -893,8 +956,13 @@ class Post(mixin.ObjectMixin):
         :returns: self
         :rtype: Post
         """
-        response = requests.delete(f"{self._url}/unsmiles",
-                                   headers = self.headers)
+        response = methods.send("delete",
+                                f"{self._url}/unsmiles",
+                                headers = self.headers,
+                                client = self.client)
+
+        if response.status_code == 429:
+            raise exceptions.RateLimit(response.text)
 
         if response.status_code != 200 and response.status_code != 403:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -908,12 +976,17 @@ class Post(mixin.ObjectMixin):
         :returns: republished instance of this post, or None if already republished
         :rtype: Post, or None
         """
-        response = requests.post(f"{self._url}/republished",
-                                 headers = self.headers)
+        response = methods.send("post",
+                                f"{self._url}/republished",
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code == 403:
             return None
 
+        if response.status_code == 429:
+            raise exceptions.RateLimit(response.text)
+
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
 
@@ -928,12 +1001,17 @@ class Post(mixin.ObjectMixin):
         :returns: self
         :rtype: Post
         """
-        response = requests.delete(f"{self._url}/republished",
-                                   headers = self.headers)
+        response = methods.send("delete",
+                                f"{self._url}/republished",
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code == 403:
             return self
 
+        if response.status_code == 429:
+            raise exceptions.RateLimit(response.text)
+
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
 
@@ -967,9 +1045,11 @@ class Post(mixin.ObjectMixin):
 
         params = {"type": type}
 
-        response = requests.put(f"{self._url}/abuses",
+        response = methods.send("put",
+                                f"{self._url}/abuses",
                                 headers = self.headers,
-                                params = params)
+                                params = params,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1001,9 +1081,11 @@ class Post(mixin.ObjectMixin):
 
         data = f"tags=[{tags}]"
 
-        response = requests.put(f"{self._url}/tags",
+        response = methods.send("put",
+                                f"{self._url}/tags",
                                 headers = self.headers,
-                                data = data)
+                                data = data,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1019,7 +1101,10 @@ class Post(mixin.ObjectMixin):
         :rtype: Post
         """
 
-        response = requests.delete(self._url, headers = self.headers)
+        response = methods.send("delete",
+                                self._url,
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1036,7 +1121,10 @@ class Post(mixin.ObjectMixin):
         :rtype: Post
         """
 
-        response = requests.put(f"{self._url}/pinned", headers = self.headers)
+        response = methods.send("put",
+                                f"{self._url}/pinned",
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1052,8 +1140,10 @@ class Post(mixin.ObjectMixin):
         :rtype: Post
         """
 
-        response = requests.delete(f"{self._url}/pinned",
-                                   headers = self.headers)
+        response = methods.send("delete",
+                                f"{self._url}/pinned",
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1077,9 +1167,11 @@ class Post(mixin.ObjectMixin):
 
         data = {"publish_at": int(schedule)}
 
-        response = requests.patch(f"{self._url}",
-                                  data = data,
-                                  headers = self.headers)
+        response = methods.send("patch",
+                                f"{self._url}",
+                                data = data,
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1106,9 +1198,11 @@ class Post(mixin.ObjectMixin):
 
         data = {"visibility": visibility, "tags": json.dumps(self.tags)}
 
-        response = requests.patch(f"{self._url}",
-                                  data = data,
-                                  headers = self.headers)
+        response = methods.send("patch",
+                                f"{self._url}",
+                                data = data,
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1122,8 +1216,132 @@ class Post(mixin.ObjectMixin):
         :returns: was this marked as read?
         :rtype: bool
         """
-        return requests.put(f"{self.api}/reads/{self.id}",
-                            headers = self.headers).status_code == 200
+        return methods.send("put",
+                            f"{self.api}/reads/{self.id}",
+                            headers = self.headers,
+                            client = self.client).status_code == 200
+
+    def crawl_comments(self,
+                       workers = 4,
+                       order = "thread",
+                       checkpoint = None,
+                       limit = None,
+                       retries = 5):
+        """
+        Get every comment and reply on this post, requesting the replies of many roots at once.
+        Requests go through the client's rate budget, and are tried again with backoff when iFunny says that we are going too fast.
+
+        In ``thread`` order, roots keep the order of ``Post.comments`` and each one is followed by its replies.
+        In ``arrival`` order, the roots of a page come first and replies follow as soon as they arrive.
+
+        To resume a crawl that failed, call this again with the same ``checkpoint``. It is updated as comments are yielded,
+        and a crawl that resumes from it starts at the page of roots it stopped on, skipping roots that were already finished
+
+        :param workers: most number of requests for replies to make at once
+        :param order: order to yield comments in. Can be one of (``thread``, ``arrival``)
+        :param checkpoint: progress of the crawl, to resume from and to update. Can be an empty dict to start
+        :param limit: number of roots to request at a time
+        :param retries: most number of times to try a rate limited request again
+
+        :type workers: int
+        :type order: str
+        :type checkpoint: dict
+        :type limit: int
+        :type retries: int
+
+        :returns: generator iterating every comment and reply
+        :rtype: generator<Comment>
+        """
+        if order not in {"thread", "arrival"}:
+            raise ValueError(f"order cannot be {order}")
+
+        checkpoint = checkpoint if checkpoint is not None else {}
+        checkpoint.setdefault("next", None)
+        checkpoint.setdefault("done", [])
+        limit = limit if limit else self.paginated_size
+
+        def roots(next):
+            return methods.rate_limited(self._comments_paginated,
+                                        limit = limit,
+                                        next = next,
+                                        retries = retries)
+
+        def replies(root):
+            items = []
+            next = None
+
+            while True:
+                page = methods.rate_limited(root._replies_paginated,
+                                            next = next,
+                                            retries = retries)
+                items.extend(page["items"])
+                next = page["paging"]["next"]
+
+                if not next:
+                    return items
+
+        def finish(root):
+            checkpoint["done"].append(root.id)
+
+        pool = ThreadPoolExecutor(max_workers = workers)
+        futures = []
+        page = None
+
+        try:
+            page = pool.submit(roots, checkpoint["next"])
+
+            while page:
+                current = page.result()
+                next = current["paging"]["next"]
+                page = pool.submit(roots, next) if next else None
+                done = set(checkpoint["done"])
+                pending = []
+
+                for root in current["items"]:
+                    if root.id in done:
+                        continue
+
+                    future = None
+
+                    if root.get("num", {}).get("replies"):
+                        future = pool.submit(replies, root)
+                        futures.append(future)
+
+                    pending.append((root, future))
+
+                if order == "thread":
+                    for root, future in pending:
+                        yield root
+
+                        if future:
+                            yield from future.result()
+
+                        finish(root)
+
+                else:
+                    waiting = {}
+
+                    for root, future in pending:
+                        yield root
+
+                        if future:
+                            waiting[future] = root
+                        else:
+                            finish(root)
+
+                    for future in as_completed(waiting):
+                        yield from future.result()
+                        finish(waiting[future])
+
+                checkpoint["next"] = next
+                checkpoint["done"] = []
+
+        finally:
+            for future in [page, *futures]:
+                if future:
+                    future.cancel()
+
+            pool.shutdown(wait = False)
 
     # public generators
 
@@ -1145,6 +1363,14 @@ class Post(mixin.ObjectMixin):
         """
         return methods.paginated_generator(self._comments_paginated)
 
+    @property
+    def comment_tree(self):
+        """
+        :returns: every comment on this post, indexed so that threads can be walked without more requests
+        :rtype: CommentTree
+        """
+        return CommentTree(self)
+
     # private properties
 
     @property
@@ -1459,10 +1685,14 @@ class Comment(mixin.ObjectMixin):
     :type data: dict
     :type paginated_size: int
     """
+    _cache_type = "comment"
+
     def __init__(self, *args, post = None, **kwargs):
         super().__init__(*args, **kwargs)
         self._post = post
         self.__cid = None
+        self.__parent = None
+        self.__root = None
 
         if self._post == None and self._object_data_payload["cid"] == None:
             raise ValueError("This needs a post")
@@ -1474,13 +1704,19 @@ class Comment(mixin.ObjectMixin):
     @property
     def _object_data(self):
         if self._update or self._object_data_payload is None:
+            cached = None if self._update else self._cache_load()
             self._update = False
-            try:
-                response = methods.request("get",
-                                           self._url,
-                                           headers = self.headers)
 
-                self._object_data_payload = response["data"]["comment"]
+            if cached is not None:
+                self._object_data_payload = cached
+                return self._object_data_payload
+
+            try:
+                self._object_data_payload = self._fetch(
+                    self.headers,
+                    lambda response: methods.parse_response(response)["data"][
+                        "comment"],
+                    client = self.client)
 
             except exceptions.NotFound:
                 if self._object_data_payload:
@@ -1504,19 +1740,105 @@ class Comment(mixin.ObjectMixin):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self.client)
+
+        post = self._post if isinstance(self._post, Post) else self.cid
 
         items = [
-            Comment(item["id"],
-                    client = self.client,
-                    data = item,
-                    post = self.cid) for item in data["items"]
+            Comment(item["id"], client = self.client, data = item, post = post)
+            for item in data["items"]
         ]
 
+        for item in self.resolve(items, fetch = False):
+            parent = item._parent_id
+            root = item._root_id
+            item._relate(parent = self if parent == self.id else None,
+                         root = self if root == self.id else None)
+
+        self._cache_many(self.client, items)
+
         return methods.paginated_format(data, items)
 
+    def _relate(self, parent = None, root = None):
+        """
+        Remember the parent and root of this comment, so that they are not requested again
+        """
+        if parent is not None:
+            self.__parent = parent
+
+        if root is not None:
+            self.__root = root
+
+    # ids are read from the payload directly, as get requests the comment again for a missing key,
+    # and replies do not always have a parent_comm_id
+
+    @property
+    def _root_id(self):
+        return self._object_data.get("root_comm_id")
+
+    @property
+    def _parent_id(self):
+        data = self._object_data
+
+        if data.get("parent_comm_id"):
+            return data["parent_comm_id"]
+
+        return data.get("root_comm_id")
+
     # public methods
 
+    @staticmethod
+    def resolve(comments, fetch = True, workers = 4):
+        """
+        Link many comments to their parents and roots at once.
+        Parents and roots that are among ``comments`` are used as is, and each one that is not is requested once,
+        no matter how many comments share it
+
+        :param comments: comments to resolve
+        :param fetch: request parents and roots that are not among ``comments``? If False, they are left to be requested when accessed
+        :param workers: most number of requests to make at once
+
+        :type comments: iterable<Comment>
+        :type fetch: bool
+        :type workers: int
+
+        :returns: the comments
+        :rtype: list<Comment>
+        """
+        comments = [*comments]
+        known = {comment.id: comment for comment in comments}
+        missing = {}
+
+        for comment in comments:
+            if comment.is_root:
+                continue
+
+            ids = {comment._parent_id, comment._root_id}
+
+            for id in ids:
+                if id and id not in known and id not in missing:
+                    missing[id] = Comment(id,
+                                          client = comment.client,
+                                          post = comment.post)
+
+        if fetch and missing:
+            with ThreadPoolExecutor(max_workers = workers) as pool:
+                [*pool.map(lambda comment: comment._object_data,
+                           missing.values())]
+
+        everything = {**missing, **known}
+
+        for comment in comments:
+            if comment.is_root:
+                continue
+
+            comment._relate(
+                parent = everything.get(comment._parent_id),
+                root = everything.get(comment._root_id))
+
+        return comments
+
     def reply(self, text = "", post = None, user_mentions = None):
         """
         Reply to a comment.
@@ -1569,7 +1891,8 @@ class Comment(mixin.ObjectMixin):
         response = methods.request("post",
                                    f"{self._url}/replies",
                                    data = data,
-                                   headers = self.headers)
+                                   headers = self.headers,
+                                   client = self.client)
 
         if response["data"]["id"] == "000000000000000000000000":
             raise exceptions.RateLimit(
@@ -1590,8 +1913,10 @@ class Comment(mixin.ObjectMixin):
         :rtype: Comment
         """
 
-        response = requests.delete(f"{self._absolute_url}/{self.id}",
-                                   headers = self.headers)
+        response = methods.send("delete",
+                                f"{self._absolute_url}/{self.id}",
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code == 429:
             raise exceptions.RateLimit(
@@ -1609,7 +1934,10 @@ class Comment(mixin.ObjectMixin):
         :returns: self
         :rtype: Comment
         """
-        methods.request("put", f"{self._url}/smiles", headers = self.headers)
+        methods.request("put",
+                        f"{self._url}/smiles",
+                        headers = self.headers,
+                        client = self.client)
 
         return self.fresh
 
@@ -1623,7 +1951,8 @@ class Comment(mixin.ObjectMixin):
         try:
             methods.request("delete",
                             f"{self._url}/smiles",
-                            headers = self.headers)
+                            headers = self.headers,
+                            client = self.client)
 
         except exceptions.RepeatedAction:
             pass
@@ -1640,7 +1969,8 @@ class Comment(mixin.ObjectMixin):
         try:
             methods.request("put",
                             f"{self._url}/unsmiles",
-                            headers = self.headers)
+                            headers = self.headers,
+                            client = self.client)
 
         except exceptions.RepeatedAction:
             pass
@@ -1657,7 +1987,8 @@ class Comment(mixin.ObjectMixin):
         try:
             methods.request("delete",
                             f"{self._url}/unsmiles",
-                            headers = self.headers)
+                            headers = self.headers,
+                            client = self.client)
 
         except exceptions.RepeatedAction:
             pass
@@ -1692,7 +2023,8 @@ class Comment(mixin.ObjectMixin):
         methods.request("put",
                         f"{self._url}/abuses",
                         headers = self.headers,
-                        params = params)
+                        params = params,
+                        client = self.client)
 
         return self.fresh
 
@@ -1709,8 +2041,8 @@ class Comment(mixin.ObjectMixin):
                 yield x
         else:
             for _comment in self.root.replies:
-                if _comment.depth > self.depth and _comment.get(
-                        "parent_comm_id") == self.id:
+                if (_comment.depth > self.depth
+                        and _comment._parent_id == self.id):
                     yield _comment
 
     @property
@@ -1787,7 +2119,10 @@ class Comment(mixin.ObjectMixin):
         :returns: the post that this comment is on
         :rtype: Post
         """
-        return Post(self.cid, client = self.client)
+        if not isinstance(self._post, Post):
+            self._post = Post(self.cid, client = self.client)
+
+        return self._post
 
     @property
     def parent(self):
@@ -1798,9 +2133,12 @@ class Comment(mixin.ObjectMixin):
         if self.is_root:
             return None
 
-        return Comment(self.get("parent_comm_id"),
-                       client = self.client,
-                       post = self.cid)
+        if self.__parent is None:
+            self.__parent = Comment(self._parent_id,
+                                    client = self.client,
+                                    post = self.post)
+
+        return self.__parent
 
     @property
     def root(self):
@@ -1811,9 +2149,12 @@ class Comment(mixin.ObjectMixin):
         if self.is_root:
             return self
 
-        return Comment(self.get("root_comm_id"),
-                       client = self.client,
-                       post = self.cid)
+        if self.__root is None:
+            self.__root = Comment(self._root_id,
+                                  client = self.client,
+                                  post = self.post)
+
+        return self.__root
 
     @property
     def smile_count(self):
@@ -1925,6 +2266,240 @@ class Comment(mixin.ObjectMixin):
         return self.get("is_unsmiled")
 
 
+class CommentTree:
+    """
+    Every comment on a post, indexed by id and by parent so that a thread can be walked without more requests.
+    Root comments are requested once, and the replies of each root that has any are requested once
+
+    :param post: the post to get comments from. Can be a post id or a Post object
+    :param client: Client that the comments belong to. If None, the client of ``post`` is used
+    :param comments: comments to build the tree from instead of requesting them
+
+    :type post: Post or str
+    :type client: Client
+    :type comments: iterable<Comment>
+    """
+    def __init__(self, post, client = None, comments = None):
+        if type(post) is str:
+            post = Post(post, client = client)
+
+        self.post = post
+        self.client = client if client else post.client
+
+        self._comments = {}
+        self._children = {}
+        self._roots = []
+
+        if comments is None:
+            self.refresh()
+        else:
+            for comment in comments:
+                self.add(comment)
+
+    def __len__(self):
+        return len(self._comments)
+
+    def __iter__(self):
+        for root in self.roots:
+            yield root
+
+            for comment in self.descendants(root):
+                yield comment
+
+    def __contains__(self, comment):
+        return self._id(comment) in self._comments
+
+    def __getitem__(self, id):
+        return self._comments[self._id(id)]
+
+    # private methods
+
+    def _id(self, comment):
+        return comment if type(comment) is str else comment.id
+
+    def _parent_id(self, comment):
+        if comment.is_root:
+            return None
+
+        return comment._parent_id
+
+    # public methods
+
+    def refresh(self):
+        """
+        Request every comment on the post again
+
+        :returns: self
+        :rtype: CommentTree
+        """
+        self._comments = {}
+        self._children = {}
+        self._roots = []
+
+        for root in self.post.comments:
+            self.add(root)
+
+            if not root.get("num", {}).get("replies"):
+                continue
+
+            for reply in methods.paginated_generator(root._replies_paginated):
+                self.add(reply)
+
+        return self
+
+    def add(self, comment):
+        """
+        Add a comment to the tree, or replace one with the same id
+
+        :param comment: comment to add
+
+        :type comment: Comment
+        """
+        parent = self._parent_id(comment)
+        siblings = self._children.setdefault(
+            parent, []) if parent else self._roots
+
+        if comment.id not in self._comments:
+            siblings.append(comment.id)
+
+        self._comments[comment.id] = comment
+
+        if parent:
+            comment._relate(
+                parent = self._comments.get(parent),
+                root = self._comments.get(comment._root_id))
+
+    def get(self, id, default = None):
+        """
+        :param id: id of the comment, or the Comment itself
+        :param default: value to return if the comment is not in this tree
+
+        :type id: str or Comment
+
+        :returns: the comment in this tree with this id
+        :rtype: Comment, or default
+        """
+        return self._comments.get(self._id(id), default)
+
+    def parent(self, comment):
+        """
+        :param comment: the comment, or its id
+
+        :type comment: Comment or str
+
+        :returns: direct parent of this comment, or None for root comments
+        :rtype: Comment
+        """
+        comment = self[comment]
+        parent = self._parent_id(comment)
+
+        if parent is None:
+            return None
+
+        if parent in self._comments:
+            return self._comments[parent]
+
+        return comment.parent
+
+    def root(self, comment):
+        """
+        :param comment: the comment, or its id
+
+        :type comment: Comment or str
+
+        :returns: this comments root parent, or itself if it is a root
+        :rtype: Comment
+        """
+        comment = self[comment]
+
+        if comment.is_root:
+            return comment
+
+        if comment._root_id in self._comments:
+            return self._comments[comment._root_id]
+
+        return comment.root
+
+    def children(self, comment):
+        """
+        :param comment: the comment, or its id
+
+        :type comment: Comment or str
+
+        :returns: direct children of this comment
+        :rtype: list<Comment>
+        """
+        return [
+            self._comments[id]
+            for id in self._children.get(self._id(comment), [])
+        ]
+
+    def siblings(self, comment):
+        """
+        :param comment: the comment, or its id
+
+        :type comment: Comment or str
+
+        :returns: comments that share a parent with this comment, including itself
+        :rtype: list<Comment>
+        """
+        parent = self._parent_id(self[comment])
+
+        if parent is None:
+            return self.roots
+
+        return self.children(parent)
+
+    def descendants(self, comment):
+        """
+        :param comment: the comment, or its id
+
+        :type comment: Comment or str
+
+        :returns: generator iterating every reply under this comment, depth first
+        :rtype: generator<Comment>
+        """
+        stack = [*reversed(self._children.get(self._id(comment), []))]
+
+        while stack:
+            id = stack.pop()
+            yield self._comments[id]
+            stack.extend(reversed(self._children.get(id, [])))
+
+    def depth(self, comment):
+        """
+        :param comment: the comment, or its id
+
+        :type comment: Comment or str
+
+        :returns: the depth of this comment, counting parents in this tree
+        :rtype: int
+        """
+        comment = self[comment]
+        depth = 0
+
+        while not comment.is_root:
+            depth += 1
+            parent = self._comments.get(self._parent_id(comment))
+
+            if parent is None:
+                return depth - 1 + comment.depth
+
+            comment = parent
+
+        return depth
+
+    # public properties
+
+    @property
+    def roots(self):
+        """
+        :returns: root comments in the order they were recieved
+        :rtype: list<Comment>
+        """
+        return [self._comments[id] for id in self._roots]
+
+
 class Notification:
     """
     General purpose notification object.
@@ -1936,12 +2511,34 @@ class Notification:
     :type data: dict
     :type client: Client
     """
-    def __init__(self, data, client = mixin.ClientBase()):
-        self.client = client
+    def __init__(self, data, client = None):
+        self.client = client if client else mixin.default_client()
         self.type = data["type"]
 
         self.__data = data
 
+    def __eq__(self, other):
+        return self.id == getattr(other, "id", other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def id(self):
+        """
+        :returns: identity of this notification. If iFunny does not give it an id, one is made from its type, date, user and content
+        :rtype: str
+        """
+        if self.__data.get("id"):
+            return self.__data["id"]
+
+        user = self.__data.get("user") or {}
+        content = self.__data.get("content") or {}
+
+        return ":".join(
+            str(part) for part in (self.type, self.created_at,
+                                   user.get("id"), content.get("id")))
+
     @property
     def user(self):
         """
@@ -2013,7 +2610,7 @@ class Notification:
 
 
 class Channel(mixin.ObjectMixin):
-    def __init__(self, id, client = mixin.ClientBase(), data = {}):
+    def __init__(self, id, client = None, data = {}):
         """
         Object for ifunny explore channels.
 
@@ -2038,7 +2635,8 @@ class Channel(mixin.ObjectMixin):
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = prev)
+                                      next = prev,
+                                      client = self.client)
 
         items = [
             Post(item["id"], client = self.client, data = item)
@@ -2077,38 +2675,51 @@ class Digest(mixin.ObjectMixin):
     :type data: dict
     :type paginated_size: int
     """
+    _cache_type = "digest"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._url = f"{self.client.api}/digests/{self.id}"
         self._comments = False
         self._contents = False
 
+    @property
+    def _params(self):
+        return {
+            "contents": int(self._contents),
+            "comments": int(self._comments)
+        }
+
+    @property
+    def _cache_key(self):
+        return f"{self._url}?contents={self._contents:d}&comments={self._comments:d}"
+
     @property
     def _object_data(self):
         if self._update or self._object_data_payload is None:
+            cached = None if self._update else self._cache_load()
             self._update = False
 
-            params = {
-                "contents": int(self._contents),
-                "comments": int(self._comments)
-            }
-
-            response = requests.get(self._url,
-                                    headers = self.headers,
-                                    params = params)
-
-            if response.status_code == 403:
-                self._object_data_payload = {}
+            if cached is not None:
+                self._object_data_payload = cached
                 return self._object_data_payload
 
-            try:
-                self._object_data_payload = response.json()["data"]
-            except KeyError:
-                raise exceptions.BadAPIResponse(
-                    f"{response.url}, {response.text}")
+            self._object_data_payload = self._fetch(self.headers,
+                                                    self._parse,
+                                                    params = self._params,
+                                                    client = self.client)
 
         return self._object_data_payload
 
+    def _parse(self, response):
+        if response.status_code == 403:
+            return {}
+
+        try:
+            return response.json()["data"]
+        except KeyError:
+            raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
+
     def __repr__(self):
         return self.title
 
@@ -2130,8 +2741,10 @@ class Digest(mixin.ObjectMixin):
         :rtype: Digest
         """
         count = count if count else self.unread_count
-        response = requests.post(f"{self._url}/reads/{count}",
-                                 headers = self.headers)
+        response = methods.send("post",
+                                f"{self._url}/reads/{count}",
+                                headers = self.headers,
+                                client = self.client)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
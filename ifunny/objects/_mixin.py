@@ -1,12 +1,34 @@
 import json, requests, threading, os, time
 
 from random import random
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha1
 from base64 import b64encode
 from pathlib import Path
 
 from ifunny import objects
-from ifunny.util import methods, exceptions
+from ifunny.util import methods, exceptions, config
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def default_client():
+    """
+    Get the ClientBase shared by objects that are not given a client.
+    It is created the first time that it is needed, so that importing ifunny does not touch the disk
+
+    :returns: the shared default client
+    :rtype: ClientBase
+    """
+    global _default_client
+
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = ClientBase()
+
+    return _default_client
 
 
 class ClientBase:
@@ -16,9 +38,11 @@ class ClientBase:
 
     :param paginated_size: default number of elemets to request for each paginated data call
     :captcha_api_key: 2captcha api key to use for attempts at creating accounts
+    :param cache: persistent cache for object payloads, or None to always request them
 
     :type paginated_size: int
     :type captcha_api_key: str
+    :type cache: ifunny.util.cache.ObjectCache
     """
     api = "https://api.ifunny.mobi/v4"
     sendbird_api = "https://api-us-1.sendbird.com/v3"
@@ -27,11 +51,18 @@ class ClientBase:
     __client_id = "MsOIJ39Q28"
     __client_secret = "PTDc3H8a)Vi=UYap"
     __google_code = "6LflIwgTAAAAAElWMFEVgr9zs2UpH0eiFsVN_KfF"
+    nick_ttl = 600
+    nick_cache_size = 4096
 
-    def __init__(self, paginated_size = 25, captcha_api_key = None):
+    def __init__(self,
+                 paginated_size = 25,
+                 captcha_api_key = None,
+                 cache = None):
         # locks
         self._sendbird_lock = threading.Lock()
         self._config_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._nicks_lock = threading.Lock()
 
         # api info
         self.captcha_api_key = captcha_api_key
@@ -41,33 +72,109 @@ class ClientBase:
         # cache file
         self._home_path = f"{Path.home()}/.ifunnypy"
         self._cache_path = f"{self._home_path}/config.json"
+        self._config_store = config.store(self._home_path)
 
         # attached objects
         self.paginated_size = paginated_size
+        self.cache = cache
+        self.session = None
+        self.rate_budget = None
+        self.pending = 0
+        self._nicks = {}
+        self._counters = None
 
-        if not os.path.isdir(self._home_path):
-            os.mkdir(self._home_path)
+        self._config = self._config_store.load()
+        self._config_seen = {**self._config}
 
-        try:
-            with open(self._cache_path) as stream:
-                self._config = json.load(stream)
+    # private methods
 
-        except (FileNotFoundError):
-            self._config = {}
-            self._update_config()
+    def _reauthenticate(self, authorization = None):
+        """
+        Called when a request made for this client is rejected with a ``401``
 
-    # private methods
+        :param authorization: Authorization header that the rejected request was sent with
 
-    def _update_config(self):
+        :type authorization: str
+
+        :returns: was a new token aquired, so that the request can be retried?
+        :rtype: bool
+        """
+        return False
+
+    def _validated(self):
+        """
+        Called when a request made for this client succeeds
+        """
+        return
+
+    def _nick_user(self, nick):
+        with self._nicks_lock:
+            id, data, expires = self._nicks.get(nick, (None, None, 0))
+
+        return (id, data) if expires > time.time() else (None, None)
+
+    def _remember_nick(self, nick, id, data = None):
+        now = time.time()
+
+        with self._nicks_lock:
+            self._nicks.pop(nick, None)
+
+            if len(self._nicks) >= self.nick_cache_size:
+                self._nicks = {
+                    key: value
+                    for key, value in self._nicks.items() if value[2] > now
+                }
+
+            while len(self._nicks) >= self.nick_cache_size:
+                del self._nicks[next(iter(self._nicks))]
+
+            self._nicks[nick] = (id, data, now + self.nick_ttl)
+
+    def _resolve(self, resolve, keys, workers):
         """
-        Update the config file with the internal config dict in a thread safe way
+        Resolve each unique key once and concurrently, and return results in the order of ``keys``.
+        A key that could not be resolved gets its exception in place of a result
         """
-        self._config_lock.acquire()
+        keys = [*keys]
+        unique = [*dict.fromkeys(keys)]
+
+        def attempt(key):
+            try:
+                return resolve(key)
+
+            except Exception as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            results = dict(zip(unique, pool.map(attempt, unique)))
+
+        return [results[key] for key in keys]
 
-        with open(self._cache_path, "w") as stream:
-            json.dump(self._config, stream)
+    def _begin_request(self):
+        if self.rate_budget:
+            self.rate_budget.acquire()
 
-        self._config_lock.release()
+        with self._pending_lock:
+            self.pending += 1
+
+    def _end_request(self):
+        with self._pending_lock:
+            self.pending -= 1
+
+    def _update_config(self):
+        """
+        Queue the changed keys of the internal config dict to be written to the config file.
+        Writes are coalesced, atomic, and locked against other processes
+        """
+        with self._config_lock:
+            changed = {
+                key: value
+                for key, value in self._config.items()
+                if self._config_seen.get(key) != value
+            }
+
+            self._config_seen = {**self._config}
+            self._config_store.update(changed)
 
     def _solve_captcha(self, url, timeout = 64):
         params = {
@@ -155,7 +262,8 @@ class ClientBase:
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self)
 
         items = [
             objects.Notification(item, client = self) for item in data["items"]
@@ -171,7 +279,8 @@ class ClientBase:
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self)
 
         items = [
             objects.Post(item["id"], client = self, data = item)
@@ -188,7 +297,8 @@ class ClientBase:
                                       limit = limit,
                                       prev = prev,
                                       next = next,
-                                      post = True)
+                                      post = True,
+                                      client = self)
 
         items = [
             objects.Post(item["id"], client = self, data = item)
@@ -204,7 +314,8 @@ class ClientBase:
                                       self.headers,
                                       limit = limit,
                                       prev = prev,
-                                      next = next)
+                                      next = next,
+                                      client = self)
 
         items = [
             objects.Post(item["id"], client = self, data = item)
@@ -220,7 +331,8 @@ class ClientBase:
                                       limit = limit,
                                       prev = prev,
                                       next = next,
-                                      ex_params = {"comments": 1})
+                                      ex_params = {"comments": 1},
+                                      client = self)
 
         nested = [item["items"] for item in data["items"]]
         data["items"] = [item for sublist in nested for item in sublist]
@@ -244,7 +356,8 @@ class ClientBase:
                                       limit = limit,
                                       prev = prev,
                                       next = next,
-                                      ex_params = {"tag": query})
+                                      ex_params = {"tag": query},
+                                      client = self)
 
         items = [
             objects.Post(item["id"], client = self, data = item)
@@ -265,7 +378,8 @@ class ClientBase:
                                       limit = limit,
                                       prev = prev,
                                       next = next,
-                                      ex_params = {"q": query})
+                                      ex_params = {"q": query},
+                                      client = self)
 
         items = [
             objects.User(item["id"], client = self, data = item)
@@ -286,7 +400,8 @@ class ClientBase:
                                       limit = limit,
                                       prev = prev,
                                       next = next,
-                                      ex_params = {"q": query})
+                                      ex_params = {"q": query},
+                                      client = self)
 
         items = [
             objects.Chat(item["channel_url"], self, data = item)
@@ -338,12 +453,16 @@ class ClientBase:
         """
         Mark featured feed as read (or viewed).
         """
-        response = requests.put(f"{self.api}/reads/all",
-                                headers = self.headers)
+        response = methods.send("put",
+                                f"{self.api}/reads/all",
+                                headers = self.headers,
+                                client = self)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
 
+        self.unread.fresh
+
     def email_is_available(self, email):
         """
         Check email availability
@@ -356,9 +475,11 @@ class ClientBase:
         """
         params = {"email": email}
 
-        response = requests.get(f"{self.api}/users/emails_available",
+        response = methods.send("get",
+                                f"{self.api}/users/emails_available",
                                 headers = self.headers,
-                                params = params)
+                                params = params,
+                                client = self)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -377,15 +498,61 @@ class ClientBase:
         """
         params = {"nick": nick}
 
-        response = requests.get(f"{self.api}/users/nicks_available",
+        response = methods.send("get",
+                                f"{self.api}/users/nicks_available",
                                 headers = self.headers,
-                                params = params)
+                                params = params,
+                                client = self)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
 
         return response.json()["data"]["available"]
 
+    def users_by_nick(self, nicks, workers = 8):
+        """
+        Get many users from their nicks at once.
+        Each nick is only requested once, and nicks that were resolved less than ``ClientBase.nick_ttl`` seconds ago are not requested at all
+
+        :param nicks: nicks of the users to get
+        :param workers: most number of requests to make at once
+
+        :type nicks: iterable<str>
+        :type workers: int
+
+        :returns: a User for each nick in the same order, None for nicks that do not exist, or the exception raised when getting it
+        :rtype: list<User, None, or Exception>
+        """
+        return self._resolve(
+            lambda nick: objects.User.by_nick(nick, client = self), nicks,
+            workers)
+
+    def users(self, ids, workers = 8):
+        """
+        Get many users from their ids at once, loading each unique user once
+
+        :param ids: ids of the users to get
+        :param workers: most number of requests to make at once
+
+        :type ids: iterable<str>
+        :type workers: int
+
+        :returns: a loaded User for each id in the same order, None for ids that do not exist, or the exception raised when getting it
+        :rtype: list<User, None, or Exception>
+        """
+        def load(id):
+            user = objects.User(id, client = self)
+
+            try:
+                user._object_data
+
+            except exceptions.NotFound:
+                return None
+
+            return user
+
+        return self._resolve(load, ids, workers)
+
     @property
     def notifications(self):
         """
@@ -454,7 +621,10 @@ class ClientBase:
         :returns: a list of channels featured in explore
         :rtype: list<Channel>
         """
-        response = requests.get(f"{self.api}/channels", headers = self.headers)
+        response = methods.send("get",
+                                f"{self.api}/channels",
+                                headers = self.headers,
+                                client = self)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -471,8 +641,10 @@ class ClientBase:
         :returns: a list of trending chats featured in explore
         :rtype: list<Chat>
         """
-        response = requests.get(f"{self.api}/chats/channels/trending",
-                                headers = self.headers)
+        response = methods.send("get",
+                                f"{self.api}/chats/channels/trending",
+                                headers = self.headers,
+                                client = self)
 
         if response.status_code != 200:
             raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -486,18 +658,24 @@ class ClientBase:
     def messenger_token(self):
         return None
 
+    @property
+    def unread(self):
+        """
+        :returns: snapshot of the unread counters of this client, that is requested at most once every ``Counters.ttl`` seconds
+        :rtype: Counters
+        """
+        if self._counters is None:
+            self._counters = objects.Counters(self)
+
+        return self._counters
+
     @property
     def counters(self):
         """
         :returns: ifunny unread counters
         :rtype: dict
         """
-        response = requests.get(f"{self.api}/counters", headers = self.headers)
-
-        if response.status_code != 200:
-            raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
-
-        return response.json().get("data")
+        return self.unread.data
 
     @property
     def unread_featured(self):
@@ -505,7 +683,7 @@ class ClientBase:
         :returns: unread featured posts
         :rtype: int
         """
-        return self.counters.get("featured", 0)
+        return self.unread.featured
 
     @property
     def unread_collective(self):
@@ -513,7 +691,7 @@ class ClientBase:
         :returns: unread collective posts
         :rtype: int
         """
-        return self.counters.get("collective", 0)
+        return self.unread.collective
 
     @property
     def unread_subscriptions(self):
@@ -521,7 +699,7 @@ class ClientBase:
         :returns: unread subscriptions posts
         :rtype: int
         """
-        return self.counters.get("subscriptions", 0)
+        return self.unread.subscriptions
 
     @property
     def unread_news(self):
@@ -529,7 +707,7 @@ class ClientBase:
         :returns: unread news posts
         :rtype: int
         """
-        return self.counters.get("news", 0)
+        return self.unread.news
 
 
 class ObjectMixin:
@@ -538,7 +716,7 @@ class ObjectMixin:
     Used to implement common methods
 
     :param id: id of the object
-    :param client: Client that the object belongs to
+    :param client: Client that the object belongs to. If None, the shared ``default_client()`` is used
     :param data: A data payload for the object to pull from before requests
     :param paginated_size: number of items to get for each paginated request. If above the call type's maximum, that will be used instead
 
@@ -548,17 +726,19 @@ class ObjectMixin:
     :type paginated_size: int
     """
     api = "https://api.ifunny.mobi/v4"
+    _cache_type = None
 
     def __init__(self,
                  id,
-                 client = ClientBase(),
+                 client = None,
                  data = None,
                  paginated_size = 30):
-        self.client = client
+        self.client = client if client else default_client()
         self.id = id
 
         self._object_data_payload = data
-        self._update = data is None
+        self._update = False
+        self._validators = {}
 
         self._url = None
 
@@ -576,16 +756,98 @@ class ObjectMixin:
     def __eq__(self, other):
         return self.id == other
 
+    def _cache_load(self):
+        """
+        Load this objects payload from the client cache, if it has a fresh one
+        """
+        if self.client.cache is None or not self._cache_type:
+            return None
+
+        return self.client.cache.get(self._cache_key, self._cache_type)
+
+    @staticmethod
+    def _cache_many(client, items):
+        """
+        Store the payloads of many objects (like the items of a paginated response) in the client cache in one transaction
+        """
+        if client.cache is None:
+            return
+
+        client.cache.set_many([
+            (item._cache_key, item._cache_type, item._object_data_payload)
+            for item in items
+            if item._cache_type and item._object_data_payload
+        ])
+
+    def _cache_store(self, payload):
+        """
+        Store this objects payload in the client cache, if there is one
+        """
+        if self.client.cache is None or not self._cache_type:
+            return
+
+        self.client.cache.set(self._cache_key, self._cache_type, payload,
+                              self._validators)
+
+    def _fetch(self, headers, parse, params = None, client = None):
+        """
+        Request this objects payload, revalidating the one that we already have (in memory or in the client cache) if possible.
+        If the server says that it has not changed, or sends an identical body, the old payload is kept as is
+
+        :param headers: headers to request with
+        :param parse: callable that takes a changed response and returns the payload
+        :param params: query parameters to request with
+        :param client: client to make the request on behalf of, if these are its iFunny headers
+
+        :returns: the payload of this object
+        :rtype: dict
+        """
+        stale, validators = self._object_data_payload, self._validators
+        cached = self.client.cache is not None and self._cache_type
+
+        if stale is None and cached:
+            stale, validators = self.client.cache.entry(
+                self._cache_key) or (None, {})
+
+        response, self._validators, changed = methods.revalidate(
+            self._url,
+            validators if stale is not None else {},
+            headers = headers,
+            params = params,
+            client = client)
+
+        if not changed:
+            if cached:
+                self.client.cache.touch(self._cache_key, self._validators)
+
+            return stale
+
+        payload = parse(response)
+
+        if payload:
+            self._cache_store(payload)
+
+        return payload
+
+    @property
+    def _cache_key(self):
+        return self._url
+
     @property
     def _object_data(self):
         if self._update or self._object_data_payload is None:
+            cached = None if self._update else self._cache_load()
             self._update = False
-            try:
-                response = methods.request("get",
-                                           self._url,
-                                           headers = self.headers)
 
-                self._object_data_payload = response["data"]
+            if cached is not None:
+                self._object_data_payload = cached
+                return self._object_data_payload
+
+            try:
+                self._object_data_payload = self._fetch(
+                    self.headers,
+                    lambda response: methods.parse_response(response)["data"],
+                    client = self.client)
 
             except exceptions.NotFound:
                 if self._object_data_payload:
@@ -636,7 +898,7 @@ class SendbirdMixin(ObjectMixin):
     """
     def __init__(self,
                  id,
-                 client = ClientBase(),
+                 client = None,
                  data = None,
                  paginated_size = 30):
         super().__init__(id,
@@ -647,22 +909,27 @@ class SendbirdMixin(ObjectMixin):
     @property
     def _object_data(self):
         if self._update or self._object_data_payload is None:
+            cached = None if self._update else self._cache_load()
+
+            if cached is not None:
+                self._object_data_payload = cached
+                return self._object_data_payload
+
             if not self.client.messenger_token:
                 raise exceptions.ChatNotActive(
                     "Chat must have been activated to get sendbird api token")
 
             self._update = False
-            response = requests.get(self._url,
-                                    headers = self.client.sendbird_headers)
+            self._object_data_payload = self._fetch(
+                self.client.sendbird_headers, self._parse)
 
-            if response.status_code == 403:
-                self._object_data_payload = {}
-                return self._object_data_payload
+        return self._object_data_payload
 
-            try:
-                self._object_data_payload = response.json()
-            except KeyError:
-                raise exceptions.BadAPIResponse(
-                    f"{response.url}, {response.text}")
+    def _parse(self, response):
+        if response.status_code == 403:
+            return {}
 
-        return self._object_data_payload
+        try:
+            return response.json()
+        except KeyError:
+            raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
@@ -1,5 +1,6 @@
-import requests
+import requests, threading, time
 from ifunny import objects
+from ifunny.util import methods, exceptions
 from ifunny.objects import _mixin as mixin
 
 
@@ -15,8 +16,8 @@ class Image:
     :type background: str
     :type client: Client
     """
-    def __init__(self, url, background = None, client = mixin.ClientBase()):
-        self.client = client
+    def __init__(self, url, background = None, client = None):
+        self.client = client if client else mixin.default_client()
         self.url = url
         self.background = background
 
@@ -41,7 +42,7 @@ class Rating:
     :type client: Client
     :type data: dict
     """
-    def __init__(self, user, client = mixin.ClientBase(), data = None):
+    def __init__(self, user, client = None, data = None):
         self.user = user
         self._object_data_payload = data
         self._update = False
@@ -149,6 +150,270 @@ class Rating:
         return self._max.get("points")
 
 
+class Counters:
+    """
+    Snapshot of the unread counters of a client.
+    Counters are requested at most once every ``ttl`` seconds, no matter how many of them are read.
+    A background poller can keep them up to date, polling faster while they are moving and slower while they are not,
+    and calling back only when they change
+
+    :param client: client whose counters these are
+    :param ttl: seconds that a snapshot is used for before it is requested again
+
+    :type client: Client
+    :type ttl: float
+    """
+    def __init__(self, client, ttl = 5):
+        self.client = client
+        self.ttl = ttl
+
+        self._object_data_payload = None
+        self._updated_at = 0
+        self._update = False
+        self._lock = threading.Lock()
+
+        self._callbacks = []
+        self._poller = None
+        self._stop = threading.Event()
+        self._subscribers = 0
+        self._owned = False
+
+    def __repr__(self):
+        return str(self._object_data)
+
+    def get(self, key, default = None):
+        return self._object_data.get(key, default)
+
+    # private methods
+
+    def _request(self):
+        response = methods.send("get",
+                                f"{self.client.api}/counters",
+                                headers = self.client.headers,
+                                client = self.client)
+
+        if response.status_code != 200:
+            raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
+
+        return response.json().get("data", {})
+
+    def _refresh(self):
+        """
+        Request the counters, and call back with what changed if anything did
+
+        :returns: changed counters, as {name: (old, new)}
+        :rtype: dict
+        """
+        with self._lock:
+            old = self._object_data_payload
+            new = self._request()
+            self._object_data_payload = new
+            self._updated_at = time.monotonic()
+            self._update = False
+
+        if old is None:
+            return {}
+
+        changes = {
+            key: (old.get(key), new.get(key))
+            for key in {*old, *new} if old.get(key) != new.get(key)
+        }
+
+        if changes:
+            for callback in [*self._callbacks]:
+                callback(self, changes)
+
+        return changes
+
+    def _poll(self, interval, min_interval, max_interval):
+        while not self._stop.wait(interval):
+            try:
+                changed = self._refresh()
+
+            except Exception:
+                interval = max_interval
+                continue
+
+            if changed:
+                interval = min_interval
+            else:
+                interval = min(max_interval, interval * 1.5)
+
+    @property
+    def _object_data(self):
+        if self._update or self.age >= self.ttl:
+            self._refresh()
+
+        return self._object_data_payload
+
+    # public methods
+
+    def on_change(self, callback):
+        """
+        Call something whenever the counters change.
+        Can be used as a decorator
+
+        :param callback: callable that takes this snapshot and the changed counters as {name: (old, new)}
+
+        :type callback: callable
+
+        :returns: callback
+        :rtype: callable
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def subscribe(self, callback, **kwargs):
+        """
+        Call something whenever the counters change, and poll in the background while anything is subscribed.
+        Keyword arguments are passed to ``start`` if polling is not already running
+
+        :param callback: callable that takes this snapshot and the changed counters as {name: (old, new)}
+
+        :type callback: callable
+
+        :returns: callback
+        :rtype: callable
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+            self._subscribers += 1
+
+            if self._poller and self._poller.is_alive():
+                return callback
+
+        self.start(**kwargs)
+        self._owned = True
+        return callback
+
+    def unsubscribe(self, callback):
+        """
+        Stop calling something that was subscribed.
+        Polling stops with the last subscriber, unless it was started with ``start``
+
+        :param callback: callable that was passed to ``subscribe``
+
+        :type callback: callable
+        """
+        with self._lock:
+            if callback not in self._callbacks:
+                return
+
+            self._callbacks.remove(callback)
+            self._subscribers -= 1
+            last = self._subscribers == 0 and self._owned
+
+        if last:
+            self.stop()
+
+    def start(self, interval = 5, min_interval = 2, max_interval = 60):
+        """
+        Start polling the counters in the background.
+        Polling speeds up to ``min_interval`` when the counters change, and slows down to ``max_interval`` while they do not
+
+        :param interval: seconds to wait before the first poll
+        :param min_interval: fewest seconds between polls
+        :param max_interval: most seconds between polls
+
+        :type interval: float
+        :type min_interval: float
+        :type max_interval: float
+
+        :returns: self
+        :rtype: Counters
+        """
+        self._owned = False
+
+        if self._poller and self._poller.is_alive():
+            return self
+
+        self._stop.clear()
+        self._poller = threading.Thread(target = self._poll,
+                                        args = (interval, min_interval,
+                                                max_interval),
+                                        daemon = True)
+        self._poller.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stop polling the counters
+
+        :returns: self
+        :rtype: Counters
+        """
+        self._stop.set()
+
+        if self._poller and self._poller is not threading.current_thread():
+            self._poller.join()
+
+        self._poller = None
+        return self
+
+    # public properties
+
+    @property
+    def fresh(self):
+        """
+        :returns: this object with the update flag set
+        :rtype: Counters
+        """
+        self._update = True
+        return self
+
+    @property
+    def data(self):
+        """
+        :returns: a copy of every counter
+        :rtype: dict
+        """
+        return {**self._object_data}
+
+    @property
+    def age(self):
+        """
+        :returns: seconds since the counters were last requested
+        :rtype: float
+        """
+        if self._object_data_payload is None:
+            return float("inf")
+
+        return time.monotonic() - self._updated_at
+
+    @property
+    def featured(self):
+        """
+        :returns: unread featured posts
+        :rtype: int
+        """
+        return self.get("featured", 0)
+
+    @property
+    def collective(self):
+        """
+        :returns: unread collective posts
+        :rtype: int
+        """
+        return self.get("collective", 0)
+
+    @property
+    def subscriptions(self):
+        """
+        :returns: unread subscriptions posts
+        :rtype: int
+        """
+        return self.get("subscriptions", 0)
+
+    @property
+    def news(self):
+        """
+        :returns: unread news posts
+        :rtype: int
+        """
+        return self.get("news", 0)
+
+
 class Ban(mixin.ObjectMixin):
     """
     iFunny ban
@@ -0,0 +1,423 @@
+import copy, json, os, sqlite3, threading, time
+
+from pathlib import Path
+
+
+class ObjectCache:
+    """
+    Persistent payload cache for iFunny objects, backed by sqlite.
+    Payloads are keyed by the url they were requested from, and can be shared by many processes on one host.
+    Validators (``ETag``, ``Last-Modified`` and a digest of the body) are kept with each payload so that expired ones can be revalidated instead of downloaded again.
+    Fields that depend on who is asking (``viewer_fields``, like ``is_smiled``) are not stored, so that one cache can be shared by many accounts.
+    A payload that had any is stored without validators, as they describe the whole body
+
+    :param path: location of the cache database. If None, ``~/.ifunnypy/cache.sqlite`` is used
+    :param ttls: seconds that a payload stays fresh, keyed by object type (``user``, ``post``, ``comment``, ``chat``, ``digest``). Merged with ``ObjectCache.default_ttls``
+    :param max_size: number of bytes that stored payloads may take up before the least recently used are evicted
+    :param timeout: seconds to wait on a database that is locked by another process
+    :param types: object types that are cached. If None, every type is
+
+    :type path: str
+    :type ttls: dict<str, int>
+    :type max_size: int
+    :type timeout: int
+    :type types: iterable<str>
+    """
+    default_ttls = {
+        "user": 300,
+        "post": 600,
+        "comment": 600,
+        "chat": 120,
+        "digest": 3600
+    }
+
+    viewer_fields = frozenset({
+        "is_smiled", "is_unsmiled", "is_republished", "is_blocked",
+        "is_in_subscribers", "is_in_subscriptions",
+        "is_subscribed_to_updates", "is_available_for_chat", "is_muted"
+    })
+
+    _evict_every = 64
+    _validator_columns = ("etag", "last_modified", "digest")
+
+    def __init__(self,
+                 path = None,
+                 ttls = None,
+                 max_size = 64 * 1024 * 1024,
+                 timeout = 30,
+                 types = None):
+        self.path = path if path else f"{Path.home()}/.ifunnypy/cache.sqlite"
+        self.ttls = {**self.default_ttls, **(ttls if ttls else {})}
+        self.max_size = max_size
+        self.timeout = timeout
+        self.types = set(types) if types else None
+
+        self._local = threading.local()
+        self._warm = {}
+        self._warm_lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(self.path)
+
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok = True)
+
+        with self._connection as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS payloads (
+                    url TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    digest TEXT
+                )""")
+            connection.execute("""
+                CREATE INDEX IF NOT EXISTS payloads_accessed
+                ON payloads (accessed_at)""")
+
+            columns = {
+                row[1]
+                for row in connection.execute("PRAGMA table_info(payloads)")
+            }
+
+            for column in self._validator_columns:
+                if column not in columns:
+                    connection.execute(
+                        f"ALTER TABLE payloads ADD COLUMN {column} TEXT")
+
+    # private methods
+
+    @property
+    def _connection(self):
+        """
+        sqlite connections cannot be shared between threads, so each thread gets its own
+        """
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout = self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+
+        return connection
+
+    def _public(self, payload):
+        """
+        :returns: a copy of ``payload`` without ``viewer_fields`` at any depth, and were any removed?
+        """
+        if isinstance(payload, list):
+            items = [self._public(item) for item in payload]
+            return [item[0] for item in items], any(item[1] for item in items)
+
+        if not isinstance(payload, dict):
+            return payload, False
+
+        public = {}
+        stripped = False
+
+        for key, value in payload.items():
+            if key in self.viewer_fields:
+                stripped = True
+                continue
+
+            public[key], nested = self._public(value)
+            stripped = stripped or nested
+
+        return public, stripped
+
+    def _is_fresh(self, type, stored_at, now = None):
+        now = now if now else time.time()
+        return now - stored_at < self.ttls.get(type, 0)
+
+    def _evict(self):
+        """
+        Drop expired payloads, and then the least recently used ones until the cache fits in ``max_size``
+        """
+        self.purge()
+
+        with self._connection as connection:
+            total = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM payloads").fetchone()[0]
+
+            if total <= self.max_size:
+                return
+
+            rows = connection.execute(
+                "SELECT url, size FROM payloads ORDER BY accessed_at"
+            ).fetchall()
+
+            doomed = []
+
+            for url, size in rows:
+                if total <= self.max_size:
+                    break
+
+                doomed.append((url, ))
+                total -= size
+
+            connection.executemany("DELETE FROM payloads WHERE url = ?",
+                                   doomed)
+
+        with self._warm_lock:
+            for url, in doomed:
+                self._warm.pop(url, None)
+
+    # public methods
+
+    def get(self, url, type):
+        """
+        Get a fresh payload
+
+        :param url: url that the payload was requested from
+        :param type: object type of the payload
+
+        :type url: str
+        :type type: str
+
+        :returns: the stored payload, if it exists and has not expired
+        :rtype: dict, or None
+        """
+        if self.types is not None and type not in self.types:
+            return None
+
+        now = time.time()
+        warm = self._warm.get(url)
+
+        if warm and self._is_fresh(type, warm[0], now):
+            return copy.deepcopy(warm[1])
+
+        with self._connection as connection:
+            row = connection.execute(
+                "SELECT data, stored_at FROM payloads WHERE url = ?",
+                (url, )).fetchone()
+
+            if not row or not self._is_fresh(type, row[1], now):
+                return None
+
+            connection.execute(
+                "UPDATE payloads SET accessed_at = ? WHERE url = ?",
+                (now, url))
+
+        return json.loads(row[0])
+
+    def entry(self, url):
+        """
+        Get a payload and its validators, even if the payload has expired
+
+        :param url: url that the payload was requested from
+
+        :type url: str
+
+        :returns: the stored payload and its validators, if it exists
+        :rtype: tuple<dict, dict>, or None
+        """
+        row = self._connection.execute(
+            "SELECT data, etag, last_modified, digest FROM payloads WHERE url = ?",
+            (url, )).fetchone()
+
+        if not row:
+            return None
+
+        return json.loads(row[0]), dict(zip(self._validator_columns, row[1:]))
+
+    def set(self, url, type, payload, validators = None):
+        """
+        Store a payload
+
+        :param url: url that the payload was requested from
+        :param type: object type of the payload
+        :param payload: the payload to store
+        :param validators: ``etag``, ``last_modified`` and ``digest`` of the response that the payload came from, if known
+
+        :type url: str
+        :type type: str
+        :type payload: dict
+        :type validators: dict
+        """
+        self.set_many([(url, type, payload, validators)])
+
+    def set_many(self, entries):
+        """
+        Store many payloads in one transaction
+
+        :param entries: (url, type, payload) or (url, type, payload, validators) for each payload to store
+
+        :type entries: iterable<tuple>
+        """
+        now = time.time()
+        rows = []
+
+        for url, type, payload, *validators in entries:
+            if self.types is not None and type not in self.types:
+                continue
+
+            validators = validators[0] if validators and validators[0] else {}
+            payload, stripped = self._public(payload)
+
+            if stripped:
+                validators = {}
+
+            data = json.dumps(payload, separators = (",", ":"))
+            rows.append((url, type, data, len(data), now, now,
+                         *(validators.get(column)
+                           for column in self._validator_columns)))
+
+            with self._warm_lock:
+                if url in self._warm:
+                    self._warm[url] = (now, payload)
+
+        if not rows:
+            return
+
+        with self._connection as connection:
+            connection.executemany(
+                """INSERT OR REPLACE INTO payloads
+                (url, type, data, size, stored_at, accessed_at,
+                etag, last_modified, digest)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+
+        self._writes += len(rows)
+
+        if self._writes >= self._evict_every:
+            self._writes = 0
+            self._evict()
+
+    def touch(self, url, validators = None):
+        """
+        Mark a payload as fresh again, after it was revalidated.
+        A payload that was stored without validators is kept without them
+
+        :param url: url that the payload was requested from
+        :param validators: new validators for the payload, if any
+
+        :type url: str
+        :type validators: dict
+        """
+        now = time.time()
+        validators = validators if validators else {}
+
+        with self._connection as connection:
+            connection.execute(
+                """UPDATE payloads SET stored_at = ?, accessed_at = ?,
+                etag = COALESCE(?, etag),
+                last_modified = COALESCE(?, last_modified),
+                digest = COALESCE(?, digest) WHERE url = ?
+                AND COALESCE(etag, last_modified, digest) IS NOT NULL""",
+                (now, now, *(validators.get(column)
+                             for column in self._validator_columns), url))
+            connection.execute(
+                """UPDATE payloads SET stored_at = ?, accessed_at = ?
+                WHERE url = ?
+                AND COALESCE(etag, last_modified, digest) IS NULL""",
+                (now, now, url))
+
+        with self._warm_lock:
+            if url in self._warm:
+                self._warm[url] = (now, self._warm[url][1])
+
+    def delete(self, url):
+        """
+        Forget a stored payload
+
+        :param url: url that the payload was requested from
+
+        :type url: str
+        """
+        with self._warm_lock:
+            self._warm.pop(url, None)
+
+        with self._connection as connection:
+            connection.execute("DELETE FROM payloads WHERE url = ?", (url, ))
+
+    def purge(self):
+        """
+        Delete every expired payload
+
+        :returns: number of payloads deleted
+        :rtype: int
+        """
+        now = time.time()
+        deleted = 0
+
+        with self._connection as connection:
+            for type, ttl in self.ttls.items():
+                deleted += connection.execute(
+                    "DELETE FROM payloads WHERE type = ? AND stored_at < ?",
+                    (type, now - ttl)).rowcount
+
+            unknown = ",".join("?" for _ in self.ttls)
+            deleted += connection.execute(
+                f"DELETE FROM payloads WHERE type NOT IN ({unknown})",
+                tuple(self.ttls)).rowcount
+
+        return deleted
+
+    def clear(self, type = None):
+        """
+        Delete stored payloads
+
+        :param type: object type to delete. If None, everything is deleted
+
+        :type type: str
+        """
+        with self._warm_lock:
+            self._warm = {}
+
+        with self._connection as connection:
+            if type:
+                connection.execute("DELETE FROM payloads WHERE type = ?",
+                                   (type, ))
+            else:
+                connection.execute("DELETE FROM payloads")
+
+    def warm(self, types = None):
+        """
+        Load every fresh payload into memory in one query, so that later lookups do not touch the disk.
+        Useful right after a process starts
+
+        :param types: object types to load. If None, every type is loaded
+
+        :type types: iterable<str>
+
+        :returns: number of payloads loaded
+        :rtype: int
+        """
+        types = set(types) if types else set(self.ttls)
+        now = time.time()
+        loaded = {}
+
+        rows = self._connection.execute(
+            "SELECT url, type, data, stored_at FROM payloads")
+
+        for url, type, data, stored_at in rows:
+            if type in types and self._is_fresh(type, stored_at, now):
+                loaded[url] = (stored_at, json.loads(data))
+
+        with self._warm_lock:
+            self._warm.update(loaded)
+
+        return len(loaded)
+
+    def close(self):
+        """
+        Close the database connection of the calling thread
+        """
+        connection = getattr(self._local, "connection", None)
+
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    @property
+    def size(self):
+        """
+        :returns: number of bytes taken by stored payloads
+        :rtype: int
+        """
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM payloads").fetchone()[0]
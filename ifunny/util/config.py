@@ -0,0 +1,249 @@
+import atexit, json, os, tempfile, threading, weakref
+
+from contextlib import contextmanager
+from hashlib import sha1
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_stores = {}
+_stores_lock = threading.Lock()
+_open = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open():
+    """
+    Write what is pending in every store that is still open when the interpreter exits
+    """
+    for store in [*_open]:
+        store.flush()
+
+
+def store(home):
+    """
+    Get the ConfigStore for a home path, shared by every client in this process that uses it
+
+    :param home: directory that holds the config
+
+    :type home: str
+
+    :returns: the store for this home
+    :rtype: ConfigStore
+    """
+    with _stores_lock:
+        if home not in _stores:
+            _stores[home] = ConfigStore(home)
+
+        return _stores[home]
+
+
+@contextmanager
+def _file_lock(path):
+    """
+    Hold an exclusive lock on ``path``.lock, so that other processes do not write ``path`` at the same time
+    """
+    with open(f"{path}.lock", "a") as stream:
+        if fcntl:
+            fcntl.flock(stream, fcntl.LOCK_EX)
+
+        try:
+            yield
+
+        finally:
+            if fcntl:
+                fcntl.flock(stream, fcntl.LOCK_UN)
+
+
+def _read(path):
+    try:
+        with open(path) as stream:
+            return json.load(stream)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write(path, data):
+    """
+    Write json to a temporary file and rename it over ``path``, so that readers never see half of a file
+    """
+    directory = os.path.dirname(path)
+    descriptor, temporary = tempfile.mkstemp(dir = directory,
+                                             prefix = ".config-")
+
+    try:
+        with os.fdopen(descriptor, "w") as stream:
+            json.dump(data, stream)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        os.replace(temporary, path)
+
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+        raise
+
+
+class ConfigStore:
+    """
+    On disk config shared by clients.
+    Shared values are kept in ``config.json``, and each account gets its own file in ``accounts``,
+    so that a change to one account does not rewrite the rest of them.
+
+    Writes are atomic and locked against other processes. Bursts of updates are coalesced into one write
+    that happens ``delay`` seconds after the first, and changed keys are merged with what is on disk
+    so that processes sharing a home do not clobber each other.
+
+    :param home: directory that holds the config
+    :param delay: seconds to wait for more updates before writing
+
+    :type home: str
+    :type delay: float
+    """
+    def __init__(self, home, delay = 0.5):
+        self.home = home
+        self.path = f"{home}/config.json"
+        self.accounts_path = f"{home}/accounts"
+        self.delay = delay
+
+        self._lock = threading.RLock()
+        self._timer = None
+
+        self._known = {}
+        self._changed = {}
+        self._accounts = {}
+        self._changed_accounts = {}
+
+        _open.add(self)
+
+    # private methods
+
+    def _account_path(self, email):
+        return f"{self.accounts_path}/{sha1(email.encode()).hexdigest()}.json"
+
+    def _schedule(self):
+        with self._lock:
+            if self._timer:
+                return
+
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    # public methods
+
+    def load(self):
+        """
+        Read the shared config, creating it if it does not exist
+
+        :returns: a copy of the shared config
+        :rtype: dict
+        """
+        os.makedirs(self.home, exist_ok = True)
+
+        with self._lock:
+            if not os.path.isfile(self.path):
+                with _file_lock(self.path):
+                    if not os.path.isfile(self.path):
+                        _write(self.path, {})
+
+            self._known = {**_read(self.path), **self._changed}
+
+            return {**self._known}
+
+    def update(self, values):
+        """
+        Schedule a write of values to the shared config.
+        Keys that are not in ``values`` are left alone
+
+        :param values: values to set in the shared config
+
+        :type values: dict
+        """
+        if not values:
+            return
+
+        with self._lock:
+            self._known.update(values)
+            self._changed.update(values)
+            self._schedule()
+
+    def account(self, email, reload = False):
+        """
+        Get the record of an account
+
+        :param email: email of the account
+        :param reload: read the record from disk even if it was read before, in case another process changed it
+
+        :type email: str
+        :type reload: bool
+
+        :returns: a copy of the account record
+        :rtype: dict
+        """
+        with self._lock:
+            if reload and email not in self._changed_accounts:
+                self._accounts.pop(email, None)
+
+            if email not in self._accounts:
+                self._accounts[email] = _read(self._account_path(email))
+
+            return {**self._accounts[email]}
+
+    def update_account(self, email, **values):
+        """
+        Schedule a write of values to the record of an account
+
+        :param email: email of the account
+        :param values: values to set in the record
+
+        :type email: str
+        """
+        with self._lock:
+            self.account(email)
+            self._accounts[email].update(values)
+            self._changed_accounts.setdefault(email, {}).update(values)
+            self._schedule()
+
+    def flush(self):
+        """
+        Write every pending change now
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+            changed, self._changed = self._changed, {}
+            accounts, self._changed_accounts = self._changed_accounts, {}
+
+            if changed:
+                os.makedirs(self.home, exist_ok = True)
+
+                with _file_lock(self.path):
+                    self._known = {**_read(self.path), **changed}
+                    _write(self.path, self._known)
+
+            if accounts:
+                os.makedirs(self.accounts_path, exist_ok = True)
+
+            for email, values in accounts.items():
+                path = self._account_path(email)
+
+                with _file_lock(path):
+                    record = {**_read(path), **values}
+                    _write(path, record)
+
+                self._accounts[email] = record
+
+    def close(self):
+        """
+        Write every pending change now, and stop writing at exit
+        """
+        _open.discard(self)
+        self.flush()
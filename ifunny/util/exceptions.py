@@ -8,6 +8,16 @@ class ChatAlreadyActive(Exception):
         super().__init__(*args, **kwargs)
 
 
+class ChatTimeout(Exception):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+class ChatQueueFull(Exception):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
 class AlreadyAuthenticated(Exception):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
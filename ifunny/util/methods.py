@@ -1,4 +1,7 @@
-import requests
+import asyncio, inspect, requests, threading, time
+
+from random import random
+from hashlib import sha1
 
 from ifunny.util import exceptions
 
@@ -16,9 +19,68 @@ mime_types = {
 }
 
 
-def request(method, url, codes = {200}, errors = {}, **kwargs):
-    response = requests.request(method.lower(), url, **kwargs)
+def send(method, url, client = None, **kwargs):
+    """
+    Send a request on behalf of a client, using its session and rate budget if it has them.
+    If the client was logged in without validating its token and the request is rejected with a ``401``,
+    the client logs in again and the request is retried with new headers
+
+    :param method: http method
+    :param url: url to request
+    :param client: client that the request is made for, if any
+
+    :type method: str
+    :type url: str
+    :type client: ClientBase
+
+    :returns: the response
+    :rtype: requests.Response
+    """
+    if client is None:
+        return requests.request(method.lower(), url, **kwargs)
+
+    response = _send(method, url, client, **kwargs)
+
+    authorization = kwargs.get("headers", {}).get("Authorization")
+
+    if response.status_code == 401 and client._reauthenticate(authorization):
+        kwargs["headers"] = {**kwargs.get("headers", {}), **client.headers}
+        response = _send(method, url, client, **kwargs)
+
+    if response.status_code < 400:
+        client._validated()
+
+    return response
+
+
+def _send(method, url, client, **kwargs):
+    session = client.session if client.session else requests
+    client._begin_request()
+
+    try:
+        response = session.request(method.lower(), url, **kwargs)
+
+    finally:
+        client._end_request()
+
+    if response.status_code == 429 and client.rate_budget:
+        try:
+            wait = float(response.headers.get("Retry-After", 1))
+        except ValueError:
+            wait = 1
+
+        client.rate_budget.penalize(wait)
+
+    return response
 
+
+def request(method, url, codes = {200}, errors = {}, client = None, **kwargs):
+    response = send(method, url, client = client, **kwargs)
+
+    return parse_response(response, codes = codes, errors = errors)
+
+
+def parse_response(response, codes = {200}, errors = {}):
     if response.status_code in codes:
         return response.json()
 
@@ -41,7 +103,43 @@ def request(method, url, codes = {200}, errors = {}, **kwargs):
     if response.status_code == 429:
         raise exceptions.RateLimit(response.text)
 
-    raise exceptions.BadAPIResponse(f"{url}, {response.text}")
+    raise exceptions.BadAPIResponse(f"{response.url}, {response.text}")
+
+
+def response_validators(response):
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "digest": sha1(response.content).hexdigest()
+    }
+
+
+def revalidate(url, validators = None, headers = {}, client = None, **kwargs):
+    """
+    GET a url that we may already have the body of.
+    The server is asked to skip the body if it has not changed since the validators were taken,
+    and if it sends one anyways it is compared against the digest of the old one
+
+    :returns: the response, validators for the response, and did the body change?
+    :rtype: tuple<requests.Response, dict, bool>
+    """
+    validators = validators if validators else {}
+    headers = {**headers}
+
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = send("get", url, client = client, headers = headers, **kwargs)
+
+    if response.status_code == 304:
+        return response, validators, False
+
+    fresh = response_validators(response)
+
+    return response, fresh, fresh["digest"] != validators.get("digest")
 
 
 def determine_mime(url, bias = "image/png"):
@@ -80,13 +178,25 @@ def paginated_data(source_url,
                    prev = None,
                    next = None,
                    post = False,
-                   ex_params = {}):
+                   ex_params = {},
+                   client = None):
     params = paginated_params(limit, prev, next, ex_params)
 
     if post:
-        response = requests.post(source_url, headers = headers, data = params)
+        response = send("post",
+                        source_url,
+                        client = client,
+                        headers = headers,
+                        data = params)
     else:
-        response = requests.get(source_url, headers = headers, params = params)
+        response = send("get",
+                        source_url,
+                        client = client,
+                        headers = headers,
+                        params = params)
+
+    if response.status_code == 429:
+        raise exceptions.RateLimit(response.text)
 
     if response.status_code != 200:
         raise exceptions.BadAPIResponse(
@@ -98,6 +208,87 @@ def paginated_data(source_url,
     return response.json()["data"]
 
 
+def rate_limited(call, *args, retries = 5, delay = 1, **kwargs):
+    """
+    Call something, waiting and trying again when iFunny says that we are going too fast.
+    The wait doubles after each try
+
+    :param call: callable to call with ``args`` and ``kwargs``
+    :param retries: most number of times to try again
+    :param delay: seconds to wait before the first retry
+
+    :type call: callable
+    :type retries: int
+    :type delay: float
+
+    :returns: whatever ``call`` returns
+    """
+    for attempt in range(retries + 1):
+        try:
+            return call(*args, **kwargs)
+
+        except exceptions.RateLimit:
+            if attempt == retries:
+                raise
+
+            time.sleep(delay * 2**attempt * (1 + random()))
+
+
+_tasks = set()
+_local = threading.local()
+
+
+async def _wait(awaitable):
+    return await awaitable
+
+
+def use_loop(loop):
+    """
+    Have coroutines that are invoked in this thread run on an event loop in another thread.
+    Used by threads that handle chat work for a ``SocketHub``
+
+    :param loop: event loop to run coroutines on, or None to run them in this thread again
+
+    :type loop: asyncio.AbstractEventLoop
+    """
+    _local.loop = loop
+
+
+def invoke(call, *args, **kwargs):
+    """
+    Call something that may be a coroutine function.
+    Inside of a running event loop, what it returns is scheduled as a task on that loop.
+    In a thread given a loop by ``use_loop``, it is scheduled on that loop.
+    Anywhere else, it is run to completion in this thread
+
+    :param call: callable to call with ``args`` and ``kwargs``
+
+    :type call: callable
+
+    :returns: what ``call`` returns, or the task or future that it was scheduled as
+    """
+    result = call(*args, **kwargs)
+
+    if not inspect.isawaitable(result):
+        return result
+
+    try:
+        loop = asyncio.get_running_loop()
+
+    except RuntimeError:
+        loop = getattr(_local, "loop", None)
+
+        if loop is None:
+            return asyncio.run(_wait(result))
+
+        return asyncio.run_coroutine_threadsafe(_wait(result), loop)
+
+    task = loop.create_task(_wait(result))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
 def paginated_generator(source, *args):
     buffer = source(*args)
 
@@ -0,0 +1,103 @@
+import threading, time
+
+
+class RateBudget:
+    """
+    Token bucket shared by everything that spends from it.
+    Tokens refill at ``rate`` per second up to ``burst``, and each request spends one
+
+    :param rate: tokens added per second
+    :param burst: most tokens that can be saved up. If None, ``rate`` is used
+
+    :type rate: float
+    :type burst: float
+    """
+    def __init__(self, rate, burst = None):
+        self.rate = rate
+        self.burst = burst if burst else max(rate, 1)
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # private methods
+
+    def _refill(self, now):
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # public methods
+
+    def try_acquire(self, tokens = 1):
+        """
+        Spend tokens if they are available right now
+
+        :param tokens: number of tokens to spend
+
+        :type tokens: float
+
+        :returns: seconds to wait before they will be available, or 0 if they were spent
+        :rtype: float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens = 1, timeout = None):
+        """
+        Spend tokens, waiting for them if needed
+
+        :param tokens: number of tokens to spend
+        :param timeout: most seconds to wait. If None, wait as long as it takes
+
+        :type tokens: float
+        :type timeout: float
+
+        :returns: were the tokens spent?
+        :rtype: bool
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait = self.try_acquire(tokens)
+
+            if not wait:
+                return True
+
+            if deadline is not None:
+                left = deadline - time.monotonic()
+
+                if left <= 0:
+                    return False
+
+                wait = min(wait, left)
+
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """
+        Stop handing out tokens for a while, after the API says that we are going too fast
+
+        :param seconds: seconds to hold off for
+
+        :type seconds: float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+    @property
+    def available(self):
+        """
+        :returns: tokens that can be spent right now
+        :rtype: float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(self._tokens, 0)
@@ -18,6 +18,7 @@ setup(
         "http-api", "python", "python3", "python3.x", "unofficial"
     ],
     install_requires = ["requests", "websocket-client"],
+    extras_require = {"async": ["websockets"]},
     setup_requires = ["wheel"],
     packages = find_packages(),
 )
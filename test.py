@@ -8,3 +8,24 @@ from tests.comment import CommentTest
 from tests.channel import ChannelTest
 from tests.digest import DigestTest
 from tests.client import ClientTest
+from tests.cache import ObjectCacheTest
+from tests.imports import ImportTest
+from tests.config import ConfigStoreTest
+from tests.login import LoginTest
+from tests.pool import RateBudgetTest, ClientPoolTest
+from tests.comment_tree import (CommentTreeTest, CommentCrawlTest,
+                                 CommentRelationTest)
+from tests.graph import BloomFilterTest, GraphCrawlerTest
+from tests.snapshots import SnapshotTest
+from tests.users import BulkUserTest
+from tests.batch import BatchTest
+from tests.counters import CountersTest
+from tests.notifications import NotificationStreamTest
+from tests.sendbird import SocketTest
+from tests.aio import AsyncSocketTest, InvokeTest
+from tests.hub import SocketHubTest
+from tests.acks import AcknowledgementTest
+from tests.send_queue import SendQueueTest
+from tests.broadcast import BroadcastTest
+from tests.commands import CommandExecutorTest
+from tests.handler import FilterTest, HandlerTest
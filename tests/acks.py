@@ -0,0 +1,135 @@
+import json, unittest
+from unittest import mock
+
+from ifunny import objects
+from ifunny.client._handler import Handler
+from ifunny.client._sendbird import Socket
+from ifunny.util import exceptions
+
+
+class ChatClient(objects._mixin.ClientBase):
+    nick = "me"
+    id = "me_id"
+
+    def __init__(self):
+        super().__init__()
+        self.req_ids = iter(range(100, 200))
+
+    @property
+    def next_req_id(self):
+        return next(self.req_ids)
+
+
+class AcknowledgementTest(unittest.TestCase):
+    def setUp(self):
+        self.client = ChatClient()
+        self.client.socket = Socket(self.client, False, False)
+        self.client.socket.send = mock.Mock()
+        self.client.socket.active = True
+        self.client.handler = Handler(self.client)
+        self.client.resolve_command = mock.Mock()
+
+    def _sent(self, index = -1):
+        frame = self.client.socket.send.call_args_list[index][0][0]
+        return frame[:4], json.loads(frame[4:])
+
+    def test_req_id_sent(self):
+        chat = objects.Chat("chat", client = self.client)
+        assert chat.send_message("hello") is chat
+
+        key, data = self._sent()
+        assert key == "MESG"
+        assert data == {
+            "channel_url": "chat",
+            "message": "hello",
+            "req_id": "100"
+        }
+
+    def test_echo_resolves(self):
+        chat = objects.Chat("chat", client = self.client)
+        sent = chat.send_message("hello", ack = True)
+        assert not sent.done()
+
+        echo = {
+            "msg_id": 1,
+            "channel_url": "chat",
+            "message": "hello",
+            "req_id": "100",
+            "user": {
+                "name": "me"
+            }
+        }
+        self.client.handler.resolve(f"MESG{json.dumps(echo)}")
+
+        message = sent.result(1)
+        assert message.id == 1
+        assert message.content == "hello"
+        assert len(self.client.socket.acks) == 0
+
+    def test_error_rejects(self):
+        chat = objects.Chat("chat", client = self.client)
+        sent = chat.send_message("hello", ack = True)
+
+        error = {"code": 900100, "message": "bad", "req_id": "100"}
+        self.client.handler.resolve(f"EROR{json.dumps(error)}")
+
+        with self.assertRaises(exceptions.BadAPIResponse):
+            sent.result(1)
+
+    def test_timeout_retries(self):
+        chat = objects.Chat("chat", client = self.client)
+        sent = chat.send_message("hello",
+                                 ack = True,
+                                 timeout = 0.05,
+                                 retries = 2)
+
+        with self.assertRaises(exceptions.ChatTimeout):
+            sent.result(2)
+
+        assert self.client.socket.send.call_count == 3
+        assert {self._sent(index)[1]["req_id"]
+                for index in range(3)} == {"100"}
+
+    def test_echo_not_waited_for(self):
+        echo = {
+            "msg_id": 1,
+            "channel_url": "chat",
+            "message": "hello",
+            "req_id": "999",
+            "user": {
+                "name": "me"
+            }
+        }
+
+        with mock.patch("ifunny.client._handler.objects") as made:
+            self.client.handler.resolve(f"MESG{json.dumps(echo)}")
+
+        made.Message.assert_not_called()
+
+    def test_retries_queued(self):
+        queue = self.client.socket.use_queue()
+        chat = objects.Chat("chat", client = self.client)
+        sent = chat.send_message("hello",
+                                 ack = True,
+                                 timeout = 0.05,
+                                 retries = 1)
+
+        with self.assertRaises(exceptions.ChatTimeout):
+            sent.result(2)
+
+        assert self.client.socket.send.call_count == 2
+        assert queue.metrics["sent"] == 2
+        assert self._sent(0) == self._sent(1)
+
+    def test_empty_queue_used(self):
+        queue = self.client.socket.use_queue()
+        sent = self.client.socket.send_frame("MESG", {"channel_url": "chat"})
+        sent.result(2)
+        assert queue.metrics["sent"] == 1
+
+    def test_stop_rejects(self):
+        sent = self.client.socket.send_frame("MESG", {}, ack = True)
+        self.client.socket.stop()
+
+        with self.assertRaises(exceptions.ChatNotActive):
+            sent.result(1)
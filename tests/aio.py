@@ -0,0 +1,139 @@
+import asyncio, threading, unittest
+from unittest import mock
+
+from ifunny.client import AsyncSocket
+from ifunny.client._handler import Event
+from ifunny.ext.commands import Command
+from ifunny.util import methods
+
+
+class FakeConnection:
+    def __init__(self, frames):
+        self.frames = frames
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __aiter__(self):
+        return self._frames()
+
+    async def _frames(self):
+        for frame in self.frames:
+            yield frame
+            await asyncio.sleep(0)
+
+    async def send(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        return
+
+
+class AsyncSocketTest(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock(id = "me", messenger_token = "token")
+        self.socket = AsyncSocket(self.client, reconnect = False)
+        self.socket._routed = True
+
+    def test_run_dispatches_on_loop(self):
+        connection = FakeConnection(["MESG{}", "PING{}"])
+        self.socket._connect = lambda url: connection
+        frames = []
+        self.client.handler.resolve = frames.append
+
+        asyncio.run(self.socket.run())
+
+        assert frames == ["MESG{}", "PING{}"]
+        assert not self.socket.active
+        self.client.handler._on_disconnect.assert_called_once()
+
+    def test_identity_off_loop(self):
+        threads = []
+        self.client.handler.pin_self = lambda: threads.append(
+            threading.current_thread())
+        self.socket._connect = lambda url: threads.append(
+            threading.current_thread()) or FakeConnection([])
+
+        asyncio.run(self.socket.run())
+
+        assert threads[0] is not threads[1]
+        assert threads[1] is threading.current_thread()
+
+    def test_handler_errors_do_not_close(self):
+        self.socket._connect = lambda url: FakeConnection(["one", "two"])
+        self.client.handler.resolve.side_effect = ValueError("bad frame")
+
+        asyncio.run(self.socket.run())
+
+        assert self.client.handler.resolve.call_count == 2
+        assert isinstance(self.socket.last_error, ValueError)
+
+    def test_reconnects(self):
+        connections = [FakeConnection([]), FakeConnection([])]
+        self.socket.reconnect = True
+        self.socket.backoff = 0
+
+        def connect(url):
+            if len(connections) == 1:
+                self.socket._stopping.set()
+
+            return connections.pop(0)
+
+        self.socket._connect = connect
+        asyncio.run(self.socket.run())
+
+        assert connections == []
+        assert self.socket.attempts == 1
+
+    def test_send(self):
+        connection = FakeConnection([])
+
+        async def main():
+            self.socket.loop = asyncio.get_running_loop()
+            self.socket._connection = connection
+            await self.socket.send("PONG{}\n")
+
+        asyncio.run(main())
+        assert connection.sent == ["PONG{}\n"]
+
+    def test_send_not_connected(self):
+        with self.assertRaises(Exception):
+            self.socket.send("MESG{}")
+
+
+class InvokeTest(unittest.TestCase):
+    def test_plain(self):
+        assert methods.invoke(lambda value: value * 2, 2) == 4
+
+    def test_outside_loop(self):
+        async def double(value):
+            return value * 2
+
+        assert methods.invoke(double, 2) == 4
+
+    def test_inside_loop(self):
+        called = []
+
+        async def event(data):
+            called.append(data)
+
+        async def main():
+            Event(event, "on_connect")({"key": "value"})
+            assert called == []
+            await asyncio.sleep(0)
+
+        asyncio.run(main())
+        assert called == [{"key": "value"}]
+
+    def test_async_command(self):
+        called = []
+
+        async def command(message, args):
+            called.append(args)
+
+        Command(command, "command")("message", ["one"])
+        assert called == [["one"]]
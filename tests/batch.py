@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+from ifunny import objects
+from ifunny.ext import batch
+from ifunny.util import exceptions, methods
+
+
+class Target:
+    def __init__(self, id, errors = ()):
+        self.id = id
+        self.errors = [*errors]
+        self.calls = 0
+
+    def smile(self):
+        self.calls += 1
+
+        if self.errors:
+            raise self.errors.pop(0)
+
+        return self
+
+
+class BatchTest(unittest.TestCase):
+    def test_report(self):
+        targets = [
+            Target("ok"),
+            Target("repeated", [exceptions.RepeatedAction()]),
+            Target("limited", [exceptions.RateLimit()] * 2),
+            Target("broken", [exceptions.BadAPIResponse()])
+        ]
+
+        with mock.patch("time.sleep"):
+            report = batch.run([(target, "smile") for target in targets],
+                               workers = 2)
+
+        assert [result.target.id for result in report] == [
+            "ok", "repeated", "limited", "broken"
+        ]
+        assert [result.ok for result in report] == [True, True, True, False]
+        assert report.repeated == [report[1]]
+        assert report.failed == [report[3]]
+        assert targets[2].calls == 3
+        assert report[0].value is targets[0]
+
+    def test_retries_use_budget(self):
+        target = Target("limited", [exceptions.RateLimit()] * 2)
+
+        with mock.patch("time.sleep"), mock.patch.object(
+                batch.ratelimit.RateBudget, "acquire") as acquire:
+            report = batch.run([(target, "smile")], rate = 10)
+
+        assert report[0].ok
+        assert acquire.call_count == 3
+
+    def test_republish_rate_limited(self):
+        post = objects.Post("post", client = objects._mixin.ClientBase())
+        responses = [
+            mock.Mock(status_code = 429, text = "slow down"),
+            mock.Mock(status_code = 200)
+        ]
+        responses[1].json.return_value = {"data": {"id": "republished"}}
+
+        with mock.patch("time.sleep"), mock.patch.object(
+                methods, "send", side_effect = responses):
+            report = batch.run([(post, "republish")])
+
+        assert report[0].value.id == "republished"
+
+    def test_callable(self):
+        target = Target("foo")
+        report = batch.run([(target, lambda target: target.id)])
+        assert report[0].value == "foo"
+        assert report[0].name == "<lambda>"
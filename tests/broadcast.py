@@ -0,0 +1,65 @@
+import json, unittest
+from unittest import mock
+
+from ifunny import objects
+from ifunny.client._sendbird import Socket
+from ifunny.ext import broadcast
+from tests.acks import ChatClient
+
+
+class BroadcastTest(unittest.TestCase):
+    def setUp(self):
+        self.client = ChatClient()
+        self.client.id = "me"
+        self.client.sendbird_headers = {}
+        self.client.socket = Socket(self.client, False, False)
+        self.client.socket.active = True
+        self.client.socket.send = self._echo
+        self.frames = []
+
+    def _echo(self, frame):
+        data = json.loads(frame[4:])
+        self.frames.append(data)
+
+        if data["channel_url"] != "silent":
+            self.client.socket.acks.resolve(data["req_id"], data)
+
+    def _rest(self, method, url, **kwargs):
+        return {"message_id": 1, **kwargs["json"]}
+
+    def test_socket(self):
+        chats = ["one", objects.Chat("two", client = self.client)]
+        report = broadcast.run(self.client, chats, "hi \"all\"", rate = None)
+
+        assert [result.via for result in report] == ["socket", "socket"]
+        assert [frame["channel_url"]
+                for frame in self.frames] == ["one", "two"]
+        assert {frame["message"] for frame in self.frames} == {'hi "all"'}
+        assert len({frame["req_id"] for frame in self.frames}) == 2
+
+    def test_fallback(self):
+        with mock.patch("ifunny.util.methods.request",
+                        side_effect = self._rest) as request:
+            report = broadcast.run(self.client, ["one", "silent"],
+                                   "hi",
+                                   rate = None,
+                                   timeout = 0.05,
+                                   retries = 0)
+
+        assert len(report.by_socket) == 1
+        assert [result.channel_url
+                for result in report.by_rest] == ["silent"]
+        assert report.failed == []
+        assert request.call_args[0][1].endswith(
+            "/group_channels/silent/messages")
+        assert report.by_rest[0].message.content == "hi"
+
+    def test_no_fallback(self):
+        self.client.socket.active = False
+        report = broadcast.run(self.client, ["one"],
+                               "hi",
+                               rate = None,
+                               fallback = False)
+
+        assert len(report.failed) == 1
+        assert self.frames == []
@@ -0,0 +1,111 @@
+import unittest, tempfile
+from ifunny.util import cache
+
+
+class ObjectCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = cache.ObjectCache(
+            path = f"{self.directory.name}/cache.sqlite")
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_set_get(self):
+        self.cache.set("url", "user", {"nick": "foo"})
+        assert self.cache.get("url", "user") == {"nick": "foo"}
+
+    def test_missing(self):
+        assert self.cache.get("url", "user") is None
+
+    def test_expired(self):
+        self.cache.ttls["user"] = 0
+        self.cache.set("url", "user", {"nick": "foo"})
+        assert self.cache.get("url", "user") is None
+
+    def test_purge(self):
+        self.cache.ttls["post"] = 0
+        self.cache.set("a", "user", {})
+        self.cache.set("b", "post", {})
+        assert self.cache.purge() == 1
+        assert self.cache.get("a", "user") == {}
+
+    def test_shared(self):
+        self.cache.set("url", "post", {"id": "foo"})
+        other = cache.ObjectCache(path = self.cache.path)
+        assert other.get("url", "post") == {"id": "foo"}
+        other.close()
+
+    def test_evict(self):
+        self.cache.max_size = 100
+        self.cache.set_many([(str(n), "post", {"n": "x" * 40})
+                             for n in range(8)])
+        self.cache._evict()
+        assert self.cache.size <= 100
+        assert self.cache.get("7", "post") is not None
+
+    def test_warm(self):
+        self.cache.set_many([(str(n), "user", {"n": n}) for n in range(4)])
+        assert self.cache.warm() == 4
+        other = cache.ObjectCache(path = self.cache.path)
+        other.clear()
+        other.close()
+        assert self.cache.get("2", "user") == {"n": 2}
+
+    def test_entry_expired(self):
+        self.cache.ttls["user"] = 0
+        self.cache.set("url", "user", {"nick": "foo"}, {"etag": "bar"})
+        payload, validators = self.cache.entry("url")
+        assert payload == {"nick": "foo"}
+        assert validators["etag"] == "bar"
+
+    def test_touch(self):
+        self.cache.set("url", "user", {"nick": "foo"}, {"etag": "bar"})
+        self.cache.touch("url", {"digest": "baz"})
+        _, validators = self.cache.entry("url")
+        assert validators == {
+            "etag": "bar",
+            "last_modified": None,
+            "digest": "baz"
+        }
+
+    def test_viewer_fields(self):
+        payload = {
+            "nick": "foo",
+            "is_blocked": True,
+            "creator": {
+                "is_smiled": 1
+            }
+        }
+        self.cache.set("url", "user", payload, {"etag": "bar"})
+
+        assert self.cache.get("url", "user") == {
+            "nick": "foo",
+            "creator": {}
+        }
+        assert payload["is_blocked"]
+
+        _, validators = self.cache.entry("url")
+        assert not any(validators.values())
+
+        self.cache.touch("url", {"etag": "baz"})
+        _, validators = self.cache.entry("url")
+        assert not any(validators.values())
+
+    def test_warm_copy(self):
+        self.cache.set("url", "user", {"nick": "foo"})
+        self.cache.warm()
+        self.cache.get("url", "user")["nick"] = "bar"
+        assert self.cache.get("url", "user") == {"nick": "foo"}
+
+    def test_clear(self):
+        self.cache.set("a", "user", {})
+        self.cache.set("b", "post", {})
+        self.cache.clear("user")
+        assert self.cache.get("a", "user") is None
+        assert self.cache.get("b", "post") == {}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
 import unittest, json, os, requests
+from unittest import mock
+
 from ifunny import Client, ext
 
 
@@ -45,3 +47,89 @@ class ClientTest(unittest.TestCase):
         foo = lambda: "bar"
 
         assert Client(prefix = foo).prefix == {"bar"}
+
+    def _dispatch(self, client, content, channel_url = "chat"):
+        called = []
+        client.commands = {
+            "ping": ext.commands.Command(
+                lambda message, args: called.append(args), "ping")
+        }
+        message = mock.Mock(content = content, channel_url = channel_url)
+        return client.resolve_command(message), called
+
+    def test_resolve_command(self):
+        invoked, called = self._dispatch(Client(prefix = "!"), "!ping a  b")
+        assert invoked.name == "ping"
+        assert called == [["a", "", "b"]]
+
+    def test_resolve_command_no_args(self):
+        invoked, called = self._dispatch(Client(prefix = "!"), "!ping")
+        assert called == [[]]
+
+    def test_resolve_command_longest_prefix(self):
+        client = Client(prefix = ["!", "!!"])
+        invoked, called = self._dispatch(client, "!!ping")
+        assert called == [[]]
+
+    def test_resolve_command_no_prefix(self):
+        invoked, called = self._dispatch(Client(prefix = "!"), "ping !ping")
+        assert invoked is None
+        assert called == []
+
+    def test_resolve_command_unknown(self):
+        invoked, called = self._dispatch(Client(prefix = "!"), "!pong")
+        assert invoked is ext.commands.Defaults.default
+
+    def test_resolve_command_no_content(self):
+        invoked, called = self._dispatch(Client(prefix = "!"), None)
+        assert invoked is None
+
+    def test_prefix_cached_per_chat(self):
+        calls = []
+
+        def prefix(message):
+            calls.append(message)
+            return "?" if message and message.channel_url == "other" else "!"
+
+        client = Client(prefix = prefix)
+        assert calls == []
+        assert client.prefix is prefix
+
+        assert self._dispatch(client, "!ping")[1] == [[]]
+        assert self._dispatch(client, "!ping")[1] == [[]]
+        assert self._dispatch(client, "?ping", "other")[1] == [[]]
+        assert self._dispatch(client, "!ping", "other")[1] == []
+        assert len(calls) == 2
+
+    def test_prefix_per_channel(self):
+        table = {"chat": "!", "other": "?"}
+        client = Client(prefix = lambda message: table[message.channel_url])
+
+        assert self._dispatch(client, "!ping")[1] == [[]]
+        assert self._dispatch(client, "?ping", "other")[1] == [[]]
+        assert self._dispatch(client, "?ping")[1] == []
+
+    def test_prefix_cache_expires(self):
+        calls = []
+        client = Client(prefix = lambda: calls.append(None) or "!")
+        client.prefix_ttl = 0
+        calls.clear()
+
+        self._dispatch(client, "!ping")
+        self._dispatch(client, "!ping")
+        assert len(calls) == 2
+
+    def test_req_id_unique(self):
+        client = Client()
+        client._sendbird_lock = lock = mock.MagicMock()
+        other = []
+
+        def preempt(*args):
+            if not other:
+                other.append(None)
+                other.append(client.next_req_id)
+
+        lock.release.side_effect = preempt
+        lock.__exit__.side_effect = preempt
+
+        assert client.next_req_id != other[1]
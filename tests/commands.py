@@ -0,0 +1,171 @@
+import asyncio, threading, time, unittest
+from unittest import mock
+
+from ifunny.ext.commands import Command, CommandExecutor
+
+
+def message(user = "someone"):
+    message = mock.Mock()
+    message.get = lambda key, default = None: {
+        "user": {
+            "guest_id": user
+        }
+    }.get(key, default)
+    return message
+
+
+class CommandExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = CommandExecutor(workers = 4)
+
+    def tearDown(self):
+        self.executor.shutdown(wait = False)
+
+    def test_default_concurrency(self):
+        gate = threading.Event()
+        command = Command(lambda message, args: gate.wait(2), "slow")
+        calls = [
+            self.executor.submit(command, message(), []) for _ in range(4)
+        ]
+
+        assert self.executor.metrics["slow"]["running"] == 2
+        gate.set()
+        [call.future.result(2) for call in calls]
+
+    def test_errors_reported(self):
+        errors = []
+        executor = CommandExecutor(workers = 1, on_error = errors.append)
+
+        def broken(message, args):
+            raise ValueError("broken")
+
+        call = executor.submit(Command(broken, "broken"), message(), [])
+
+        with self.assertRaises(ValueError):
+            call.future.result(2)
+
+        assert isinstance(errors[0], ValueError)
+        executor.shutdown()
+
+    def test_runs_off_thread(self):
+        threads = []
+        command = Command(
+            lambda message, args: threads.append(threading.current_thread()),
+            "where")
+
+        self.executor.submit(command, message(), []).future.result(2)
+        assert threads[0] is not threading.current_thread()
+
+    def test_concurrency_limit(self):
+        gate = threading.Event()
+        running = []
+        most = []
+
+        def slow(message, args):
+            running.append(None)
+            most.append(len(running))
+            gate.wait(2)
+            running.pop()
+
+        heavy = Command(slow, "heavy", concurrency = 2)
+        light = Command(lambda message, args: "done", "light")
+
+        calls = [
+            self.executor.submit(heavy, message(), []) for _ in range(5)
+        ]
+        assert self.executor.submit(light, message(),
+                                    []).future.result(2) == "done"
+
+        metrics = self.executor.metrics["heavy"]
+        assert metrics["running"] == 2
+        assert metrics["waiting"] == 3
+
+        gate.set()
+
+        for call in calls:
+            call.future.result(2)
+
+        assert max(most) == 2
+        assert self.executor.metrics["heavy"]["completed"] == 5
+
+    def test_cooldown(self):
+        command = Command(lambda message, args: None, "cool", cooldown = 60)
+
+        assert self.executor.submit(command, message("one"), [])
+        assert self.executor.submit(command, message("one"), []) is None
+        assert self.executor.submit(command, message("two"), [])
+        assert self.executor.metrics["cool"]["cooled_down"] == 1
+
+    def test_async_timeout(self):
+        async def sleepy(message, args):
+            await asyncio.sleep(5)
+
+        command = Command(sleepy, "sleepy", timeout = 0.05)
+        call = self.executor.submit(command, message(), [])
+
+        with self.assertRaises(TimeoutError):
+            call.future.result(2)
+
+        time.sleep(0.05)
+        assert self.executor.metrics["sleepy"]["timed_out"] == 1
+
+    def test_sync_timeout_counted(self):
+        command = Command(lambda message, args: time.sleep(0.1), "late",
+                          timeout = 0.01)
+        call = self.executor.submit(command, message(), [])
+
+        with self.assertRaises(TimeoutError):
+            call.future.result(2)
+
+    def test_cancel(self):
+        gate = threading.Event()
+        started = threading.Event()
+
+        async def waiting(message, args):
+            started.set()
+            await asyncio.sleep(5)
+
+        blocker = Command(lambda message, args: gate.wait(2), "blocker",
+                          concurrency = 1)
+        first = self.executor.submit(blocker, message(), [])
+        queued = self.executor.submit(blocker, message(), [])
+
+        command = Command(waiting, "waiting")
+        running = self.executor.submit(command, message(), [])
+        assert started.wait(2)
+
+        self.executor.cancel()
+
+        assert queued.future.cancelled()
+
+        with self.assertRaises(BaseException):
+            running.future.result(2)
+
+        gate.set()
+        first.future.result(2)
+
+    def test_metrics_wait_and_run(self):
+        command = Command(lambda message, args: time.sleep(0.02), "timed")
+        self.executor.submit(command, message(), []).future.result(2)
+        time.sleep(0.05)
+
+        metrics = self.executor.metrics["timed"]
+        assert metrics["run"]["max"] >= 0.02
+        assert metrics["wait"]["average"] is not None
+
+    def test_client_uses_executor(self):
+        from ifunny import Client
+
+        client = Client(prefix = "!")
+        executor = client.use_executor(workers = 1)
+        done = threading.Event()
+        client.commands = {
+            "ping": Command(lambda message, args: done.set(), "ping")
+        }
+
+        invoked = client.resolve_command(
+            mock.Mock(content = "!ping", channel_url = "chat"))
+
+        assert invoked.name == "ping"
+        assert done.wait(2)
+        executor.shutdown(wait = False)
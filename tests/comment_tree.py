@@ -0,0 +1,214 @@
+import unittest
+from unittest import mock
+
+from ifunny import objects
+from ifunny.util import methods, exceptions
+from tests.helpers import rate_limited
+
+
+def _comment(client, id, parent = None, root = None, depth = 0):
+    data = {
+        "id": id,
+        "cid": "post",
+        "is_reply": parent is not None,
+        "parent_comm_id": parent,
+        "root_comm_id": root,
+        "depth": depth
+    }
+
+    return objects.Comment(id, client = client, data = data, post = "post")
+
+
+class CommentTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.client = objects._mixin.ClientBase()
+        comments = [
+            _comment(self.client, "a"),
+            _comment(self.client, "b"),
+            _comment(self.client, "a1", "a", "a", 1),
+            _comment(self.client, "a2", "a", "a", 1),
+            _comment(self.client, "a1x", "a1", "a", 2)
+        ]
+
+        self.tree = objects.CommentTree("post",
+                                        client = self.client,
+                                        comments = comments)
+
+    def test_roots(self):
+        assert [comment.id for comment in self.tree.roots] == ["a", "b"]
+
+    def test_children(self):
+        assert [comment.id
+                for comment in self.tree.children("a")] == ["a1", "a2"]
+        assert self.tree.children("b") == []
+
+    def test_siblings(self):
+        assert [comment.id
+                for comment in self.tree.siblings("a2")] == ["a1", "a2"]
+
+    def test_parent_root(self):
+        assert self.tree.parent("a1x").id == "a1"
+        assert self.tree.root("a1x").id == "a"
+        assert self.tree.parent("a") is None
+
+    def test_parent_missing(self):
+        data = {
+            "id": "b1",
+            "cid": "post",
+            "is_reply": True,
+            "root_comm_id": "b",
+            "depth": 1
+        }
+        reply = objects.Comment("b1",
+                                client = self.client,
+                                data = data,
+                                post = "post")
+
+        with mock.patch.object(methods, "send") as send:
+            self.tree.add(reply)
+            assert self.tree.parent("b1").id == "b"
+
+        send.assert_not_called()
+
+    def test_depth(self):
+        assert self.tree.depth("a") == 0
+        assert self.tree.depth("a1x") == 2
+
+    def test_order(self):
+        assert [comment.id
+                for comment in self.tree] == ["a", "a1", "a1x", "a2", "b"]
+
+    def test_no_requests(self):
+        with mock.patch("requests.request") as request:
+            list(self.tree)
+            self.tree.siblings("a1x")
+            self.tree.depth("a1x")
+
+        assert not request.called
+
+
+class CommentCrawlTest(unittest.TestCase):
+    def setUp(self):
+        self.client = objects._mixin.ClientBase()
+        self.post = objects.Post("post", client = self.client)
+        self.fail_on = None
+
+    def _page(self, items, next = None):
+        return {
+            "items": items,
+            "paging": {
+                "cursors": {
+                    "next": next
+                },
+                "hasNext": bool(next),
+                "hasPrev": False
+            }
+        }
+
+    def _paginated_data(self, url, key, headers, next = None, **kwargs):
+        if url == self.fail_on:
+            self.fail_on = None
+            raise exceptions.BadAPIResponse(url)
+
+        if url.endswith("/comments"):
+            ids = ["a", "b"] if not next else ["c"]
+            items = [{
+                "id": id,
+                "cid": "post",
+                "is_reply": False,
+                "num": {
+                    "replies": 0 if id == "b" else 2
+                }
+            } for id in ids]
+
+            return self._page(items, None if next else "page2")
+
+        root = url.split("/")[-2]
+        items = [{
+            "id": f"{root}{index}",
+            "cid": "post",
+            "is_reply": True,
+            "parent_comm_id": root,
+            "root_comm_id": root,
+            "depth": 1
+        } for index in range(2)]
+
+        return self._page(items)
+
+    def _crawl(self, **kwargs):
+        with mock.patch.object(methods,
+                               "paginated_data",
+                               side_effect = self._paginated_data):
+            return [
+                comment.id for comment in self.post.crawl_comments(**kwargs)
+            ]
+
+    def test_thread_order(self):
+        assert self._crawl() == ["a", "a0", "a1", "b", "c", "c0", "c1"]
+
+    def test_arrival_order(self):
+        assert sorted(self._crawl(order = "arrival")) == sorted(
+            ["a", "a0", "a1", "b", "c", "c0", "c1"])
+
+    def test_rate_limited(self):
+        limited = f"{self.client.api}/content/post/comments/a/replies"
+
+        with rate_limited(self._paginated_data, limited) as sleep:
+            ids = [comment.id for comment in self.post.crawl_comments()]
+
+        assert ids == ["a", "a0", "a1", "b", "c", "c0", "c1"]
+        sleep.assert_called_once()
+
+    def test_resume(self):
+        checkpoint = {}
+        self.fail_on = f"{self.client.api}/content/post/comments/c/replies"
+
+        with self.assertRaises(exceptions.BadAPIResponse):
+            self._crawl(checkpoint = checkpoint)
+
+        assert checkpoint["next"] == "page2"
+        assert self._crawl(checkpoint = checkpoint) == ["c", "c0", "c1"]
+
+
+class CommentRelationTest(unittest.TestCase):
+    def setUp(self):
+        self.client = objects._mixin.ClientBase()
+
+    def test_memoized(self):
+        comment = _comment(self.client, "a1x", "a1", "a", 2)
+        assert comment.parent is comment.parent
+        assert comment.root is comment.root
+        assert comment.post is comment.post
+        assert comment.parent.post is comment.post
+
+    def test_no_parent_id(self):
+        data = {"id": "a1", "cid": "post", "is_reply": True, "depth": 1}
+        reply = objects.Comment("a1",
+                                client = self.client,
+                                data = {**data, "root_comm_id": "a"},
+                                post = "post")
+
+        with mock.patch.object(methods, "send") as send:
+            objects.Comment.resolve([reply], fetch = False)
+            assert reply.parent.id == reply.root.id == "a"
+
+        send.assert_not_called()
+
+    def test_resolve_once(self):
+        comments = [
+            _comment(self.client, "a1", "a", "a", 1),
+            _comment(self.client, "a2", "a", "a", 1),
+            _comment(self.client, "a1x", "a1", "a", 2)
+        ]
+        payload = {"data": {"comment": {"id": "a", "is_reply": False}}}
+        response = mock.Mock(status_code = 200, content = b"{}", headers = {})
+        response.json.return_value = payload
+
+        with mock.patch("requests.request",
+                        return_value = response) as request:
+            objects.Comment.resolve(comments)
+
+        assert request.call_count == 1
+        assert comments[2].parent is comments[0]
+        assert comments[0].root is comments[1].root
+        assert comments[0].root.is_root
@@ -0,0 +1,85 @@
+import unittest, tempfile, os, json, multiprocessing
+from ifunny.util import config
+
+
+def _write_keys(home, start):
+    store = config.ConfigStore(home, delay = 0)
+
+    for key in range(start, start + 20):
+        store.update({str(key): key})
+        store.flush()
+
+    store.close()
+
+
+class ConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.home = self.directory.name
+        self.store = config.ConfigStore(self.home, delay = 60)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def _disk(self):
+        with open(self.store.path) as stream:
+            return json.load(stream)
+
+    def test_load_creates(self):
+        assert self.store.load() == {}
+        assert os.path.isfile(self.store.path)
+
+    def test_update_is_coalesced(self):
+        self.store.load()
+        self.store.update({"foo": 1})
+        self.store.update({"foo": 2, "bar": 3})
+        assert self._disk() == {}
+        self.store.flush()
+        assert self._disk() == {"foo": 2, "bar": 3}
+
+    def test_merge(self):
+        other = config.ConfigStore(self.home, delay = 60)
+        self.store.update({"foo": 1})
+        other.update({"bar": 2})
+        self.store.flush()
+        other.close()
+        assert self._disk() == {"foo": 1, "bar": 2}
+
+    def test_close(self):
+        self.store.update({"foo": 1})
+        assert self.store in config._open
+
+        self.store.close()
+        assert self.store not in config._open
+        assert self._disk() == {"foo": 1}
+
+    def test_account(self):
+        self.store.update_account("foo@bar.baz", token = "token")
+        assert self.store.account("foo@bar.baz") == {"token": "token"}
+        self.store.flush()
+
+        other = config.ConfigStore(self.home)
+        assert other.account("foo@bar.baz") == {"token": "token"}
+        other.close()
+        assert "foo@bar.baz" not in json.dumps(self.store.load())
+
+    def test_processes(self):
+        self.store.load()
+        workers = [
+            multiprocessing.Process(target = _write_keys,
+                                    args = (self.home, start))
+            for start in range(0, 80, 20)
+        ]
+
+        for worker in workers:
+            worker.start()
+
+        for worker in workers:
+            worker.join()
+
+        assert self._disk() == {str(key): key for key in range(80)}
+
+
+if __name__ == '__main__':
+    unittest.main()
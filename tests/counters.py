@@ -0,0 +1,46 @@
+import unittest, time
+from unittest import mock
+
+from ifunny import objects
+
+
+class CountersTest(unittest.TestCase):
+    def setUp(self):
+        self.client = objects._mixin.ClientBase()
+        self.values = [{"featured": 1, "news": 2}]
+
+    def _request(self, method, url, **kwargs):
+        response = mock.Mock(status_code = 200)
+        response.json.return_value = {"data": self.values[0]}
+        return response
+
+    def test_ttl(self):
+        with mock.patch("requests.request",
+                        side_effect = self._request) as request:
+            values = (self.client.unread_featured, self.client.unread_news,
+                      self.client.unread_collective,
+                      self.client.unread_subscriptions)
+
+        assert values == (1, 2, 0, 0)
+        assert request.call_count == 1
+
+        with mock.patch("requests.request",
+                        side_effect = self._request) as request:
+            self.client.unread.fresh.featured
+
+        assert request.call_count == 1
+
+    def test_poller_changes(self):
+        changes = []
+        self.client.unread.on_change(lambda counters, changed: changes.append(
+            changed))
+
+        with mock.patch("requests.request", side_effect = self._request):
+            self.client.unread.featured
+            self.client.unread.start(interval = 0.01, min_interval = 0.01)
+            time.sleep(0.05)
+            self.values[0] = {"featured": 3, "news": 2}
+            time.sleep(0.1)
+            self.client.unread.stop()
+
+        assert changes == [{"featured": (1, 3)}]
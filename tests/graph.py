@@ -0,0 +1,99 @@
+import unittest, tempfile
+from unittest import mock
+
+from ifunny import objects
+from ifunny.ext import graph
+from ifunny.util import methods
+from tests.helpers import rate_limited
+
+_real = methods.paginated_data
+
+# user -> subscribers
+_graph = {"a": ["b", "c"], "b": ["a", "d"], "c": ["d"], "d": ["e"], "e": []}
+
+
+def _paginated_data(url, key, headers, **kwargs):
+    id = url.split("/")[-2]
+    items = [{"id": other} for other in _graph[id]]
+
+    return {
+        "items": items,
+        "paging": {
+            "cursors": {},
+            "hasNext": False,
+            "hasPrev": False
+        }
+    }
+
+
+class BloomFilterTest(unittest.TestCase):
+    def test_membership(self):
+        bloom = graph.BloomFilter(1000, 0.01)
+
+        for index in range(1000):
+            bloom.add(str(index))
+
+        assert all(str(index) in bloom for index in range(1000))
+        assert sum(f"x{index}" in bloom for index in range(1000)) < 50
+
+    def test_dump(self):
+        bloom = graph.BloomFilter(100)
+        bloom.add("foo")
+        loaded = graph.BloomFilter.load(bloom.dump())
+        assert "foo" in loaded and "bar" not in loaded
+        assert len(loaded) == 1
+
+
+class GraphCrawlerTest(unittest.TestCase):
+    def setUp(self):
+        self.client = objects._mixin.ClientBase()
+        self.directory = tempfile.TemporaryDirectory()
+        self.patch = mock.patch.object(methods,
+                                       "paginated_data",
+                                       side_effect = _paginated_data)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def test_depth(self):
+        crawler = graph.GraphCrawler(self.client, max_depth = 1, workers = 1)
+        edges = set(crawler.crawl("a"))
+        assert edges == {("b", "a", 0), ("c", "a", 0), ("a", "b", 1),
+                         ("d", "b", 1), ("d", "c", 1)}
+
+    def test_rate_limited(self):
+        with mock.patch.object(methods, "paginated_data", _real), \
+                rate_limited(_paginated_data) as sleep:
+            crawler = graph.GraphCrawler(self.client,
+                                         max_depth = 0,
+                                         workers = 1)
+            edges = set(crawler.crawl("a"))
+
+        assert edges == {("b", "a", 0), ("c", "a", 0)}
+        sleep.assert_called_once()
+
+    def test_output_and_resume(self):
+        checkpoint = f"{self.directory.name}/crawl.json"
+        output = f"{self.directory.name}/edges.txt"
+        crawler = graph.GraphCrawler(self.client,
+                                     max_depth = 5,
+                                     workers = 1,
+                                     checkpoint = checkpoint,
+                                     checkpoint_every = 1)
+
+        crawl = crawler.crawl("a", output = output)
+
+        for _ in range(3):
+            next(crawl)
+
+        crawl.close()
+
+        resumed = graph.GraphCrawler(self.client,
+                                     max_depth = 5,
+                                     checkpoint = checkpoint)
+        [*resumed.crawl(output = output)]
+
+        edges = [*graph.read_edges(output)]
+        assert len(edges) == len(set(edges)) == 6
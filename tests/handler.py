@@ -0,0 +1,159 @@
+import json, unittest
+from unittest import mock
+
+from ifunny.client import Filter
+from ifunny.client._handler import Handler
+
+
+def frame(key, channel = "chat", sender = "them", message = "hello"):
+    data = {
+        "msg_id": 1,
+        "channel_url": channel,
+        "message": message,
+        "user": {
+            "guest_id": f"{sender}_id",
+            "name": sender
+        }
+    }
+
+    return f"{key}{json.dumps(data)}"
+
+
+class FilterTest(unittest.TestCase):
+    def test_empty(self):
+        assert Filter()("MESG", {"channel_url": "chat"})
+
+    def test_channels(self):
+        check = Filter(channels = ["chat"], exclude_channels = ["other"])
+        assert check("MESG", {"channel_url": "chat"})
+        assert not check("MESG", {"channel_url": "other"})
+        assert not check("MESG", {"channel_url": "third"})
+
+    def test_types(self):
+        check = Filter(types = ["MESG"])
+        assert check("MESG", {})
+        assert not check("FILE", {})
+
+    def test_senders(self):
+        check = Filter(senders = ["them"], exclude_senders = ["spam_id"])
+        assert check("MESG", {"user": {"guest_id": "x", "name": "them"}})
+        assert not check("MESG", {"user": {"guest_id": "y", "name": "you"}})
+        assert not check("MESG", {"user": {"guest_id": "spam_id"}})
+        assert check("SYEV", {})
+
+    def test_prefix(self):
+        check = Filter(prefix = ["!", "?"])
+        assert check("MESG", {"message": "!ping"})
+        assert check("MESG", {"message": "?ping"})
+        assert not check("MESG", {"message": "ping"})
+        assert not check("FILE", {})
+        assert check("SYEV", {})
+
+
+class HandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.nick = "me"
+        self.client._could_be_command.return_value = False
+        self.client.socket.acks = set()
+        self.handler = Handler(self.client)
+
+        patcher = mock.patch("ifunny.client._handler.objects")
+        self.objects = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_filtered_before_objects(self):
+        seen = mock.Mock()
+        self.handler.events["on_message"] = seen
+        self.handler.add_filter(channels = ["chat"])
+
+        self.handler.resolve(frame("MESG", channel = "other"))
+        self.handler.resolve(frame("FILE", channel = "other"))
+
+        self.objects.Message.assert_not_called()
+        seen.assert_not_called()
+        assert self.handler.filtered == 2
+
+        self.handler.resolve(frame("MESG"))
+        seen.assert_called_once()
+
+    def test_filtered_still_seen(self):
+        self.handler.add_filter(lambda key, data: False)
+        self.handler.resolve(frame("MESG"))
+        self.client.socket._seen.assert_called_once()
+
+    def test_no_consumer(self):
+        self.handler.resolve(frame("MESG"))
+        self.handler.resolve(frame("FILE"))
+        self.objects.Message.assert_not_called()
+
+    def test_could_be_command(self):
+        self.client._could_be_command.return_value = True
+        self.handler.resolve(frame("MESG"))
+        self.objects.Message.assert_called_once()
+        self.client.resolve_command.assert_called_once()
+
+    def test_default_event_consumes(self):
+        self.handler.events["on_default"] = mock.Mock()
+        self.handler.resolve(frame("MESG"))
+        self.objects.Message.assert_called_once()
+
+    def test_self_pinned(self):
+        self.client.id = "me_id"
+        self.handler.events["on_message"] = seen = mock.Mock()
+        self.handler.pin_self()
+        del self.client.nick
+
+        self.handler.resolve(frame("MESG", sender = "me"))
+        self.handler.resolve(frame("FILE", sender = "me"))
+        seen.assert_not_called()
+
+        self.handler.resolve(frame("MESG"))
+        seen.assert_called_once()
+
+    def test_self_forgotten(self):
+        self.client.id = "me_id"
+        self.handler.pin_self()
+        self.handler.forget_self()
+        self.client.id = "new_id"
+
+        assert self.handler._is_self({"guest_id": "new_id"})
+        assert not self.handler._is_self({"guest_id": "me_id"})
+
+    def test_missed_filtered(self):
+        self.client.id = "me_id"
+        self.handler.events["on_message"] = seen = mock.Mock()
+        self.handler.add_filter(channels = ["chat"],
+                                exclude_senders = ["spam"])
+
+        def missed(channel, sender):
+            return mock.Mock(
+                _object_data_payload = {
+                    "type": "MESG",
+                    "channel_url": channel,
+                    "message": "hello",
+                    "user": {
+                        "user_id": f"{sender}_id",
+                        "nickname": sender
+                    }
+                })
+
+        for message in [
+                missed("other", "them"),
+                missed("chat", "spam"),
+                missed("chat", "me")
+        ]:
+            self.handler._on_missed(message)
+
+        seen.assert_not_called()
+        assert self.handler.filtered == 2
+
+        self.handler._on_missed(missed("chat", "them"))
+        seen.assert_called_once()
+
+    def test_channel_update_no_consumer(self):
+        data = {"cat": 10000, "channel_url": "chat", "data": {}}
+        self.handler.resolve(f"SYEV{json.dumps(data)}")
+        self.objects.Chat.assert_not_called()
+        self.objects.ChatInvite.assert_not_called()
+
@@ -0,0 +1,28 @@
+import contextlib
+from collections import defaultdict
+from unittest import mock
+
+from ifunny.util import methods
+
+
+@contextlib.contextmanager
+def rate_limited(paginated_data, url = None):
+    """
+    Answer requests with pages from ``paginated_data``, except for the first request to ``url``
+    (or the first request at all), which is rejected with a ``429``.
+    Yields the patched ``time.sleep``, so that a test can check that the request was retried
+    """
+    pending = [url]
+
+    def send(method, url, params = {}, **kwargs):
+        if pending and pending[0] in {None, url}:
+            pending.clear()
+            return mock.Mock(status_code = 429, text = "slow down")
+
+        page = paginated_data(url, None, None, next = params.get("next"))
+        data = {"data": defaultdict(lambda: page)}
+        return mock.Mock(status_code = 200, json = lambda: data)
+
+    with mock.patch.object(methods, "send", side_effect = send), \
+            mock.patch.object(methods.time, "sleep") as sleep:
+        yield sleep
@@ -0,0 +1,109 @@
+import asyncio, threading, unittest
+from unittest import mock
+
+from ifunny.client import AsyncSocket, SocketHub
+from ifunny.client._handler import Event
+from tests.aio import FakeConnection
+
+
+class SocketHubTest(unittest.TestCase):
+    def setUp(self):
+        self.hub = SocketHub(workers = 2, reconnect = False)
+
+    def tearDown(self):
+        self.hub.stop(timeout = 2)
+
+    def _client(self, frames):
+        client = mock.Mock(id = "me", messenger_token = "token")
+        client.socket = AsyncSocket(client, reconnect = False)
+        client.socket._routed = True
+        client.socket._connect = lambda url: FakeConnection(frames)
+        return client
+
+    def test_many_clients_one_loop(self):
+        handled = []
+        done = threading.Event()
+        clients = [self._client([f"MESG{index}"]) for index in range(3)]
+
+        def resolve(data):
+            handled.append((data, threading.current_thread().name))
+
+            if len(handled) == 3:
+                done.set()
+
+        for client in clients:
+            client.handler.resolve = resolve
+            self.hub.add(client)
+
+        assert done.wait(2)
+        assert sorted(data for data, _ in handled) == [
+            "MESG0", "MESG1", "MESG2"
+        ]
+        assert all(name.startswith("ifunny-hub_") for _, name in handled)
+        assert {client.socket.loop for client in clients} == {self.hub.loop}
+        assert len(self.hub) == 3
+
+    def test_reconnect_catch_up_from_dispatcher(self):
+        done = threading.Event()
+        threads = []
+
+        async def catch_up():
+            threads.append(threading.current_thread())
+            done.set()
+
+        client = self._client(["LOGI{}"])
+        client.socket._catch_up = catch_up
+
+        def resolve(data):
+            client.socket.attempts = 1
+            client.socket._on_login({})
+
+        client.handler.resolve = resolve
+        self.hub.start()
+        self.hub.loop.set_debug(True)
+        self.hub.add(client)
+
+        assert done.wait(2)
+        assert threads == [self.hub.thread]
+
+    def test_async_events_run_on_loop(self):
+        done = threading.Event()
+        loops = []
+
+        async def on_message(data):
+            loops.append(asyncio.get_running_loop())
+            done.set()
+
+        client = self._client(["MESG{}"])
+        event = Event(on_message, "on_message")
+        client.handler.resolve = lambda data: event(data)
+        self.hub.add(client)
+
+        assert done.wait(2)
+        assert loops == [self.hub.loop]
+
+    def test_gives_async_socket(self):
+        client = mock.Mock(id = "me", messenger_token = "token")
+        client.socket = mock.Mock()
+
+        with mock.patch.object(AsyncSocket, "run",
+                               new = mock.AsyncMock()) as run:
+            socket = self.hub.add(client)
+            self.hub.remove(client)
+
+        assert isinstance(client.socket, AsyncSocket)
+        assert socket is client.socket
+        assert client not in self.hub
+        run.assert_awaited_once()
+
+    def test_remove_before_running(self):
+        client = self._client([])
+        self.hub.add(client)
+        self.hub.remove(client, timeout = 2)
+        assert not client.socket.active
+
+    def test_remove_unknown(self):
+        client = self._client([])
+        self.hub.remove(client)
+        assert client.socket.dispatcher is None
+        assert client not in self.hub
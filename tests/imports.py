@@ -0,0 +1,41 @@
+import unittest, subprocess, sys, os, tempfile
+
+
+class ImportTest(unittest.TestCase):
+    root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+    def _import(self, home, *flags):
+        env = {**os.environ, "HOME": home, "PYTHONPATH": self.root}
+
+        return subprocess.run(
+            [sys.executable, *flags, "-c", "import ifunny"],
+            env = env,
+            stderr = subprocess.PIPE,
+            check = True).stderr.decode()
+
+    def test_no_home_path(self):
+        with tempfile.TemporaryDirectory() as home:
+            self._import(home)
+            assert not os.path.exists(f"{home}/.ifunnypy")
+
+    def test_import_time(self):
+        # self time of our own modules, in microseconds. Dependencies are not counted
+        with tempfile.TemporaryDirectory() as home:
+            output = self._import(home, "-X", "importtime")
+
+        total = 0
+
+        for line in output.splitlines():
+            if not line.startswith("import time:"):
+                continue
+
+            own, _, name = line[len("import time:"):].split("|")
+
+            if name.strip().startswith("ifunny"):
+                total += int(own)
+
+        assert total < 50000
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest, tempfile, time
+from unittest import mock
+
+from ifunny import Client
+from ifunny.util import config, methods
+
+
+def _response(status, body = None):
+    response = mock.Mock()
+    response.status_code = status
+    response.json.return_value = body if body else {}
+    response.url = "https://api.ifunny.mobi/v4"
+    return response
+
+
+class LoginTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = Client()
+        self.client._config_store = config.ConfigStore(self.directory.name,
+                                                       delay = 60)
+        self.store = self.client._config_store
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_validated_recently(self):
+        self.store.update_account("foo@bar",
+                                  token = "a",
+                                  validated_at = time.time())
+
+        with mock.patch("requests.request") as request:
+            self.client.login("foo@bar")
+
+        assert self.client.authenticated
+        assert not request.called
+
+    def test_validate_expired(self):
+        self.store.update_account("foo@bar", token = "a", validated_at = 0)
+
+        with mock.patch("requests.request",
+                        return_value = _response(200, {"data": {}})) as request:
+            self.client.login("foo@bar", validate_ttl = 60)
+
+        assert request.call_count == 1
+        assert self.store.account("foo@bar")["validated_at"] > 0
+
+    def test_lazy_relogin(self):
+        self.store.update_account("foo@bar", token = "stale")
+        self.client.login("foo@bar", "hunter2", lazy = True)
+
+        responses = [
+            _response(401),
+            _response(200, {"access_token": "new"}),
+            _response(200, {"data": {}})
+        ]
+
+        with mock.patch("requests.request", side_effect = responses) as request:
+            methods.request("get",
+                            f"{self.client.api}/account",
+                            headers = self.client.headers,
+                            client = self.client)
+
+        assert request.call_count == 3
+        assert request.call_args[1]["headers"]["Authorization"] == "Bearer new"
+        assert self.store.account("foo@bar")["token"] == "new"
+
+    def test_relogin_once(self):
+        self.store.update_account("foo@bar", token = "stale")
+        self.client.login("foo@bar", "hunter2", lazy = True)
+        stale = self.client.headers
+
+        responses = [
+            _response(401),
+            _response(200, {"access_token": "new"}),
+            _response(200, {"data": {}}),
+            _response(401),
+            _response(200, {"data": {}}),
+            _response(401)
+        ]
+
+        with mock.patch("requests.request", side_effect = responses) as request:
+            methods.send("get",
+                         f"{self.client.api}/account",
+                         headers = self.client.headers,
+                         client = self.client)
+
+            # sent before the new token was acquired, so it is retried with it
+            response = methods.send("get",
+                                    f"{self.client.api}/account",
+                                    headers = stale,
+                                    client = self.client)
+            assert response.status_code == 200
+
+            response = methods.send("get",
+                                    f"{self.client.api}/account",
+                                    headers = self.client.headers,
+                                    client = self.client)
+            assert response.status_code == 401
+
+        assert request.call_count == 6
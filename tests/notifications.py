@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+from ifunny import objects
+from ifunny.client import NotificationStream
+
+
+class NotificationStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.client = objects._mixin.ClientBase()
+        self.news = [self._notification(index) for index in range(3)]
+        self.requests = 0
+        self.client._notifications_paginated = self._paginated
+        self.stream = NotificationStream(self.client)
+
+    def _notification(self, index):
+        data = {"id": str(index), "type": "smile"}
+        return objects.Notification(data, client = self.client)
+
+    def _paginated(self, limit = None, prev = None, next = None):
+        self.requests += 1
+        start = int(next) if next else 0
+        items = self.news[start:start + 2]
+        more = start + 2 < len(self.news)
+
+        return {
+            "items": items,
+            "paging": {
+                "prev": None,
+                "next": str(start + 2) if more else None
+            }
+        }
+
+    def test_only_new(self):
+        got = []
+        self.stream.on_notification(got.append)
+        self.stream.poll()
+        assert got == []
+
+        self.news = [self._notification(index)
+                     for index in (5, 4, 3)] + self.news
+        new = self.stream.poll(3)
+
+        assert [notification.id for notification in new] == ["3", "4", "5"]
+        assert got == new
+        assert self.stream.poll(1) == []
+
+    def test_stop_keeps_shared_poller(self):
+        unread = self.client.unread
+
+        with mock.patch.object(unread, "_request", return_value = {}):
+            unread.start(interval = 60)
+            self.stream.start(interval = 60)
+            self.stream.stop()
+            assert unread._poller and unread._poller.is_alive()
+            assert self.stream._on_change not in unread._callbacks
+            unread.stop()
+
+            self.stream.start(interval = 60)
+            other = unread.subscribe(lambda counters, changes: None)
+            self.stream.stop()
+            assert unread._poller.is_alive()
+            unread.unsubscribe(other)
+            assert unread._poller is None
+
+    def test_counter_change(self):
+        self.stream.poll()
+        requests = self.requests
+        self.stream._on_change(self.client.unread, {"featured": (0, 1)})
+        self.stream._on_change(self.client.unread, {"news": (2, 1)})
+        assert self.requests == requests
+
+        self.news = [self._notification(9)] + self.news
+        self.stream._on_change(self.client.unread, {"news": (1, 2)})
+        assert self.requests == requests + 1
@@ -0,0 +1,73 @@
+import unittest, tempfile
+from unittest import mock
+
+from ifunny import ClientPool, objects
+from ifunny.util.cache import ObjectCache
+from ifunny.util.ratelimit import RateBudget
+
+
+class RateBudgetTest(unittest.TestCase):
+    def test_burst(self):
+        budget = RateBudget(1, burst = 3)
+
+        for _ in range(3):
+            assert budget.try_acquire() == 0
+
+        assert budget.try_acquire() > 0
+
+    def test_timeout(self):
+        budget = RateBudget(1, burst = 1)
+        budget.acquire()
+        assert not budget.acquire(timeout = 0.05)
+
+    def test_penalize(self):
+        budget = RateBudget(100, burst = 100)
+        budget.penalize(1)
+        assert budget.available == 0
+        assert budget.try_acquire() > 0.9
+
+
+class ClientPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ObjectCache(f"{self.directory.name}/cache.sqlite",
+                                 types = {"user", "post"})
+        self.pool = ClientPool(cache = self.cache)
+        self.clients = [
+            self.pool.add(objects._mixin.ClientBase()) for _ in range(3)
+        ]
+
+    def tearDown(self):
+        self.pool.close()
+        self.directory.cleanup()
+
+    def test_shared(self):
+        for client in self.clients:
+            assert client.session is self.pool.session
+            assert client.cache is self.cache
+
+        self.pool.remove(self.clients[0])
+        assert self.clients[0].session is None
+        assert len(self.pool) == 2
+
+    def test_round_robin(self):
+        picked = [self.pool.pick() for _ in range(6)]
+        assert picked == self.clients * 2
+
+    def test_least_loaded(self):
+        self.pool.strategy = "least_loaded"
+        self.clients[0].pending = 2
+        self.clients[1].pending = 1
+        self.clients[2].pending = 3
+        assert self.pool.pick() is self.clients[1]
+
+    def test_session_used(self):
+        response = mock.Mock(status_code = 200)
+        response.json.return_value = {"data": {"available": True}}
+
+        with mock.patch.object(self.pool.session, "request",
+                               return_value = response) as request:
+            assert self.pool.pick().email_is_available("foo@bar")
+
+        assert request.called
+        assert self.pool.pending == 0
@@ -0,0 +1,161 @@
+import threading, unittest
+from unittest import mock
+
+from ifunny.client._queue import SendQueue
+from ifunny.util import exceptions
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.gate = threading.Event()
+        self.first = threading.Event()
+        self.last_error = None
+
+    def _send_frame(self, key, data, ack = False, timeout = 10, retries = 1):
+        self.first.set()
+        self.gate.wait(2)
+        self.sent.append((data.get("channel_url"), data.get("message")))
+
+
+class SendQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.socket = FakeSocket()
+
+    def _hold(self, queue):
+        """
+        Send one frame and hold the queue on it, so that the next ones wait
+        """
+        held = queue.put("MESG", {"channel_url": "held", "message": "held"})
+        assert self.socket.first.wait(2)
+        return held
+
+    def test_priority(self):
+        queue = SendQueue(self.socket)
+        self._hold(queue)
+
+        low = queue.put("MESG", {"channel_url": "a", "message": "low"},
+                        priority = 2)
+        high = queue.put("MESG", {"channel_url": "a", "message": "high"},
+                         priority = 0)
+
+        self.socket.gate.set()
+        low.result(2)
+        high.result(2)
+
+        assert [message for _, message in self.socket.sent
+                ] == ["held", "high", "low"]
+
+    def test_coalesce(self):
+        queue = SendQueue(self.socket, coalesce = True)
+        self._hold(queue)
+
+        first = queue.put("MESG", {"channel_url": "a", "message": "one"})
+        second = queue.put("MESG", {"channel_url": "a", "message": "two"})
+        other = queue.put("MESG", {"channel_url": "b", "message": "three"})
+
+        assert first is second
+        assert len(queue) == 2
+
+        self.socket.gate.set()
+        first.result(2)
+        other.result(2)
+
+        assert ("a", "one\ntwo") in self.socket.sent
+        assert queue.metrics["coalesced"] == 1
+
+    def test_coalesce_limit(self):
+        queue = SendQueue(self.socket, coalesce = True, coalesce_limit = 5)
+        self._hold(queue)
+
+        first = queue.put("MESG", {"channel_url": "a", "message": "one"})
+        second = queue.put("MESG", {"channel_url": "a", "message": "two"})
+
+        assert first is not second
+        self.socket.gate.set()
+
+    def test_channel_rate(self):
+        self.socket.gate.set()
+        queue = SendQueue(self.socket, channel_rate = 20, channel_burst = 1)
+
+        futures = [
+            queue.put("MESG", {"channel_url": channel, "message": channel})
+            for channel in ["a", "a", "b"]
+        ]
+
+        for future in futures:
+            future.result(2)
+
+        assert [channel for channel, _ in self.socket.sent] == ["a", "b", "a"]
+
+    def test_drop_new(self):
+        queue = SendQueue(self.socket, max_size = 1, policy = "drop_new")
+        self._hold(queue)
+
+        kept = queue.put("MESG", {"channel_url": "a", "message": "kept"})
+        dropped = queue.put("MESG", {"channel_url": "a", "message": "no"})
+
+        with self.assertRaises(exceptions.ChatQueueFull):
+            dropped.result(1)
+
+        self.socket.gate.set()
+        kept.result(2)
+        assert queue.metrics["dropped"] == 1
+
+    def test_drop_old(self):
+        queue = SendQueue(self.socket, max_size = 1, policy = "drop_old")
+        self._hold(queue)
+
+        old = queue.put("MESG", {"channel_url": "a", "message": "old"})
+        new = queue.put("MESG", {"channel_url": "a", "message": "new"})
+
+        with self.assertRaises(exceptions.ChatQueueFull):
+            old.result(1)
+
+        self.socket.gate.set()
+        new.result(2)
+
+    def test_block_timeout(self):
+        queue = SendQueue(self.socket, max_size = 1)
+        self._hold(queue)
+        queue.put("MESG", {"channel_url": "a", "message": "waiting"})
+
+        full = queue.put("MESG", {"channel_url": "a", "message": "full"},
+                         block_timeout = 0.05)
+
+        with self.assertRaises(exceptions.ChatQueueFull):
+            full.result(1)
+
+        self.socket.gate.set()
+
+    def test_metrics(self):
+        self.socket.gate.set()
+        queue = SendQueue(self.socket)
+        queue.put("MESG", {"channel_url": "a", "message": "one"}).result(2)
+
+        metrics = queue.metrics
+        assert metrics["sent"] == 1
+        assert metrics["depth"] == 0
+        assert metrics["lanes"] == [0, 0, 0]
+        assert metrics["latency"]["max"] >= 0
+
+    def test_stop(self):
+        queue = SendQueue(self.socket)
+        self._hold(queue)
+        waiting = queue.put("MESG", {"channel_url": "a", "message": "one"})
+        queue.stop()
+
+        with self.assertRaises(exceptions.ChatNotActive):
+            waiting.result(1)
+
+        self.socket.gate.set()
+
+    def test_retry_on_failure(self):
+        self.socket.gate.set()
+        queue = SendQueue(self.socket, retry_delay = 0.01)
+        self.socket._send_frame = mock.Mock(
+            side_effect = [exceptions.ChatNotActive("down"), None])
+
+        queue.put("MESG", {"channel_url": "a", "message": "one"}).result(2)
+        assert self.socket._send_frame.call_count == 2
+        assert isinstance(self.socket.last_error, exceptions.ChatNotActive)
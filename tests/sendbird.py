@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+
+from ifunny.client._sendbird import Socket
+
+
+class SocketTest(unittest.TestCase):
+    def setUp(self):
+        self.client = mock.Mock(id = "me",
+                                messenger_token = "token",
+                                sendbird_session_key = "key")
+        self.socket = Socket(self.client, False, False, backoff = 1,
+                             max_backoff = 8)
+
+    def _message(self, id, created_at):
+        message = mock.Mock(id = id)
+        message.get = lambda key, default = None: {
+            "created_at": created_at
+        }.get(key, default)
+        return message
+
+    def test_delay_bounds(self):
+        for attempts, most in [(1, 1), (2, 2), (4, 8), (10, 8)]:
+            self.socket.attempts = attempts
+            assert all(0 <= self.socket._delay() <= most for _ in range(50))
+
+    def test_url_resume(self):
+        assert self.socket._url().endswith("&access_token=token")
+
+        self.socket._resume = True
+        assert self.socket._url().endswith("&key=key")
+
+        self.client.sendbird_session_key = None
+        assert self.socket._url().endswith("&access_token=token")
+
+    def test_seen(self):
+        self.socket._seen("chat", 5)
+        self.socket._seen("chat", 3)
+        self.socket._seen("chat", None)
+        assert self.socket.last_seen == {"chat": 5}
+
+    def test_login_catches_up(self):
+        self.socket._catch_up_all = mock.Mock()
+        self.socket._on_login({})
+        assert self.socket.connected
+        self.socket._catch_up_all.assert_not_called()
+
+        self.socket.attempts = 3
+        self.socket._on_login({})
+        assert self.socket.attempts == 0
+        self.client.handler._on_reconnect.assert_called_once_with({})
+        self.socket._catch_up_all.assert_called_once()
+
+    def test_missed(self):
+        pages = [[self._message(id, id) for id in [9, 8, 7]],
+                 [self._message(id, id) for id in [7, 6, 5, 4]]]
+
+        def paginated(next = None):
+            index = int(next) if next else 0
+            return {
+                "items": pages[index],
+                "paging": {
+                    "prev": None,
+                    "next": str(index + 1)
+                }
+            }
+
+        chat = mock.Mock()
+        chat._messages_paginated = paginated
+
+        with mock.patch("ifunny.objects.Chat", return_value = chat):
+            missed = self.socket._missed("chat", 5)
+
+        assert [message.id for message in missed] == [6, 7, 8, 9]
+
+    def test_catch_up_errors(self):
+        self.socket.last_seen = {"chat": 1}
+        self.socket._missed = mock.Mock(side_effect = ValueError("gone"))
+        self.socket._catch_up_all()
+        assert isinstance(self.socket.last_error, ValueError)
+        self.client.handler._on_error.assert_called_once()
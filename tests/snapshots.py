@@ -0,0 +1,91 @@
+import unittest, tempfile, random
+from unittest import mock
+
+from ifunny import objects
+from ifunny.ext.snapshots import Snapshot
+from ifunny.util import methods
+from tests.helpers import rate_limited
+
+
+def _id(number):
+    return f"{number:024x}"
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.user = objects.User("user", client = objects._mixin.ClientBase())
+        self.subscribers = []
+        self.pages = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _paginated_data(self, url, key, headers, next = None, **kwargs):
+        start = int(next) if next else 0
+        end = start + 10
+        self.pages += 1
+
+        return {
+            "items": [{
+                "id": id
+            } for id in self.subscribers[start:end]],
+            "paging": {
+                "cursors": {
+                    "next": str(end)
+                },
+                "hasNext": end < len(self.subscribers),
+                "hasPrev": False
+            }
+        }
+
+    def _take(self, name, previous = None, **kwargs):
+        path = f"{self.directory.name}/{name}"
+
+        with mock.patch.object(methods,
+                               "paginated_data",
+                               side_effect = self._paginated_data):
+            if previous:
+                return Snapshot.update(self.user, path, previous, **kwargs)
+
+            return Snapshot.take(self.user, path, **kwargs)
+
+    def test_sorted_external(self):
+        self.subscribers = [_id(number) for number in range(100)]
+        random.shuffle(self.subscribers)
+        snapshot = self._take("a", chunk_size = 7)
+
+        assert [*snapshot] == sorted(self.subscribers)
+        assert len(snapshot) == 100
+        assert _id(42) in snapshot
+        assert _id(420) not in snapshot
+
+    def test_rate_limited(self):
+        self.subscribers = [_id(number) for number in range(25)]
+
+        with rate_limited(self._paginated_data) as sleep:
+            snapshot = Snapshot.take(self.user,
+                                     f"{self.directory.name}/limited")
+
+        assert [*snapshot] == sorted(self.subscribers)
+        sleep.assert_called_once()
+
+    def test_diff(self):
+        self.subscribers = [_id(number) for number in range(50)]
+        old = self._take("old")
+        self.subscribers = [_id(number) for number in range(10, 60)]
+        new = self._take("new")
+
+        assert [*old.gained(new)] == [_id(number) for number in range(50, 60)]
+        assert [*old.lost(new)] == [_id(number) for number in range(10)]
+
+    def test_update(self):
+        self.subscribers = [_id(number) for number in range(100, 0, -1)]
+        old = self._take("old", head_size = 5)
+        self.subscribers = [_id(number) for number in range(103, 0, -1)]
+        self.pages = 0
+        new = self._take("new", previous = old)
+
+        assert self.pages == 1
+        assert [*old.gained(new)] == [_id(101), _id(102), _id(103)]
+        assert new.head[:4] == [_id(103), _id(102), _id(101), _id(100)]
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+from ifunny import objects
+from ifunny.util import methods, exceptions
+
+
+class BulkUserTest(unittest.TestCase):
+    def setUp(self):
+        self.client = objects._mixin.ClientBase()
+        self.calls = []
+
+    def _request(self, method, url, errors = {}, **kwargs):
+        self.calls.append(url)
+        nick = url.split("/")[-1]
+
+        if nick == "nobody":
+            raise exceptions.NotFound(url)
+
+        if nick == "broken":
+            raise exceptions.BadAPIResponse(url)
+
+        return {"data": {"id": f"id-{nick}", "nick": nick}}
+
+    def test_order_and_errors(self):
+        with mock.patch.object(methods, "request", side_effect = self._request):
+            users = self.client.users_by_nick(
+                ["foo", "nobody", "bar", "foo", "broken"])
+
+        assert [users[0].id, users[2].id, users[3].id] == [
+            "id-foo", "id-bar", "id-foo"
+        ]
+        assert users[1] is None
+        assert isinstance(users[4], exceptions.BadAPIResponse)
+        assert len(self.calls) == 4
+
+    def test_nick_ttl(self):
+        with mock.patch.object(methods, "request", side_effect = self._request):
+            objects.User.by_nick("foo", client = self.client)
+            user = objects.User.by_nick("foo", client = self.client)
+
+        assert len(self.calls) == 1
+        assert user.nick == "foo"
+
+        self.client._nicks["foo"] = (None, None, 0)
+
+        with mock.patch.object(methods, "request", side_effect = self._request):
+            objects.User.by_nick("foo", client = self.client)
+
+        assert len(self.calls) == 2
+
+    def test_nick_data_copied(self):
+        with mock.patch.object(methods, "request", side_effect = self._request):
+            first = objects.User.by_nick("foo", client = self.client)
+            second = objects.User.by_nick("foo", client = self.client)
+
+        first._object_data["nick"] = "changed"
+        assert second._object_data["nick"] == "foo"
+        assert self.client._nick_user("foo")[1]["nick"] == "foo"
+
+    def test_nick_cache_bounded(self):
+        self.client.nick_cache_size = 3
+        self.client._remember_nick("old", "id-old")
+        self.client._nicks["old"] = ("id-old", None, 0)
+
+        for nick in ["a", "b", "c", "d"]:
+            self.client._remember_nick(nick, f"id-{nick}")
+
+        assert list(self.client._nicks) == ["b", "c", "d"]
+        assert self.client._nick_user("d") == ("id-d", None)
+
+    def test_users(self):
+        def request(method, url, **kwargs):
+            response = mock.Mock(headers = {}, content = url.encode())
+            response.status_code = 404 if url.endswith("gone") else 200
+            response.json.return_value = {"data": {"id": url.split("/")[-1]}}
+            return response
+
+        with mock.patch("requests.request", side_effect = request) as patched:
+            users = self.client.users(["a", "gone", "a", "b"])
+
+        assert patched.call_count == 3
+        assert users[1] is None
+        assert [users[0].id, users[2].id, users[3].id] == ["a", "a", "b"]